@@ -1,5 +1,9 @@
-import pymysql
-
-# Engañamos a Django sobre la versión de mysqlclient para evitar el ImproperlyConfigured
-pymysql.version_info = (2, 2, 7, "final", 0)
-pymysql.install_as_MySQLdb()
\ No newline at end of file
+try:
+    import pymysql
+except ImportError:
+    # Sin PyMySQL solo está disponible el perfil SQLite (DB_ENGINE=sqlite)
+    pymysql = None
+else:
+    # Engañamos a Django sobre la versión de mysqlclient para evitar el ImproperlyConfigured
+    pymysql.version_info = (2, 2, 7, "final", 0)
+    pymysql.install_as_MySQLdb()
@@ -42,6 +42,8 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.middleware.AuditoriaMiddleware",
+    "core.middleware.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -70,20 +72,71 @@ WSGI_APPLICATION = "config.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.mysql",
-        "NAME": env('DB_NAME', default='gestor_proyectos'),
-        "USER": env('DB_USER', default='root'),
-        "PASSWORD": env('DB_PASSWORD', default='root'),
-        "HOST": env('DB_HOST', default='127.0.0.1'),
-        "PORT": env('DB_PORT', default='3306'),
-        "OPTIONS": {
-            "init_command": "SET sql_mode='STRICT_TRANS_TABLES'",
-        },
+# DB_ENGINE elige el perfil: MySQL (por defecto) o SQLite para instalaciones de un
+# solo nodo y tests rápidos (DB_ENGINE=sqlite o django.db.backends.sqlite3)
+DB_ENGINE = env('DB_ENGINE', default='django.db.backends.mysql')
+
+if DB_ENGINE in ('sqlite', 'django.db.backends.sqlite3'):
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": env('SQLITE_PATH', default=str(BASE_DIR / 'db.sqlite3')),
+            "OPTIONS": {
+                # PRAGMAs por conexión: WAL permite lectores concurrentes con un escritor,
+                # synchronous=NORMAL es seguro con WAL y evita un fsync por commit
+                "init_command": (
+                    "PRAGMA journal_mode=WAL;"
+                    "PRAGMA synchronous=NORMAL;"
+                    f"PRAGMA mmap_size={env.int('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024)};"
+                    f"PRAGMA cache_size=-{env.int('SQLITE_CACHE_KB', default=64 * 1024)};"
+                    "PRAGMA temp_store=MEMORY;"
+                ),
+                # Segundos de espera por el bloqueo de escritura antes de "database is locked"
+                "timeout": env.int('SQLITE_BUSY_TIMEOUT', default=20),
+                # Toma el bloqueo de escritura al abrir la transacción: sin deadlocks de upgrade
+                "transaction_mode": "IMMEDIATE",
+            },
+        }
     }
-}
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.mysql",
+            "NAME": env('DB_NAME', default='gestor_proyectos'),
+            "USER": env('DB_USER', default='root'),
+            "PASSWORD": env('DB_PASSWORD', default='root'),
+            "HOST": env('DB_HOST', default='127.0.0.1'),
+            "PORT": env('DB_PORT', default='3306'),
+            "OPTIONS": {
+                "init_command": "SET sql_mode='STRICT_TRANS_TABLES'",
+            },
+        }
+    }
+
 
+# Sharding por cliente (opcional): con DB_SHARDS=N > 1 el árbol de cada cliente
+# (proyectos, tareas, subtareas) vive en uno de N shards; default es el shard 0 y
+# guarda además usuarios, trabajos y auditoría. Cada shard numera sus ids desde
+# indice * SHARD_RANGO_IDS, de modo que el id indica el shard (manage.py init_shards).
+DB_SHARDS = env.int('DB_SHARDS', default=1)
+SHARD_RANGO_IDS = 2 ** 40
+SHARDS = ['default'] + [f'shard_{i}' for i in range(1, DB_SHARDS)]
+# Hosts de los shards 1..N-1 en MySQL (por defecto, el mismo que default)
+DB_SHARD_HOSTS = env.list('DB_SHARD_HOSTS', default=[])
+
+for indice, alias in enumerate(SHARDS[1:], 1):
+    shard = dict(DATABASES['default'])
+    if shard['ENGINE'] == 'django.db.backends.sqlite3':
+        ruta = Path(shard['NAME'])
+        shard['NAME'] = str(ruta.with_name(f'{ruta.stem}_shard_{indice}{ruta.suffix}'))
+    else:
+        shard['NAME'] = f"{shard['NAME']}_shard_{indice}"
+        if len(DB_SHARD_HOSTS) >= indice:
+            shard['HOST'] = DB_SHARD_HOSTS[indice - 1]
+    DATABASES[alias] = shard
+
+if len(SHARDS) > 1:
+    DATABASE_ROUTERS = ['core.shards.ClienteShardRouter']
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -130,16 +183,91 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 LOGIN_URL = "/admin/login/"
 LOGIN_REDIRECT_URL = "/"
 
+# Perfilado bajo demanda (?_profile=inline|store, solo administradores)
+PROFILING_DIR = env('PROFILING_DIR', default=str(BASE_DIR / 'profiles'))
+PROFILING_MAX_REPORTS = env.int('PROFILING_MAX_REPORTS', default=50)
+PROFILING_INTERVAL = env.float('PROFILING_INTERVAL', default=0.001)
+
+# Cachés locales al proceso; 'throttle' guarda los token buckets
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "throttle": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "throttle",
+    },
+}
+
+# Token buckets por alcance y rol: (capacidad, tokens repuestos por segundo).
+# 'heavy' protege las rutas costosas (listas anidadas completas). 'auth' es el de
+# login, registro y refresh: el bucket anónimo es por IP y una oficina detrás de un
+# NAT o proxy comparte la suya, así que admite el pico de logins del inicio de la jornada.
+TOKEN_BUCKETS = {
+    'default': {'ADMIN': (300, 20), 'CLIENT': (120, 10), 'ANON': (30, 0.5)},
+    'heavy': {'ADMIN': (30, 1), 'CLIENT': (10, 0.2), 'ANON': (5, 0.1)},
+    'auth': {
+        'ADMIN': (60, 1),
+        'CLIENT': (60, 1),
+        'ANON': (env.int('AUTH_BUCKET_CAPACIDAD', default=600), env.float('AUTH_BUCKET_RECARGA', default=10)),
+    },
+}
+# Los buckets viven en la memoria de cada proceso: con N procesos web (gunicorn lee
+# WEB_CONCURRENCY como --workers) cada uno aplica 1/N de la capacidad y de la recarga,
+# de modo que el total por usuario e IP se mantiene en los valores de TOKEN_BUCKETS.
+THROTTLE_PROCESOS = env.int('WEB_CONCURRENCY', default=1)
+
+# Cola de trabajos en base de datos (manage.py run_workers)
+TRABAJOS_BACKOFF_BASE = env.int('TRABAJOS_BACKOFF_BASE', default=30)
+# El worker renueva Trabajo.latido cada TRABAJOS_LATIDO segundos mientras ejecuta un
+# trabajo; uno en curso sin latido durante TRABAJOS_TIMEOUT segundos se da por abandonado
+TRABAJOS_LATIDO = env.int('TRABAJOS_LATIDO', default=30)
+TRABAJOS_TIMEOUT = env.int('TRABAJOS_TIMEOUT', default=300)
+IMPORTACIONES_DIR = env('IMPORTACIONES_DIR', default=str(BASE_DIR / 'importaciones'))
+
+# Filas por lote en las listas en streaming (?stream=1)
+STREAM_CHUNK_SIZE = env.int('STREAM_CHUNK_SIZE', default=500)
+
+# Revocación de JWT: capacidad y tasa de falsos positivos del filtro de Bloom en
+# memoria y cada cuántos segundos cada proceso lee las revocaciones nuevas
+REVOCACION_CAPACIDAD = env.int('REVOCACION_CAPACIDAD', default=100000)
+REVOCACION_ERROR = env.float('REVOCACION_ERROR', default=0.001)
+REVOCACION_SYNC_SEGUNDOS = env.float('REVOCACION_SYNC_SEGUNDOS', default=1.0)
+# Ids anteriores al último visto que cada sincronización vuelve a leer: los autoincrementales
+# pueden confirmarse fuera de orden (transacciones largas, logouts simultáneos)
+REVOCACION_VENTANA_IDS = env.int('REVOCACION_VENTANA_IDS', default=1000)
+
+# Pool de procesos del hashing de contraseñas de las vistas async de login/registro:
+# procesos y máximo de operaciones en cola o en curso antes de responder 429
+HASH_WORKERS = env.int('HASH_WORKERS', default=max(1, (os.cpu_count() or 2) // 2))
+HASH_MAX_PENDIENTES = env.int('HASH_MAX_PENDIENTES', default=HASH_WORKERS * 8)
+
+# Máximo de operaciones por POST /api/batch/
+BATCH_MAX_OPERACIONES = env.int('BATCH_MAX_OPERACIONES', default=50)
+
+# Reporte de proyectos en riesgo: días hacia adelante que se consideran "cerca de la
+# entrega" y puntos mínimos de retraso (progreso esperado - progreso) para marcarlo
+RIESGO_HORIZONTE_DIAS = env.int('RIESGO_HORIZONTE_DIAS', default=14)
+RIESGO_MARGEN = env.int('RIESGO_MARGEN', default=10)
+
+# Historial de progreso: días con detalle diario antes de compactar a una fila por
+# semana, y máximo de proyectos por consulta de series
+HISTORIAL_DIAS_DIARIOS = env.int('HISTORIAL_DIAS_DIARIOS', default=90)
+HISTORIAL_MAX_PROYECTOS = env.int('HISTORIAL_MAX_PROYECTOS', default=100)
+
 # Configuración de Django Rest Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.RevocableJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.TokenBucketThrottle',
+    ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
@@ -153,8 +281,10 @@ from datetime import timedelta
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
-    'ROTATE_REFRESH_TOKENS': False,
+    'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
+    # La revocación usa core.revocacion en lugar de la app token_blacklist
+    'TOKEN_REFRESH_SERIALIZER': 'core.serializers.RevocableTokenRefreshSerializer',
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'AUTH_HEADER_TYPES': ('Bearer',),
@@ -1,9 +1,135 @@
+from django import forms
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.widgets import AutocompleteSelect
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 from .models import Profile, Cliente, Proyecto, Tarea, SubTarea
 
 
+def estimar_filas(queryset):
+    """Número aproximado de filas de la tabla según las estadísticas del motor (None si no hay)."""
+    connection = connections[queryset.db]
+    tabla = queryset.model._meta.db_table
+    if connection.vendor == 'mysql':
+        sql = (
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s"
+        )
+    elif connection.vendor == 'postgresql':
+        sql = "SELECT reltuples::bigint FROM pg_class WHERE relname = %s"
+    else:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [tabla])
+        fila = cursor.fetchone()
+    return fila[0] if fila and fila[0] is not None else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginador que evita el COUNT(*) exacto sobre tablas grandes.
+    Sin filtros usa la estimación del motor; con filtros (o tablas pequeñas) cuenta normalmente.
+    """
+    umbral_exacto = 10000
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            estimado = estimar_filas(self.object_list)
+            if estimado is not None and estimado > self.umbral_exacto:
+                return estimado
+        return super().count
+
+
+class AutocompleteFilter(admin.SimpleListFilter):
+    """
+    Filtro por FK que usa el widget de autocompletado del admin en lugar de
+    listar una entrada por cada fila de la tabla relacionada.
+    """
+    template = 'admin/core/autocomplete_filter.html'
+    field_name = None
+
+    def __init__(self, request, params, model, model_admin):
+        self.parameter_name = f'{self.field_name}__id__exact'
+        super().__init__(request, params, model, model_admin)
+        field = model._meta.get_field(self.field_name)
+        if self.value():
+            try:
+                field.remote_field.model._meta.pk.to_python(self.value())
+            except ValidationError as e:
+                raise IncorrectLookupParameters(e)
+        campo = forms.ModelChoiceField(
+            queryset=field.remote_field.model._default_manager.all(),
+            widget=autocomplete_widget(field, model_admin, {'class': 'admin-autocomplete-filter'}),
+            required=False,
+        )
+        self.rendered_widget = campo.widget.render(
+            name=self.parameter_name,
+            value=self.value(),
+            attrs={'id': f'filtro_{self.field_name}'},
+        )
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def queryset(self, request, queryset):
+        if self.value():
+            try:
+                return queryset.filter(**{self.parameter_name: self.value()})
+            except (ValueError, ValidationError) as e:
+                # Igual que los filtros del admin: el changelist redirige con ?e=1
+                raise IncorrectLookupParameters(e)
+        return queryset
+
+
+def autocomplete_widget(field, model_admin, attrs=None):
+    """Widget de autocompletado del admin para una FK del modelo."""
+    return AutocompleteSelect(field, model_admin.admin_site, attrs=attrs)
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Base para changelists de tablas con millones de filas: conteo estimado,
+    sin segundo COUNT(*) al filtrar y media de los filtros con autocompletado.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    @property
+    def media(self):
+        media = super().media
+        for filtro in self.list_filter:
+            if isinstance(filtro, type) and issubclass(filtro, AutocompleteFilter):
+                field = self.model._meta.get_field(filtro.field_name)
+                media += autocomplete_widget(field, self).media
+                media += forms.Media(js=['core/js/autocomplete_filter.js'])
+        return media
+
+
+class ClienteFilter(AutocompleteFilter):
+    title = 'Cliente'
+    field_name = 'cliente'
+
+
+class ProyectoFilter(AutocompleteFilter):
+    title = 'Proyecto'
+    field_name = 'proyecto'
+
+
+class TareaFilter(AutocompleteFilter):
+    title = 'Tarea'
+    field_name = 'tarea'
+
+
 class ProfileInline(admin.StackedInline):
     """Inline para editar Profile desde el User."""
     model = Profile
@@ -22,21 +148,34 @@ admin.site.register(User, CustomUserAdmin)
 
 @admin.register(Cliente)
 class ClienteAdmin(admin.ModelAdmin):
-    list_display = ['nombre', 'email', 'empresa', 'activo', 'fecha_creacion']
+    list_display = [
+        'nombre', 'email', 'empresa', 'activo', 'proyectos_activos',
+        'tareas_abiertas', 'progreso_promedio', 'fecha_creacion'
+    ]
     list_filter = ['activo', 'empresa', 'fecha_creacion']
     search_fields = ['nombre', 'email', 'empresa']
     ordering = ['-fecha_creacion']
-    readonly_fields = ['fecha_creacion']
+    readonly_fields = [
+        'fecha_creacion', 'proyectos_pendientes', 'proyectos_en_desarrollo',
+        'proyectos_en_pruebas', 'proyectos_finalizados', 'tareas_abiertas', 'progreso_promedio'
+    ]
+    date_hierarchy = 'fecha_creacion'
+
+    @admin.display(description="Proyectos activos")
+    def proyectos_activos(self, obj):
+        return obj.proyectos_activos
 
 
 @admin.register(Proyecto)
-class ProyectoAdmin(admin.ModelAdmin):
+class ProyectoAdmin(LargeTableAdmin):
     list_display = ['nombre', 'cliente', 'estado', 'progreso', 'fecha_inicio', 'fecha_entrega']
-    list_filter = ['estado', 'cliente', 'fecha_inicio']
+    list_filter = ['estado', ClienteFilter, 'fecha_inicio']
+    list_select_related = ['cliente']
     search_fields = ['nombre', 'descripcion']
+    autocomplete_fields = ['cliente']
     ordering = ['-fecha_inicio']
     readonly_fields = ['progreso']
-    
+
     fieldsets = (
         ('Información Básica', {
             'fields': ('nombre', 'descripcion', 'cliente')
@@ -51,18 +190,28 @@ class ProyectoAdmin(admin.ModelAdmin):
 
 
 @admin.register(Tarea)
-class TareaAdmin(admin.ModelAdmin):
+class TareaAdmin(LargeTableAdmin):
     list_display = ['titulo', 'proyecto', 'estado', 'progreso', 'fecha_creacion']
-    list_filter = ['estado', 'proyecto', 'fecha_creacion']
+    list_filter = ['estado', ProyectoFilter]
+    list_select_related = ['proyecto']
     search_fields = ['titulo', 'descripcion']
+    autocomplete_fields = ['proyecto']
+    date_hierarchy = 'fecha_creacion'
     ordering = ['-fecha_creacion']
     readonly_fields = ['fecha_creacion']
 
+    def get_queryset(self, request):
+        """__str__ de Tarea usa el proyecto (también en el autocompletado de SubTarea)."""
+        return super().get_queryset(request).select_related('proyecto')
+
 
 @admin.register(SubTarea)
-class SubTareaAdmin(admin.ModelAdmin):
+class SubTareaAdmin(LargeTableAdmin):
     list_display = ['titulo', 'tarea', 'completada', 'fecha_creacion']
-    list_filter = ['completada', 'tarea', 'fecha_creacion']
+    list_filter = ['completada', TareaFilter]
+    list_select_related = ['tarea__proyecto']
     search_fields = ['titulo']
+    autocomplete_fields = ['tarea']
+    date_hierarchy = 'fecha_creacion'
     ordering = ['-fecha_creacion']
     readonly_fields = ['fecha_creacion']
@@ -0,0 +1,115 @@
+from django.db.models import Q
+
+from . import auditoria, contadores, shards
+from .models import (
+    Cliente,
+    Proyecto,
+    Tarea,
+    SubTarea,
+    ProyectoArchivado,
+    TareaArchivada,
+    SubTareaArchivada,
+)
+
+
+def candidatos():
+    """Proyectos finalizados o de clientes desactivados que aún están en las tablas vigentes."""
+    return Proyecto.todos.filter(
+        Q(estado='Finalizado') | Q(cliente__activo=False),
+        archivado=False,
+    )
+
+
+def marcar_candidatos(chunk_size=1000):
+    """
+    Primera fase: marca los candidatos como archivados por lotes de ids.
+    Desde ese momento el manager por defecto deja de verlos.
+    """
+    total = 0
+    while True:
+        ids = list(candidatos().order_by('pk').values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return total
+        total += Proyecto.todos.filter(pk__in=ids).update(archivado=True)
+        Cliente.recalcular_contadores(Cliente.objects.filter(proyectos__pk__in=ids))
+
+
+def archivar_lote(ids):
+    """
+    Segunda fase: copia el árbol de los proyectos indicados a las tablas de archivo
+    y lo elimina de las vigentes, todo en una transacción (del shard en curso). Es
+    idempotente, por lo que un lote interrumpido se puede repetir sin duplicar filas.
+    El historial de progreso y los reportes de riesgo no se tocan: conservan el id
+    del proyecto, que es también el del archivo.
+    """
+    with shards.atomic():
+        proyectos = list(Proyecto.todos.filter(pk__in=ids, archivado=True))
+        ids = [proyecto.pk for proyecto in proyectos]
+        tareas = list(Tarea.objects.filter(proyecto_id__in=ids))
+        subtareas = list(SubTarea.objects.filter(tarea__proyecto_id__in=ids))
+
+        ProyectoArchivado.objects.bulk_create(
+            [
+                ProyectoArchivado(
+                    id=p.pk, nombre=p.nombre, descripcion=p.descripcion, estado=p.estado,
+                    progreso=p.progreso, cliente_id=p.cliente_id,
+                    fecha_inicio=p.fecha_inicio, fecha_entrega=p.fecha_entrega,
+                )
+                for p in proyectos
+            ],
+            ignore_conflicts=True,
+        )
+        TareaArchivada.objects.bulk_create(
+            [
+                TareaArchivada(
+                    id=t.pk, titulo=t.titulo, descripcion=t.descripcion, estado=t.estado,
+                    progreso=t.progreso, proyecto_id=t.proyecto_id,
+                    fecha_creacion=t.fecha_creacion,
+                )
+                for t in tareas
+            ],
+            ignore_conflicts=True,
+        )
+        SubTareaArchivada.objects.bulk_create(
+            [
+                SubTareaArchivada(
+                    id=s.pk, titulo=s.titulo, completada=s.completada, tarea_id=s.tarea_id,
+                    fecha_creacion=s.fecha_creacion,
+                )
+                for s in subtareas
+            ],
+            ignore_conflicts=True,
+        )
+
+        # El historial registra el archivado del proyecto, no cada fila movida
+        for proyecto in proyectos:
+            auditoria.registrar(proyecto, 'A')
+        with auditoria.suspendida(), contadores.suspendidos():
+            SubTarea.objects.filter(pk__in=[s.pk for s in subtareas]).delete()
+            Tarea.objects.filter(pk__in=[t.pk for t in tareas]).delete()
+            Proyecto.todos.filter(pk__in=ids).delete()
+        Cliente.recalcular_contadores(Cliente.objects.filter(pk__in={p.cliente_id for p in proyectos}))
+    return len(proyectos)
+
+
+def archivar(chunk_size=100):
+    """
+    Ejecuta ambas fases en cada shard; retoma automáticamente los lotes marcados de
+    una ejecución anterior.
+    """
+    resultados = shards.en_cada_shard(_archivar_shard, chunk_size)
+    return {clave: sum(resultado[clave] for resultado in resultados) for clave in ('marcados', 'archivados')}
+
+
+def _archivar_shard(chunk_size):
+    marcados = marcar_candidatos()
+    archivados = 0
+    while True:
+        ids = list(
+            Proyecto.todos.filter(archivado=True)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:chunk_size]
+        )
+        if not ids:
+            return {'marcados': marcados, 'archivados': archivados}
+        archivados += archivar_lote(ids)
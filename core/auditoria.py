@@ -0,0 +1,145 @@
+import threading
+from contextlib import contextmanager
+from functools import partial
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Cliente, Proyecto, Tarea, SubTarea, RegistroAuditoria
+
+# Modelos auditados -> campos que no se registran (derivados o de control)
+MODELOS_AUDITADOS = {
+    Cliente: set(),
+    Proyecto: {'progreso', 'version'},
+    Tarea: {'version'},
+    SubTarea: set(),
+}
+
+# Buffer de la petición/trabajo en curso y bandera de suspensión, por hilo
+_estado = threading.local()
+_campos_por_modelo = {}
+
+
+def campos_auditados(modelo):
+    """Campos concretos (sin la pk) cuyos cambios se registran."""
+    if modelo not in _campos_por_modelo:
+        excluidos = MODELOS_AUDITADOS[modelo]
+        _campos_por_modelo[modelo] = [
+            campo for campo in modelo._meta.concrete_fields
+            if not campo.primary_key and campo.name not in excluidos
+        ]
+    return _campos_por_modelo[modelo]
+
+
+def tomar_foto(instancia):
+    """Guarda los valores actuales para calcular el diff en el próximo guardado."""
+    # Los campos diferidos (only/defer) no están en __dict__ y no se fotografían
+    valores = instancia.__dict__
+    instancia._auditoria = {
+        campo.attname: valores[campo.attname]
+        for campo in campos_auditados(type(instancia))
+        if campo.attname in valores
+    }
+
+
+def diff(instancia, update_fields=None):
+    """{campo: [antes, después]} de los campos que cambiaron desde la última foto."""
+    anterior = getattr(instancia, '_auditoria', {})
+    cambios = {}
+    for campo in campos_auditados(type(instancia)):
+        if update_fields is not None and campo.name not in update_fields:
+            continue
+        if campo.attname not in instancia.__dict__:
+            continue
+        antes = anterior.get(campo.attname)
+        despues = instancia.__dict__[campo.attname]
+        if antes != despues:
+            cambios[campo.attname] = [antes, despues]
+    return cambios
+
+
+def registrar(instancia, accion, cambios=None):
+    """
+    Añade un registro al buffer cuando la transacción actual se confirma
+    (de inmediato en autocommit); si la transacción se revierte, se descarta.
+    """
+    if getattr(_estado, 'suspendida', False):
+        return
+    registro = RegistroAuditoria(
+        fecha=timezone.now(),
+        modelo=type(instancia).__name__,
+        objeto_id=instancia.pk,
+        accion=accion,
+        cambios=cambios or {},
+    )
+    transaction.on_commit(partial(_encolar, registro), using=instancia._state.db)
+
+
+def auditar_guardado(instancia, creado=False, update_fields=None):
+    """Registra la creación o el diff de un guardado y renueva la foto."""
+    if creado:
+        tomar_foto(instancia)
+        registrar(instancia, 'C', instancia._auditoria)
+        return
+    cambios = diff(instancia, update_fields)
+    tomar_foto(instancia)
+    if cambios:
+        registrar(instancia, 'U', cambios)
+
+
+def auditar_eliminacion(instancia):
+    registrar(instancia, 'D', getattr(instancia, '_auditoria', {}))
+
+
+def _encolar(registro):
+    buffer = getattr(_estado, 'buffer', None)
+    if buffer is None:
+        # Fuera de capturar() (shell, scripts) se escribe cada registro por separado
+        RegistroAuditoria.objects.bulk_create([registro])
+    else:
+        buffer.registros.append(registro)
+
+
+class Buffer:
+    """Registros pendientes de una petición o trabajo y el usuario que los produjo."""
+
+    def __init__(self, usuario_id=None):
+        self.registros = []
+        self.usuario_id = usuario_id
+
+    def volcar(self):
+        """Escribe todos los registros pendientes con un solo bulk_create."""
+        if not self.registros:
+            return 0
+        for registro in self.registros:
+            registro.usuario_id = self.usuario_id
+        RegistroAuditoria.objects.bulk_create(self.registros, batch_size=500)
+        total = len(self.registros)
+        self.registros = []
+        return total
+
+
+@contextmanager
+def capturar(usuario_id=None):
+    """
+    Acumula en memoria los registros confirmados dentro del bloque y los escribe
+    al salir en un único INSERT. Lo usan AuditoriaMiddleware y los workers.
+    """
+    anterior = getattr(_estado, 'buffer', None)
+    buffer = _estado.buffer = Buffer(usuario_id)
+    try:
+        yield buffer
+    finally:
+        _estado.buffer = anterior
+        buffer.volcar()
+
+
+@contextmanager
+def suspendida():
+    """Desactiva la auditoría en el bloque (p. ej. al mover filas al archivo)."""
+    anterior = getattr(_estado, 'suspendida', False)
+    _estado.suspendida = True
+    try:
+        yield
+    finally:
+        _estado.suspendida = anterior
@@ -0,0 +1,15 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .revocacion import revocado
+
+
+class RevocableJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication que rechaza los tokens revocados (logout)."""
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if revocado(token[api_settings.JTI_CLAIM]):
+            raise InvalidToken("El token fue revocado.")
+        return token
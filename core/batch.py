@@ -0,0 +1,148 @@
+import io
+import json
+import re
+from urllib.parse import urlsplit
+
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework.views import APIView
+
+from . import shards
+
+# "${ref.campo.subcampo}" apunta al resultado de una operación anterior del lote
+REFERENCIA = re.compile(r'\$\{(\w+)((?:\.\w+)*)\}')
+
+
+class ErrorDeOperacion(Exception):
+    """Una operación del lote no se puede construir (referencia o ruta inválida)."""
+
+
+def _valor_referencia(resultados, ref, ruta):
+    if ref not in resultados:
+        raise ErrorDeOperacion(f"Referencia desconocida: '{ref}'.")
+    valor = resultados[ref]
+    for clave in filter(None, ruta.split('.')):
+        try:
+            valor = valor[int(clave)] if isinstance(valor, list) else valor[clave]
+        except (KeyError, IndexError, ValueError, TypeError):
+            raise ErrorDeOperacion(f"La referencia '${{{ref}{ruta}}}' no existe en el resultado.")
+    return valor
+
+
+def sustituir(valor, resultados):
+    """
+    Reemplaza las referencias en cadenas, listas y diccionarios. Una cadena que es
+    solo una referencia conserva el tipo del valor (p. ej. un id entero).
+    """
+    if isinstance(valor, str):
+        completa = REFERENCIA.fullmatch(valor)
+        if completa:
+            return _valor_referencia(resultados, *completa.groups())
+        return REFERENCIA.sub(lambda m: str(_valor_referencia(resultados, *m.groups())), valor)
+    if isinstance(valor, list):
+        return [sustituir(v, resultados) for v in valor]
+    if isinstance(valor, dict):
+        return {k: sustituir(v, resultados) for k, v in valor.items()}
+    return valor
+
+
+def _sin_referencias(valor):
+    # Un valor con referencias se conoce recién al ejecutar: no sirve para ubicar el lote
+    if isinstance(valor, str):
+        return None if REFERENCIA.search(valor) else valor
+    if isinstance(valor, list):
+        return [_sin_referencias(v) for v in valor]
+    if isinstance(valor, dict):
+        return {k: _sin_referencias(v) for k, v in valor.items()}
+    return valor
+
+
+def shard_del_lote(operaciones):
+    """
+    Shard del lote, deducido de sus operaciones antes de ejecutar ninguna (sin resolver
+    las referencias). None si ninguna lo indica; error si indican shards distintos,
+    porque el lote solo es atómico dentro de una base.
+    """
+    ubicados = set()
+    for operacion in operaciones:
+        partes = urlsplit(operacion['url'])
+        try:
+            kwargs = resolve(partes.path).kwargs
+        except Resolver404:
+            kwargs = {}
+        ubicados.add(shards.shard_de_datos(kwargs, QueryDict(partes.query), _sin_referencias(operacion.get('datos'))))
+    ubicados.discard(None)
+    if len(ubicados) > 1:
+        raise ErrorDeOperacion(f"El lote mezcla operaciones de varios shards: {', '.join(sorted(ubicados))}.")
+    return ubicados.pop() if ubicados else None
+
+
+def construir_peticion(request, metodo, url, datos):
+    """
+    HttpRequest para una operación del lote. Reutiliza el usuario y el token ya
+    autenticados en la petición del lote: DRF los toma de _force_auth_* sin
+    volver a decodificar el JWT ni consultar el perfil.
+    """
+    partes = urlsplit(url)
+    cuerpo = json.dumps(datos).encode() if datos is not None else b''
+
+    sub = HttpRequest()
+    sub.method = metodo
+    sub.path = sub.path_info = partes.path
+    sub.META = {
+        **request.META,
+        'REQUEST_METHOD': metodo,
+        'PATH_INFO': partes.path,
+        'QUERY_STRING': partes.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(cuerpo)),
+    }
+    sub.GET = QueryDict(partes.query)
+    sub.COOKIES = request.COOKIES
+    sub._stream = io.BytesIO(cuerpo)
+    sub._read_started = False
+    sub.user = request.user
+    sub._force_auth_user = request.user
+    sub._force_auth_token = request.auth
+    return sub
+
+
+def resolver(path, excluir=()):
+    """
+    Vista de la ruta de la API. Solo se admiten vistas DRF síncronas (el lote las llama
+    dentro de su transacción); las de `excluir` (el propio lote) tampoco se permiten.
+    """
+    try:
+        match = resolve(path)
+    except Resolver404:
+        raise ErrorDeOperacion(f"Ruta inexistente: '{path}'.")
+    vista = getattr(match.func, 'cls', None) or getattr(match.func, 'view_class', None)
+    if (not path.startswith('/api/') or vista is None or vista in excluir
+            or not issubclass(vista, APIView) or vista.view_is_async):
+        raise ErrorDeOperacion(f"Ruta no permitida en un lote: '{path}'.")
+    return match
+
+
+def ejecutar_operacion(request, operacion, resultados, excluir=(), shard=None):
+    """
+    Ejecuta una operación y devuelve (status, datos de la respuesta). Con `shard`,
+    rechaza la operación si, resueltas las referencias, se dirige a otro shard.
+    """
+    url = sustituir(operacion['url'], resultados)
+    datos = sustituir(operacion.get('datos'), resultados)
+    match = resolver(urlsplit(url).path, excluir)
+    destino = shard and shards.shard_de_datos(match.kwargs, QueryDict(urlsplit(url).query), datos)
+    if destino not in (None, shard):
+        raise ErrorDeOperacion(f"La operación se dirige al shard '{destino}' y el lote al '{shard}'.")
+
+    sub = construir_peticion(request, operacion['metodo'], url, datos)
+    sub.resolver_match = match
+    response = match.func(sub, *match.args, **match.kwargs)
+
+    if hasattr(response, 'data'):
+        return response.status_code, response.data
+    contenido = b''.join(response.streaming_content) if response.streaming else response.content
+    try:
+        return response.status_code, json.loads(contenido or b'null')
+    except ValueError:
+        return response.status_code, contenido.decode(errors='replace')
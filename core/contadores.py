@@ -0,0 +1,109 @@
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db.models import F
+
+from .models import Cliente, Proyecto, Tarea
+
+# Bandera de suspensión por hilo (escrituras masivas que recalculan al final)
+_estado = threading.local()
+
+
+def _abierta(estado):
+    return estado is not None and estado != 'Completada'
+
+
+def tomar_foto(instancia):
+    """Valores que afectan a los contadores, para calcular deltas al guardar o borrar."""
+    valores = instancia.__dict__
+    if isinstance(instancia, Proyecto):
+        # Un proyecto marcado para archivo ya no cuenta
+        cliente = None if valores.get('archivado') else valores.get('cliente_id')
+        instancia._contadores = (cliente, valores.get('estado'), valores.get('progreso'))
+    else:
+        instancia._contadores = (valores.get('proyecto_id'), valores.get('estado'))
+
+
+def _aplicar(queryset, deltas, promedio=False):
+    """Un UPDATE atómico con incrementos F() y, si hace falta, el progreso medio."""
+    cambios = {campo: F(campo) + delta for campo, delta in deltas.items() if campo and delta}
+    if promedio:
+        cambios['progreso_promedio'] = Cliente.expresion_progreso_promedio()
+    if cambios:
+        queryset.update(**cambios)
+
+
+def _clientes_de_proyecto(proyecto_id):
+    return Cliente.objects.filter(proyectos__pk=proyecto_id, proyectos__archivado=False)
+
+
+def proyecto_guardado(proyecto, creado):
+    antes = (None, None, None) if creado else getattr(proyecto, '_contadores', (None, None, None))
+    tomar_foto(proyecto)
+    despues = proyecto._contadores
+    if antes == despues or getattr(_estado, 'suspendidos', False):
+        return
+
+    cliente_antes, estado_antes, progreso_antes = antes
+    cliente, estado, progreso = despues
+    if cliente_antes == cliente:
+        deltas = Counter()
+        deltas[Cliente.CONTADOR_POR_ESTADO.get(estado_antes)] -= 1
+        deltas[Cliente.CONTADOR_POR_ESTADO.get(estado)] += 1
+        _aplicar(Cliente.objects.filter(pk=cliente), deltas, promedio=progreso_antes != progreso)
+        return
+
+    # Proyecto nuevo o que cambia de cliente: se mueve con sus tareas abiertas
+    abiertas = 0 if creado else Tarea.objects.filter(proyecto=proyecto).exclude(estado='Completada').count()
+    for pk, signo, estado_cliente in ((cliente_antes, -1, estado_antes), (cliente, 1, estado)):
+        if pk is not None:
+            _aplicar(
+                Cliente.objects.filter(pk=pk),
+                {Cliente.CONTADOR_POR_ESTADO.get(estado_cliente): signo, 'tareas_abiertas': signo * abiertas},
+                promedio=True,
+            )
+
+
+def proyecto_eliminado(proyecto):
+    cliente, estado, _ = getattr(proyecto, '_contadores', (None, None, None))
+    if cliente is None or getattr(_estado, 'suspendidos', False):
+        return
+    # Las tareas se borran antes que el proyecto y ya descontaron sus abiertas
+    _aplicar(Cliente.objects.filter(pk=cliente), {Cliente.CONTADOR_POR_ESTADO.get(estado): -1}, promedio=True)
+
+
+def tarea_guardada(tarea, creada):
+    proyecto_antes, estado_antes = (None, None) if creada else getattr(tarea, '_contadores', (None, None))
+    tomar_foto(tarea)
+    proyecto, estado = tarea._contadores
+    if getattr(_estado, 'suspendidos', False):
+        return
+    if proyecto_antes == proyecto:
+        delta = _abierta(estado) - _abierta(estado_antes)
+        _aplicar(_clientes_de_proyecto(proyecto), {'tareas_abiertas': delta})
+        return
+    for pk, signo, estado_tarea in ((proyecto_antes, -1, estado_antes), (proyecto, 1, estado)):
+        if pk is not None and _abierta(estado_tarea):
+            _aplicar(_clientes_de_proyecto(pk), {'tareas_abiertas': signo})
+
+
+def tarea_eliminada(tarea):
+    proyecto, estado = getattr(tarea, '_contadores', (None, None))
+    if proyecto is None or not _abierta(estado) or getattr(_estado, 'suspendidos', False):
+        return
+    _aplicar(_clientes_de_proyecto(proyecto), {'tareas_abiertas': -1})
+
+
+@contextmanager
+def suspendidos():
+    """
+    Desactiva los incrementos por fila; quien lo usa debe llamar después a
+    Cliente.recalcular_contadores para los clientes afectados.
+    """
+    anterior = getattr(_estado, 'suspendidos', False)
+    _estado.suspendidos = True
+    try:
+        yield
+    finally:
+        _estado.suspendidos = anterior
@@ -0,0 +1,78 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+
+class ColaSaturada(Exception):
+    """El pool de hashing ya tiene HASH_MAX_PENDIENTES operaciones en cola o en curso."""
+
+
+def _inicializar(modulo_settings):
+    """Prepara Django en cada proceso del pool (los hashers se leen de settings)."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', modulo_settings)
+    import django
+    django.setup()
+
+
+class PoolDeHashing:
+    """
+    Pool de procesos para el hashing de contraseñas (PBKDF2 ocupa la CPU cientos de
+    milisegundos). Se crea al primer uso y acota la cola: si hay HASH_MAX_PENDIENTES
+    operaciones pendientes, la siguiente se rechaza con ColaSaturada en lugar de esperar.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self.pendientes = 0
+
+    def _obtener_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=settings.HASH_WORKERS,
+                    initializer=_inicializar,
+                    initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'),),
+                )
+            return self._executor
+
+    def _reservar(self):
+        with self._lock:
+            if self.pendientes >= settings.HASH_MAX_PENDIENTES:
+                raise ColaSaturada()
+            self.pendientes += 1
+
+    def _liberar(self):
+        with self._lock:
+            self.pendientes -= 1
+
+    async def ejecutar(self, funcion, *args):
+        self._reservar()
+        try:
+            executor = self._obtener_executor()
+            return await asyncio.get_running_loop().run_in_executor(executor, funcion, *args)
+        finally:
+            self._liberar()
+
+    def cerrar(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+pool = PoolDeHashing()
+
+
+async def hashear(password):
+    """make_password en el pool de procesos."""
+    return await pool.ejecutar(make_password, password)
+
+
+async def verificar(password, encoded):
+    """check_password en el pool de procesos (sin actualizar el hash)."""
+    return await pool.ejecutar(check_password, password, encoded)
@@ -0,0 +1,78 @@
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.db.models import Count, Q
+
+from . import shards
+from .models import Proyecto, ProgresoDiario
+
+
+def guardar_snapshot(hoy):
+    """
+    Guarda la foto del día de los proyectos no finalizados de cada shard (reemplaza la
+    de esa fecha). Los conteos de tareas por estado salen de un solo SELECT agregado
+    por shard y las filas se insertan con bulk_create.
+    """
+    return sum(shards.en_cada_shard(_guardar_snapshot_shard, hoy))
+
+
+def _guardar_snapshot_shard(hoy):
+    conteos = {
+        columna: Count('tareas', filter=Q(tareas__estado=estado))
+        for estado, columna in ProgresoDiario.COLUMNA_POR_ESTADO.items()
+    }
+    proyectos = (
+        Proyecto.objects.exclude(estado='Finalizado')
+        .order_by()
+        .annotate(**conteos)
+        .values('pk', 'progreso', *conteos)
+    )
+    filas = [
+        ProgresoDiario(
+            fecha=hoy,
+            proyecto_id=proyecto.pop('pk'),
+            progreso=proyecto.pop('progreso'),
+            **proyecto,
+        )
+        for proyecto in proyectos
+    ]
+    with shards.atomic():
+        ProgresoDiario.objects.filter(fecha=hoy).delete()
+        ProgresoDiario.objects.bulk_create(filas, batch_size=1000)
+    return len(filas)
+
+
+def compactar(hoy, dias_diarios=None, chunk_size=1000):
+    """
+    Reduce a una fila por proyecto y semana (la del último día con datos) las semanas
+    completas anteriores a hoy - dias_diarios, en cada shard. Las filas ya compactadas
+    se marcan semanales y no se vuelven a procesar.
+    """
+    dias_diarios = settings.HISTORIAL_DIAS_DIARIOS if dias_diarios is None else dias_diarios
+    return sum(shards.en_cada_shard(_compactar_shard, hoy, dias_diarios, chunk_size))
+
+
+def _compactar_shard(hoy, dias_diarios, chunk_size):
+    limite = hoy - timedelta(days=dias_diarios)
+    # Solo semanas completas: se corta en el lunes de la semana del límite
+    limite -= timedelta(days=limite.weekday())
+
+    filas = (
+        ProgresoDiario.objects.filter(fecha__lt=limite, semanal=False)
+        .order_by('proyecto_id', 'fecha')
+        .values_list('pk', 'proyecto_id', 'fecha')
+    )
+    borrar, conservar = [], []
+    semanas = groupby(filas.iterator(chunk_size=chunk_size), key=lambda f: (f[1], f[2].isocalendar()[:2]))
+    for _, grupo in semanas:
+        *resto, ultima = grupo
+        borrar.extend(pk for pk, _, _ in resto)
+        conservar.append(ultima[0])
+
+    with shards.atomic():
+        for i in range(0, len(borrar), chunk_size):
+            ProgresoDiario.objects.filter(pk__in=borrar[i:i + chunk_size]).delete()
+        for i in range(0, len(conservar), chunk_size):
+            ProgresoDiario.objects.filter(pk__in=conservar[i:i + chunk_size]).update(semanal=True)
+    return len(borrar)
@@ -0,0 +1,245 @@
+import csv
+from contextlib import ExitStack
+from datetime import date
+from itertools import islice
+
+from django.db import transaction
+
+from . import shards
+from .models import Cliente, Proyecto, Tarea, SubTarea
+
+COLUMNAS_REQUERIDAS = ('cliente_email', 'proyecto', 'fecha_inicio', 'fecha_entrega', 'tarea')
+ESTADOS_TAREA = {estado for estado, _ in Tarea.ESTADOS_TAREA}
+VERDADEROS = {'1', 'true', 'si', 'sí', 'x'}
+
+
+class ErrorDeFormato(Exception):
+    """El CSV no tiene las columnas mínimas."""
+
+
+def _fecha(valor, campo, errores):
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        errores.append(f"{campo}: fecha inválida '{valor}' (se espera AAAA-MM-DD).")
+
+
+def validar_fila(fila):
+    """Normaliza una fila del CSV; devuelve (datos, errores)."""
+    errores = []
+    # Las celdas sobrantes (clave None) se ignoran y las faltantes quedan vacías
+    datos = {campo: (valor or '').strip() for campo, valor in fila.items() if campo is not None}
+
+    for campo in COLUMNAS_REQUERIDAS:
+        if not datos.get(campo):
+            errores.append(f"{campo}: obligatorio.")
+
+    if datos.get('fecha_inicio'):
+        datos['fecha_inicio'] = _fecha(datos['fecha_inicio'], 'fecha_inicio', errores)
+    if datos.get('fecha_entrega'):
+        datos['fecha_entrega'] = _fecha(datos['fecha_entrega'], 'fecha_entrega', errores)
+    if (isinstance(datos.get('fecha_inicio'), date) and isinstance(datos.get('fecha_entrega'), date)
+            and datos['fecha_entrega'] < datos['fecha_inicio']):
+        errores.append("La fecha de entrega debe ser posterior a la fecha de inicio.")
+
+    datos['estado'] = datos.get('estado') or 'Pendiente'
+    if datos['estado'] not in ESTADOS_TAREA:
+        errores.append(f"estado: '{datos['estado']}' no es un estado válido.")
+
+    try:
+        datos['progreso'] = int(datos.get('progreso') or 0)
+    except ValueError:
+        errores.append("progreso: debe ser un entero.")
+    else:
+        if not 0 <= datos['progreso'] <= 100:
+            errores.append("progreso: debe estar entre 0 y 100.")
+
+    datos['subtarea_completada'] = datos.get('subtarea_completada', '').lower() in VERDADEROS
+    return datos, errores
+
+
+class PlanImporter:
+    """
+    Importa proyectos, tareas y subtareas desde un CSV leído en streaming.
+
+    Cada fila describe una tarea (y opcionalmente una subtarea) de un proyecto:
+    cliente_email, proyecto, proyecto_descripcion, fecha_inicio, fecha_entrega,
+    tarea, tarea_descripcion, estado, progreso, subtarea, subtarea_completada.
+    Proyectos (cliente, nombre) y tareas (proyecto, título) repetidos se reutilizan.
+
+    Las filas se validan y se insertan por lotes con bulk_create; cada lote se
+    confirma en su propia transacción junto con el punto de control de la
+    ImportacionPlan, de modo que una importación interrumpida se reanuda sin
+    duplicar filas. Los proyectos tocados se guardan con cada lote y su progreso
+    se recalcula una sola vez al final, también los de lotes de ejecuciones anteriores.
+    Con varios shards, las filas de cada lote se insertan en el shard de su cliente.
+    """
+
+    def __init__(self, importacion, chunk_size=1000, reportar_error=None):
+        self.importacion = importacion
+        self.chunk_size = chunk_size
+        self.reportar_error = reportar_error or (lambda fila, errores: None)
+        self.clientes = {}
+
+    def ejecutar(self, lineas):
+        """Procesa un iterable de líneas de texto CSV y devuelve la importación actualizada."""
+        lector = csv.DictReader(lineas)
+        faltantes = [c for c in COLUMNAS_REQUERIDAS if c not in (lector.fieldnames or [])]
+        if faltantes:
+            raise ErrorDeFormato(f"Faltan columnas: {', '.join(faltantes)}.")
+
+        # Las filas ya confirmadas en una ejecución anterior se saltan sin procesarlas
+        numero = self.importacion.filas_procesadas
+        filas = islice(lector, numero, None)
+        while True:
+            lote = list(islice(filas, self.chunk_size))
+            if not lote:
+                break
+            self._procesar_lote(numero, lote)
+            numero += len(lote)
+
+        self._recalcular_progreso()
+        self.importacion.finalizada = True
+        self.importacion.save(update_fields=['finalizada', 'fecha_actualizacion'])
+        return self.importacion
+
+    def _procesar_lote(self, inicio, lote):
+        # La fila 1 del archivo es la cabecera
+        filas = [(inicio + offset + 1, *validar_fila(fila)) for offset, fila in enumerate(lote, start=1)]
+        self._cargar_clientes({datos['cliente_email'] for _, datos, errores in filas if not errores})
+
+        validas = []
+        errores_lote = 0
+        for numero, datos, errores in filas:
+            if not errores and datos['cliente_email'] not in self.clientes:
+                errores.append(f"cliente_email: no existe un cliente con email '{datos['cliente_email']}'.")
+            if errores:
+                errores_lote += 1
+                self.reportar_error(numero, errores)
+            else:
+                datos['cliente_id'] = self.clientes[datos['cliente_email']]
+                validas.append(datos)
+
+        por_shard = {}
+        for datos in validas:
+            por_shard.setdefault(shards.shard_de_id(datos['cliente_id']), []).append(datos)
+
+        imp = self.importacion
+        # Las transacciones de los shards se confirman junto con el punto de control (default)
+        with transaction.atomic(), ExitStack() as transacciones:
+            for alias, filas_shard in por_shard.items():
+                with shards.en_shard(alias):
+                    transacciones.enter_context(shards.atomic())
+                    proyectos, proyectos_creados, tareas_creadas, subtareas_creadas = self._insertar(filas_shard)
+                imp.proyectos_creados += proyectos_creados
+                imp.tareas_creadas += tareas_creadas
+                imp.subtareas_creadas += subtareas_creadas
+                imp.proyectos_tocados = sorted({*imp.proyectos_tocados, *proyectos.values()})
+
+            imp.filas_procesadas = inicio + len(lote)
+            imp.filas_con_error += errores_lote
+            imp.save()
+
+    def _insertar(self, validas):
+        """Inserta las filas de un shard; devuelve (proyectos, creados de cada tipo)."""
+        proyectos, proyectos_creados = self._proyectos(validas)
+        tareas, tareas_creadas = self._tareas(validas, proyectos)
+        subtareas = [
+            SubTarea(
+                titulo=datos['subtarea'],
+                completada=datos['subtarea_completada'],
+                tarea_id=tareas[(proyectos[(datos['cliente_id'], datos['proyecto'])], datos['tarea'])],
+            )
+            for datos in validas if datos.get('subtarea')
+        ]
+        SubTarea.objects.bulk_create(subtareas)
+        return proyectos, proyectos_creados, tareas_creadas, len(subtareas)
+
+    def _cargar_clientes(self, emails):
+        pendientes = {}
+        for email in emails:
+            if email not in self.clientes:
+                pendientes.setdefault(shards.shard_de_email(email), []).append(email)
+        for alias, emails_shard in pendientes.items():
+            with shards.en_shard(alias):
+                self.clientes.update(
+                    Cliente.objects.filter(email__in=emails_shard).values_list('email', 'pk')
+                )
+
+    def _proyectos(self, validas):
+        """Devuelve {(cliente_id, nombre): proyecto_id}, creando los que falten."""
+        claves = {(d['cliente_id'], d['proyecto']): d for d in reversed(validas)}
+        existentes = self._buscar_proyectos(claves)
+        nuevos = [
+            Proyecto(
+                nombre=nombre,
+                descripcion=datos.get('proyecto_descripcion', ''),
+                cliente_id=cliente_id,
+                fecha_inicio=datos['fecha_inicio'],
+                fecha_entrega=datos['fecha_entrega'],
+            )
+            for (cliente_id, nombre), datos in claves.items()
+            if (cliente_id, nombre) not in existentes
+        ]
+        if nuevos:
+            Proyecto.objects.bulk_create(nuevos)
+            # Algunos motores (MySQL) no devuelven los ids del bulk_create
+            existentes = self._buscar_proyectos(claves)
+        return existentes, len(nuevos)
+
+    def _buscar_proyectos(self, claves):
+        if not claves:
+            return {}
+        queryset = Proyecto.objects.filter(
+            cliente_id__in={cliente_id for cliente_id, _ in claves},
+            nombre__in={nombre for _, nombre in claves},
+        )
+        return {
+            (cliente_id, nombre): pk
+            for pk, cliente_id, nombre in queryset.values_list('pk', 'cliente_id', 'nombre')
+            if (cliente_id, nombre) in claves
+        }
+
+    def _tareas(self, validas, proyectos):
+        """Devuelve {(proyecto_id, título): tarea_id}, creando las que falten."""
+        claves = {
+            (proyectos[(d['cliente_id'], d['proyecto'])], d['tarea']): d for d in reversed(validas)
+        }
+        existentes = self._buscar_tareas(claves)
+        nuevas = [
+            Tarea(
+                titulo=titulo,
+                descripcion=datos.get('tarea_descripcion', ''),
+                estado=datos['estado'],
+                progreso=datos['progreso'],
+                proyecto_id=proyecto_id,
+            )
+            for (proyecto_id, titulo), datos in claves.items()
+            if (proyecto_id, titulo) not in existentes
+        ]
+        if nuevas:
+            Tarea.objects.bulk_create(nuevas)
+            existentes = self._buscar_tareas(claves)
+        return existentes, len(nuevas)
+
+    def _buscar_tareas(self, claves):
+        if not claves:
+            return {}
+        queryset = Tarea.objects.filter(
+            proyecto_id__in={proyecto_id for proyecto_id, _ in claves},
+            titulo__in={titulo for _, titulo in claves},
+        )
+        return {
+            (proyecto_id, titulo): pk
+            for pk, proyecto_id, titulo in queryset.values_list('pk', 'proyecto_id', 'titulo')
+            if (proyecto_id, titulo) in claves
+        }
+
+    def _recalcular_progreso(self):
+        por_shard = {}
+        for pk in self.importacion.proyectos_tocados:
+            por_shard.setdefault(shards.shard_de_id(pk), []).append(pk)
+        for alias, ids in por_shard.items():
+            with shards.en_shard(alias):
+                for i in range(0, len(ids), self.chunk_size):
+                    Proyecto.actualizar_progreso_en_lote(ids[i:i + self.chunk_size])
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core.archivo import archivar
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve los proyectos finalizados y los de clientes desactivados (con sus tareas "
+        "y subtareas) a las tablas de archivo, por lotes y de forma reanudable."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=100,
+            help="Proyectos movidos por transacción.",
+        )
+
+    def handle(self, *args, **options):
+        resultado = archivar(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Marcados: {resultado['marcados']}. Archivados: {resultado['archivados']}."
+        ))
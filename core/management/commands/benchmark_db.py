@@ -0,0 +1,132 @@
+import json
+import statistics
+import time
+import uuid
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from core import auditoria
+from core.models import Cliente
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el rendimiento de escritura y lectura de los endpoints principales sobre la "
+        "base de datos configurada (perfil DB_ENGINE). Ejecutarlo con cada perfil y usar "
+        "--salida/--comparar para contrastar SQLite con MySQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--proyectos', type=int, default=50, help="Proyectos creados.")
+        parser.add_argument('--tareas', type=int, default=5, help="Tareas por proyecto.")
+        parser.add_argument('--lecturas', type=int, default=200, help="Peticiones GET por endpoint.")
+        parser.add_argument('--salida', help="Guarda los resultados en este archivo JSON.")
+        parser.add_argument('--comparar', help="JSON de otra ejecución (p. ej. MySQL) con el que comparar.")
+
+    def handle(self, *args, **options):
+        # Buckets sin límite práctico: se mide la base de datos, no el throttling. Los
+        # datos del benchmark no pasan por la auditoría y se borran al terminar.
+        sin_limite = {
+            alcance: {rol: (10 ** 9, 10 ** 9) for rol in roles}
+            for alcance, roles in settings.TOKEN_BUCKETS.items()
+        }
+        hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+        with override_settings(TOKEN_BUCKETS=sin_limite, ALLOWED_HOSTS=hosts), auditoria.suspendida():
+            sufijo = uuid.uuid4().hex[:8]
+            admin = User.objects.create_user(f'benchmark-{sufijo}', password=uuid.uuid4().hex)
+            admin.profile.role = 'ADMIN'
+            admin.profile.save()
+            cliente = Cliente.objects.create(
+                nombre='Benchmark', email=f'benchmark-{sufijo}@example.invalid', empresa='Benchmark'
+            )
+            client = APIClient()
+            client.force_authenticate(user=admin)
+            try:
+                resultados = self._medir(client, cliente, options)
+            finally:
+                cliente.delete()
+                admin.delete()
+
+        resultados = {'motor': connection.vendor, 'operaciones': resultados}
+        self._imprimir(resultados, options['comparar'])
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(resultados, archivo, indent=2)
+
+    def _medir(self, client, cliente, options):
+        proyectos, tareas = [], []
+        inicio, entrega = date.today().isoformat(), (date.today() + timedelta(days=365)).isoformat()
+
+        def crear_proyecto(i):
+            resp = client.post('/api/proyectos/', {
+                'nombre': f'Proyecto {i}', 'descripcion': 'Benchmark', 'cliente': cliente.pk,
+                'fecha_inicio': inicio, 'fecha_entrega': entrega,
+            }, format='json')
+            proyectos.append(resp.data['id'])
+            return resp
+
+        def crear_tarea(i):
+            resp = client.post('/api/tareas/', {
+                'titulo': f'Tarea {i}', 'descripcion': 'Benchmark',
+                'proyecto': proyectos[i % len(proyectos)], 'progreso': i % 100,
+            }, format='json')
+            tareas.append(resp.data['id'])
+            return resp
+
+        def actualizar_tarea(i):
+            return client.patch(f'/api/tareas/{tareas[i % len(tareas)]}/', {'progreso': (i * 7) % 100}, format='json')
+
+        lecturas = options['lecturas']
+        return {
+            'POST /api/proyectos/': self._cronometrar(crear_proyecto, options['proyectos']),
+            'POST /api/tareas/': self._cronometrar(crear_tarea, options['proyectos'] * options['tareas']),
+            'PATCH /api/tareas/{id}/': self._cronometrar(actualizar_tarea, len(tareas) or 1),
+            'GET /api/proyectos/{id}/': self._cronometrar(
+                lambda i: client.get(f'/api/proyectos/{proyectos[i % len(proyectos)]}/'), lecturas
+            ),
+            'GET /api/tareas/?proyecto=': self._cronometrar(
+                lambda i: client.get('/api/tareas/', {'proyecto': proyectos[i % len(proyectos)]}), lecturas
+            ),
+            'GET /api/proyectos/resumen/': self._cronometrar(
+                lambda i: client.get('/api/proyectos/resumen/'), lecturas
+            ),
+        }
+
+    def _cronometrar(self, operacion, repeticiones):
+        tiempos = []
+        for i in range(repeticiones):
+            inicio = time.perf_counter()
+            resp = operacion(i)
+            tiempos.append(time.perf_counter() - inicio)
+            if resp.status_code >= 400:
+                raise RuntimeError(f"La operación respondió {resp.status_code}: {resp.data}")
+        tiempos.sort()
+        return {
+            'peticiones': repeticiones,
+            'por_segundo': round(repeticiones / sum(tiempos), 1),
+            'p50_ms': round(statistics.median(tiempos) * 1000, 2),
+            'p95_ms': round(tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))] * 1000, 2),
+        }
+
+    def _imprimir(self, resultados, comparar):
+        otro = None
+        if comparar:
+            with open(comparar, encoding='utf-8') as archivo:
+                otro = json.load(archivo)
+
+        self.stdout.write(f"Motor: {resultados['motor']}")
+        for nombre, datos in resultados['operaciones'].items():
+            linea = (
+                f"{nombre:<30} {datos['por_segundo']:>9} req/s  "
+                f"p50 {datos['p50_ms']:>7} ms  p95 {datos['p95_ms']:>7} ms"
+            )
+            if otro and nombre in otro['operaciones']:
+                ratio = datos['por_segundo'] / otro['operaciones'][nombre]['por_segundo']
+                linea += f"  x{ratio:.2f} vs {otro['motor']}"
+            self.stdout.write(linea)
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import statistics
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core import auditoria
+from core.credenciales import pool
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide, a través del handler ASGI, el throughput de login y la latencia de otra "
+        "petición de la API mientras hay logins en curso, con el login síncrono "
+        "(hash en el hilo de la petición) y con el async (hash en el pool de procesos)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=100, help="Logins por escenario.")
+        parser.add_argument('--concurrencia', type=int, default=16, help="Logins simultáneos.")
+        parser.add_argument('--salida', help="Guarda los resultados en este archivo JSON.")
+
+    def handle(self, *args, **options):
+        # Buckets sin límite práctico: se mide el hashing, no el throttling
+        sin_limite = {
+            alcance: {rol: (10 ** 9, 10 ** 9) for rol in roles}
+            for alcance, roles in settings.TOKEN_BUCKETS.items()
+        }
+        hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+        with override_settings(TOKEN_BUCKETS=sin_limite, ALLOWED_HOSTS=hosts), auditoria.suspendida():
+            sufijo = uuid.uuid4().hex[:8]
+            password = uuid.uuid4().hex
+            usuario = User.objects.create_user(f'benchmark-login-{sufijo}', password=password)
+            admin = User.objects.create_user(f'benchmark-admin-{sufijo}', password=uuid.uuid4().hex)
+            admin.profile.role = 'ADMIN'
+            admin.profile.save()
+            credenciales = {'username': usuario.username, 'password': password}
+            sondeo = {
+                'ruta': f"{reverse('clientes-list')}?empresa={sufijo}",
+                'headers': {'Authorization': f'Bearer {RefreshToken.for_user(admin).access_token}'},
+            }
+            try:
+                resultados = {
+                    nombre: asyncio.run(self._escenario(
+                        reverse(ruta), credenciales, sondeo, options['logins'], options['concurrencia']
+                    ))
+                    for nombre, ruta in (('sin offload', 'token_obtain_pair'), ('con offload', 'token_obtain_pair_async'))
+                }
+            finally:
+                pool.cerrar()
+                usuario.delete()
+                admin.delete()
+
+        self._imprimir(resultados)
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(resultados, archivo, indent=2)
+
+    async def _escenario(self, ruta_login, credenciales, sondeo, logins, concurrencia):
+        client = AsyncClient()
+        # Calienta el escenario (procesos del pool, conexiones) fuera de la medición
+        await client.post(ruta_login, credenciales, content_type='application/json')
+
+        semaforo = asyncio.Semaphore(concurrencia)
+        tiempos_login, rechazados = [], 0
+        tiempos_sondeo = []
+        terminado = asyncio.Event()
+
+        async def login():
+            nonlocal rechazados
+            async with semaforo:
+                inicio = time.perf_counter()
+                resp = await client.post(ruta_login, credenciales, content_type='application/json')
+                if resp.status_code == 429:
+                    rechazados += 1
+                elif resp.status_code != 200:
+                    raise RuntimeError(f"El login respondió {resp.status_code}: {resp.content[:200]}")
+                else:
+                    tiempos_login.append(time.perf_counter() - inicio)
+
+        async def sondear():
+            while not terminado.is_set():
+                inicio = time.perf_counter()
+                resp = await client.get(sondeo['ruta'], headers=sondeo['headers'])
+                if resp.status_code != 200:
+                    raise RuntimeError(f"El sondeo respondió {resp.status_code}: {resp.content[:200]}")
+                tiempos_sondeo.append(time.perf_counter() - inicio)
+                await asyncio.sleep(0.01)
+
+        tarea_sondeo = asyncio.create_task(sondear())
+        inicio = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        duracion = time.perf_counter() - inicio
+        terminado.set()
+        await tarea_sondeo
+
+        return {
+            'logins': len(tiempos_login),
+            'rechazados_429': rechazados,
+            'logins_por_segundo': round(len(tiempos_login) / duracion, 1),
+            'login': self._percentiles(tiempos_login),
+            'sondeo': self._percentiles(tiempos_sondeo),
+        }
+
+    def _percentiles(self, tiempos):
+        if not tiempos:
+            return {}
+        tiempos = sorted(tiempos)
+
+        def percentil(p):
+            return round(tiempos[min(len(tiempos) - 1, int(len(tiempos) * p))] * 1000, 2)
+
+        return {
+            'p50_ms': round(statistics.median(tiempos) * 1000, 2),
+            'p95_ms': percentil(0.95),
+            'p99_ms': percentil(0.99),
+        }
+
+    def _imprimir(self, resultados):
+        for nombre, datos in resultados.items():
+            self.stdout.write(
+                f"{nombre:<12} {datos['logins_por_segundo']:>7} logins/s ({datos['rechazados_429']} con 429)  "
+                f"login p50 {datos['login'].get('p50_ms')} ms p95 {datos['login'].get('p95_ms')} ms  "
+                f"API p50 {datos['sondeo'].get('p50_ms')} ms p95 {datos['sondeo'].get('p95_ms')} ms "
+                f"p99 {datos['sondeo'].get('p99_ms')} ms"
+            )
@@ -0,0 +1,67 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importacion import ErrorDeFormato, PlanImporter
+from core.models import ImportacionPlan
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa proyectos, tareas y subtareas desde un CSV grande, en streaming y por "
+        "lotes confirmados de forma independiente (reanudable con --resume)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help="Ruta del CSV (UTF-8, con cabecera).")
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help="Filas validadas e insertadas por transacción.",
+        )
+        parser.add_argument(
+            '--resume',
+            type=int,
+            metavar='ID',
+            help="Reanuda la ImportacionPlan indicada desde su última fila confirmada.",
+        )
+        parser.add_argument(
+            '--errors',
+            metavar='RUTA',
+            help="CSV donde escribir el reporte de errores por fila.",
+        )
+
+    def handle(self, *args, **options):
+        if options['resume']:
+            try:
+                importacion = ImportacionPlan.objects.get(pk=options['resume'])
+            except ImportacionPlan.DoesNotExist:
+                raise CommandError(f"No existe la importación {options['resume']}.")
+        else:
+            importacion = ImportacionPlan.objects.create(nombre_archivo=options['archivo'])
+
+        reporte = open(options['errors'], 'w', newline='', encoding='utf-8') if options['errors'] else None
+        try:
+            escritor = csv.writer(reporte) if reporte else None
+            if escritor:
+                escritor.writerow(['fila', 'errores'])
+
+            def reportar_error(fila, errores):
+                if escritor:
+                    escritor.writerow([fila, ' | '.join(errores)])
+
+            importer = PlanImporter(importacion, options['chunk_size'], reportar_error)
+            with open(options['archivo'], newline='', encoding='utf-8-sig') as lineas:
+                importer.ejecutar(lineas)
+        except ErrorDeFormato as exc:
+            raise CommandError(str(exc))
+        finally:
+            if reporte:
+                reporte.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Importación {importacion.pk}: {importacion.filas_procesadas} filas, "
+            f"{importacion.filas_con_error} con error; {importacion.proyectos_creados} proyectos, "
+            f"{importacion.tareas_creadas} tareas y {importacion.subtareas_creadas} subtareas creadas."
+        ))
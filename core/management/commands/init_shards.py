@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from core.shards import reservar_rango
+
+
+class Command(BaseCommand):
+    help = (
+        "Aplica las migraciones en cada shard (DB_SHARDS) y reserva su rango de ids "
+        "para que el id de cualquier fila del árbol de un cliente indique su shard."
+    )
+
+    def handle(self, *args, **options):
+        for alias in settings.SHARDS:
+            call_command('migrate', database=alias, verbosity=options['verbosity'], interactive=False)
+            reservar_rango(alias)
+            self.stdout.write(self.style.SUCCESS(f"Shard {alias} listo."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.revocacion import purgar_expirados
+
+
+class Command(BaseCommand):
+    help = "Elimina las revocaciones de tokens JWT que ya expiraron."
+
+    def handle(self, *args, **options):
+        borrados = purgar_expirados()
+        self.stdout.write(self.style.SUCCESS(f"Revocaciones expiradas eliminadas: {borrados}."))
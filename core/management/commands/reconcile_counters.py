@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from core import shards
+from core.models import Cliente
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula desde las tablas de proyectos y tareas los contadores desnormalizados "
+        "de cada cliente (proyectos por estado, tareas abiertas y progreso promedio)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help="Clientes recalculados por UPDATE.",
+        )
+
+    def handle(self, *args, **options):
+        total = sum(shards.en_cada_shard(self._reconciliar, options['chunk_size']))
+        self.stdout.write(self.style.SUCCESS(f"Contadores recalculados para {total} clientes."))
+
+    def _reconciliar(self, chunk_size):
+        ids = list(Cliente.objects.order_by('pk').values_list('pk', flat=True))
+        for i in range(0, len(ids), chunk_size):
+            Cliente.recalcular_contadores(Cliente.objects.filter(pk__in=ids[i:i + chunk_size]))
+        return len(ids)
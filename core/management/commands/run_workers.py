@@ -0,0 +1,61 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+def _worker(burst, espera):
+    """Punto de entrada de cada proceso del pool (también con el método spawn)."""
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+    from core.trabajos import bucle_worker
+
+    # Las conexiones heredadas del proceso padre (fork) no se comparten
+    connections.close_all()
+
+    return bucle_worker(burst=burst, espera=espera)
+
+
+class Command(BaseCommand):
+    help = "Ejecuta los trabajos encolados en la tabla Trabajo con un pool de procesos."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help="Número de procesos worker.",
+        )
+        parser.add_argument(
+            '--poll',
+            type=float,
+            default=1.0,
+            help="Segundos de espera cuando la cola está vacía.",
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help="Termina cuando no quedan trabajos disponibles.",
+        )
+
+    def handle(self, *args, **options):
+        from core.trabajos import liberar_bloqueados
+
+        liberados = liberar_bloqueados(settings.TRABAJOS_TIMEOUT)
+        if liberados:
+            self.stdout.write(f"Trabajos bloqueados devueltos a la cola: {liberados}.")
+
+        # Cada proceso hijo abre sus propias conexiones
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            futuros = [
+                pool.submit(_worker, options['burst'], options['poll'])
+                for _ in range(options['workers'])
+            ]
+            procesados = sum(futuro.result() for futuro in futuros)
+
+        self.stdout.write(self.style.SUCCESS(f"Trabajos procesados: {procesados}."))
@@ -0,0 +1,32 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.historial import compactar, guardar_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Guarda el progreso del día de cada proyecto activo en la tabla ProgresoDiario y "
+        "compacta a una fila por semana los días antiguos (pensado para cron, una vez al día)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha', help="Fecha de la foto (AAAA-MM-DD); por defecto, hoy.")
+        parser.add_argument(
+            '--dias-diarios',
+            type=int,
+            help="Días que se conservan con detalle diario antes de compactar por semana.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            fecha = date.fromisoformat(options['fecha']) if options['fecha'] else timezone.localdate()
+        except ValueError:
+            raise CommandError("--fecha debe tener el formato AAAA-MM-DD.")
+        total = guardar_snapshot(fecha)
+        compactadas = compactar(fecha, options['dias_diarios'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Progreso del {fecha}: {total} proyectos; {compactadas} filas diarias compactadas."
+        ))
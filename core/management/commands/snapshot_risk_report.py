@@ -0,0 +1,26 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.riesgo import guardar_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Precalcula el reporte de proyectos en riesgo del día en la tabla ReporteRiesgo "
+        "(pensado para ejecutarse una vez al día desde cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha', help="Fecha del reporte (AAAA-MM-DD); por defecto, hoy.")
+        parser.add_argument('--horizonte', type=int, help="Días hacia adelante considerados próximos a la entrega.")
+        parser.add_argument('--margen', type=int, help="Puntos mínimos de retraso para marcar un proyecto.")
+
+    def handle(self, *args, **options):
+        try:
+            fecha = date.fromisoformat(options['fecha']) if options['fecha'] else timezone.localdate()
+        except ValueError:
+            raise CommandError("--fecha debe tener el formato AAAA-MM-DD.")
+        total = guardar_snapshot(fecha, options['horizonte'], options['margen'])
+        self.stdout.write(self.style.SUCCESS(f"Reporte de riesgo del {fecha}: {total} proyectos."))
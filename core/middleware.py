@@ -0,0 +1,132 @@
+import time
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.http import JsonResponse
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from .auditoria import capturar
+from .authentication import RevocableJWTAuthentication
+from .profiling import SamplingProfiler, guardar_reporte
+
+
+def usuario_de_request(request):
+    """Usuario de la sesión o, si no hay, del token JWT de la cabecera Authorization."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user
+    try:
+        resultado = RevocableJWTAuthentication().authenticate(request)
+    except (AuthenticationFailed, InvalidToken, TokenError):
+        return None
+    return resultado[0] if resultado else None
+
+
+class ProfilingMiddleware:
+    """
+    Perfilado bajo demanda de una petición, solo para administradores.
+    Se activa con `?_profile=inline` (devuelve el reporte en lugar de la respuesta)
+    o `?_profile=store` (lo guarda en PROFILING_DIR y devuelve X-Profile-Id).
+    También acepta la cabecera `X-Profile`. Sin ese parámetro no añade trabajo.
+    """
+    modos = ('inline', 'store')
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        modo = request.GET.get('_profile') or request.headers.get('X-Profile')
+        if modo not in self.modos:
+            return self.get_response(request)
+        return self._perfilar(request, modo, self.get_response)
+
+    async def __acall__(self, request):
+        modo = request.GET.get('_profile') or request.headers.get('X-Profile')
+        if modo not in self.modos:
+            return await self.get_response(request)
+        # En ASGI se perfila el hilo de la petición, donde corren las vistas síncronas
+        return await sync_to_async(self._perfilar)(request, modo, async_to_sync(self.get_response))
+
+    def _perfilar(self, request, modo, get_response):
+        user = usuario_de_request(request)
+        profile = getattr(user, 'profile', None)
+        if not (profile and profile.role == 'ADMIN'):
+            return get_response(request)
+
+        inicio = time.perf_counter()
+        with CaptureQueriesContext(connection) as consultas:
+            with SamplingProfiler(settings.PROFILING_INTERVAL) as profiler:
+                response = get_response(request)
+        duracion = time.perf_counter() - inicio
+
+        reporte = {
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'duration_ms': round(duracion * 1000, 2),
+            'samples': profiler.muestras,
+            'queries': [
+                {'sql': q['sql'], 'time': q['time']} for q in consultas.captured_queries
+            ],
+        }
+        if modo == 'inline':
+            reporte['stacks'] = profiler.colapsado()
+            return JsonResponse(reporte)
+
+        response['X-Profile-Id'] = guardar_reporte(
+            settings.PROFILING_DIR,
+            reporte,
+            profiler.colapsado(),
+            settings.PROFILING_MAX_REPORTS,
+        )
+        return response
+
+
+class AuditoriaMiddleware:
+    """
+    Acumula los registros de auditoría confirmados durante la petición y los
+    escribe con un solo bulk_create al terminar, asociados al usuario autenticado
+    (DRF deja en la petición el usuario resuelto por JWT).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with capturar() as buffer:
+            response = self.get_response(request)
+            self._asignar_usuario(buffer, request)
+        return response
+
+    async def __acall__(self, request):
+        # En ASGI el ORM de la petición corre en su hilo de sync_to_async (thread
+        # sensitive): el buffer, que es local al hilo, se abre y se vuelca en ese hilo
+        contexto = capturar()
+        buffer = await sync_to_async(contexto.__enter__)()
+        try:
+            response = await self.get_response(request)
+            await sync_to_async(self._asignar_usuario)(buffer, request)
+        finally:
+            await sync_to_async(contexto.__exit__)(None, None, None)
+        return response
+
+    def _asignar_usuario(self, buffer, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            buffer.usuario_id = user.pk
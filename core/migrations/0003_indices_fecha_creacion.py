@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_cliente_options_alter_proyecto_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='subtarea',
+            name='fecha_creacion',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Fecha de Creación'),
+        ),
+        migrations.AlterField(
+            model_name='tarea',
+            name='fecha_creacion',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Fecha de Creación'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_indices_fecha_creacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='proyecto',
+            name='archivado',
+            field=models.BooleanField(db_index=True, default=False, help_text='Marcado para moverse a las tablas de archivo.', verbose_name='Archivado'),
+        ),
+        migrations.CreateModel(
+            name='ProyectoArchivado',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID original')),
+                ('nombre', models.CharField(max_length=255, verbose_name='Nombre del Proyecto')),
+                ('descripcion', models.TextField(verbose_name='Descripción')),
+                ('estado', models.CharField(choices=[('Pendiente', 'Pendiente'), ('En Desarrollo', 'En Desarrollo'), ('En Pruebas', 'En Pruebas'), ('Finalizado', 'Finalizado')], max_length=20, verbose_name='Estado')),
+                ('progreso', models.IntegerField(verbose_name='Progreso (%)')),
+                ('fecha_inicio', models.DateField(verbose_name='Fecha de Inicio')),
+                ('fecha_entrega', models.DateField(verbose_name='Fecha de Entrega')),
+                ('fecha_archivado', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Archivo')),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='proyectos_archivados', to='core.cliente', verbose_name='Cliente')),
+            ],
+            options={
+                'verbose_name': 'Proyecto archivado',
+                'verbose_name_plural': 'Proyectos archivados',
+                'ordering': ['-fecha_inicio'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TareaArchivada',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID original')),
+                ('titulo', models.CharField(max_length=255, verbose_name='Título')),
+                ('descripcion', models.TextField(verbose_name='Descripción')),
+                ('estado', models.CharField(choices=[('Pendiente', 'Pendiente'), ('En Progreso', 'En Progreso'), ('Bloqueada', 'Bloqueada'), ('Completada', 'Completada')], max_length=20, verbose_name='Estado')),
+                ('progreso', models.IntegerField(verbose_name='Progreso (%)')),
+                ('fecha_creacion', models.DateTimeField(verbose_name='Fecha de Creación')),
+                ('proyecto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tareas', to='core.proyectoarchivado', verbose_name='Proyecto')),
+            ],
+            options={
+                'verbose_name': 'Tarea archivada',
+                'verbose_name_plural': 'Tareas archivadas',
+                'ordering': ['-fecha_creacion'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SubTareaArchivada',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID original')),
+                ('titulo', models.CharField(max_length=255, verbose_name='Título')),
+                ('completada', models.BooleanField(verbose_name='Completada')),
+                ('fecha_creacion', models.DateTimeField(verbose_name='Fecha de Creación')),
+                ('tarea', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subtareas', to='core.tareaarchivada', verbose_name='Tarea')),
+            ],
+            options={
+                'verbose_name': 'SubTarea archivada',
+                'verbose_name_plural': 'SubTareas archivadas',
+                'ordering': ['-fecha_creacion'],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_archivo_proyectos'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportacionPlan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre_archivo', models.CharField(max_length=255, verbose_name='Archivo')),
+                ('filas_procesadas', models.PositiveIntegerField(default=0, help_text='Filas confirmadas; una importación reanudada continúa desde aquí.', verbose_name='Filas procesadas')),
+                ('filas_con_error', models.PositiveIntegerField(default=0, verbose_name='Filas con error')),
+                ('proyectos_creados', models.PositiveIntegerField(default=0, verbose_name='Proyectos creados')),
+                ('tareas_creadas', models.PositiveIntegerField(default=0, verbose_name='Tareas creadas')),
+                ('subtareas_creadas', models.PositiveIntegerField(default=0, verbose_name='SubTareas creadas')),
+                ('finalizada', models.BooleanField(default=False, verbose_name='Finalizada')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True, verbose_name='Última actualización')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='importaciones', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Importación de plan',
+                'verbose_name_plural': 'Importaciones de planes',
+                'ordering': ['-fecha_creacion'],
+            },
+        ),
+    ]
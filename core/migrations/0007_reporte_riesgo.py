@@ -0,0 +1,43 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_trabajos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReporteRiesgo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(db_index=True, verbose_name='Fecha del reporte')),
+                ('progreso', models.IntegerField(verbose_name='Progreso (%)')),
+                ('progreso_esperado', models.FloatField(verbose_name='Progreso esperado (%)')),
+                ('riesgo', models.FloatField(help_text='Puntos de progreso de retraso.', verbose_name='Riesgo')),
+                ('dias_restantes', models.IntegerField(verbose_name='Días restantes')),
+            ],
+            options={
+                'verbose_name': 'Reporte de riesgo',
+                'verbose_name_plural': 'Reportes de riesgo',
+                'ordering': ['-fecha', '-riesgo'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='proyecto',
+            index=models.Index(fields=['fecha_entrega', 'fecha_inicio'], name='proyecto_plazos_idx'),
+        ),
+        migrations.AddField(
+            model_name='reporteriesgo',
+            name='proyecto',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reportes_riesgo', to='core.proyecto', verbose_name='Proyecto'),
+        ),
+        migrations.AddConstraint(
+            model_name='reporteriesgo',
+            constraint=models.UniqueConstraint(fields=('fecha', 'proyecto'), name='reporte_riesgo_unico'),
+        ),
+    ]
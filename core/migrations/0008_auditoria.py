@@ -0,0 +1,36 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:30
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_reporte_riesgo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistroAuditoria',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha')),
+                ('modelo', models.CharField(max_length=20, verbose_name='Modelo')),
+                ('objeto_id', models.BigIntegerField(verbose_name='ID del objeto')),
+                ('accion', models.CharField(choices=[('C', 'Creación'), ('U', 'Modificación'), ('D', 'Eliminación'), ('A', 'Archivado')], max_length=1, verbose_name='Acción')),
+                ('cambios', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Creación/eliminación: {campo: valor}. Modificación: {campo: [antes, después]}.', verbose_name='Cambios')),
+                ('usuario', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Registro de auditoría',
+                'verbose_name_plural': 'Registros de auditoría',
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['modelo', 'objeto_id', 'fecha'], name='auditoria_objeto_idx'), models.Index(fields=['fecha'], name='auditoria_fecha_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:36
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def poblar_contadores(apps, schema_editor):
+    """Calcula los contadores de los clientes existentes como Cliente.recalcular_contadores."""
+    Cliente = apps.get_model('core', 'Cliente')
+    Proyecto = apps.get_model('core', 'Proyecto')
+    Tarea = apps.get_model('core', 'Tarea')
+    db = schema_editor.connection.alias
+
+    def conteo(queryset, columna):
+        return Coalesce(Subquery(
+            queryset.order_by().values(columna).annotate(n=Count('pk')).values('n')
+        ), Value(0))
+
+    vigentes = Proyecto.objects.using(db).filter(cliente=OuterRef('pk'), archivado=False)
+    por_estado = {
+        'Pendiente': 'proyectos_pendientes',
+        'En Desarrollo': 'proyectos_en_desarrollo',
+        'En Pruebas': 'proyectos_en_pruebas',
+        'Finalizado': 'proyectos_finalizados',
+    }
+    cambios = {campo: conteo(vigentes.filter(estado=estado), 'cliente') for estado, campo in por_estado.items()}
+    cambios['tareas_abiertas'] = conteo(
+        Tarea.objects.using(db).filter(proyecto__cliente=OuterRef('pk'), proyecto__archivado=False)
+        .exclude(estado='Completada'),
+        'proyecto__cliente'
+    )
+    cambios['progreso_promedio'] = Coalesce(
+        Subquery(vigentes.order_by().values('cliente').annotate(promedio=Avg('progreso')).values('promedio')),
+        Value(0.0),
+        output_field=models.FloatField(),
+    )
+    Cliente.objects.using(db).update(**cambios)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_auditoria'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='progreso_promedio',
+            field=models.FloatField(default=0, editable=False, verbose_name='Progreso promedio (%)'),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='proyectos_en_desarrollo',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Proyectos en desarrollo'),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='proyectos_en_pruebas',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Proyectos en pruebas'),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='proyectos_finalizados',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Proyectos finalizados'),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='proyectos_pendientes',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Proyectos pendientes'),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='tareas_abiertas',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Tareas abiertas'),
+        ),
+        # En cada shard (ver ClienteShardRouter.allow_migrate) los clientes empiezan con los valores reales
+        migrations.RunPython(poblar_contadores, migrations.RunPython.noop, hints={'model_name': 'cliente'}),
+    ]
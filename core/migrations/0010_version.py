@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_contadores_cliente'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='proyecto',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, verbose_name='Versión'),
+        ),
+        migrations.AddField(
+            model_name='tarea',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, verbose_name='Versión'),
+        ),
+    ]
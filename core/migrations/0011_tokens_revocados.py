@@ -0,0 +1,32 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenRevocado',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('jti', models.CharField(max_length=64, unique=True, verbose_name='JTI')),
+                ('tipo', models.CharField(choices=[('access', 'Acceso'), ('refresh', 'Refresco')], max_length=10, verbose_name='Tipo')),
+                ('expira', models.DateTimeField(db_index=True, verbose_name='Expira')),
+                ('fecha_revocacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de revocación')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tokens_revocados', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Token revocado',
+                'verbose_name_plural': 'Tokens revocados',
+                'ordering': ['-id'],
+            },
+        ),
+    ]
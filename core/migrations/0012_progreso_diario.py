@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_tokens_revocados'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgresoDiario',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('progreso', models.PositiveSmallIntegerField(verbose_name='Progreso (%)')),
+                ('tareas_pendientes', models.PositiveIntegerField(default=0, verbose_name='Tareas pendientes')),
+                ('tareas_en_progreso', models.PositiveIntegerField(default=0, verbose_name='Tareas en progreso')),
+                ('tareas_bloqueadas', models.PositiveIntegerField(default=0, verbose_name='Tareas bloqueadas')),
+                ('tareas_completadas', models.PositiveIntegerField(default=0, verbose_name='Tareas completadas')),
+                ('semanal', models.BooleanField(default=False, help_text='La fila resume su semana (último día con datos) tras la compactación.', verbose_name='Semanal')),
+                ('proyecto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historial_progreso', to='core.proyecto', verbose_name='Proyecto')),
+            ],
+            options={
+                'verbose_name': 'Progreso diario',
+                'verbose_name_plural': 'Progresos diarios',
+                'ordering': ['proyecto', 'fecha'],
+                'constraints': [models.UniqueConstraint(fields=('proyecto', 'fecha'), name='progreso_diario_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 03:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_progreso_diario'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importacionplan',
+            name='proyectos_tocados',
+            field=models.JSONField(blank=True, default=list, editable=False, help_text='Ids de los proyectos con filas confirmadas; su progreso se recalcula al terminar.', verbose_name='Proyectos tocados'),
+        ),
+    ]
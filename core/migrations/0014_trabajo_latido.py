@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 03:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_importacion_proyectos_tocados'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trabajo',
+            name='latido',
+            field=models.DateTimeField(blank=True, help_text='El worker lo renueva mientras ejecuta el trabajo.', null=True, verbose_name='Último latido'),
+        ),
+    ]
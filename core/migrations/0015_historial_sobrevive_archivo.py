@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-19 03:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_trabajo_latido'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='progresodiario',
+            name='proyecto',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='historial_progreso', to='core.proyecto', verbose_name='Proyecto'),
+        ),
+        migrations.AlterField(
+            model_name='reporteriesgo',
+            name='proyecto',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='reportes_riesgo', to='core.proyecto', verbose_name='Proyecto'),
+        ),
+    ]
@@ -1,7 +1,11 @@
-from django.db import models
+from django.db import models, router
+from django.db.models import Avg, Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, Floor
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 
 # Modelo Profile: Extensión de Usuario con roles
@@ -17,6 +21,19 @@ class Profile(models.Model):
         return f"{self.user.username} - {self.role}"
 
 
+class ShardQuerySet(models.QuerySet):
+    """
+    create() sin using() ubica la fila con el router y la instancia, como
+    Modelo(...).save(): el email de un cliente o el id de su padre eligen el shard.
+    QuerySet.create solo consultaría el shard del contexto (o default).
+    """
+
+    def create(self, **kwargs):
+        if self._db is None:
+            return self.using(router.db_for_write(self.model, instance=self.model(**kwargs))).create(**kwargs)
+        return super().create(**kwargs)
+
+
 # Modelo Cliente: Almacena la información de la empresa contratante.
 class Cliente(models.Model):
     nombre = models.CharField(max_length=255, verbose_name="Nombre del Cliente")
@@ -25,16 +42,132 @@ class Cliente(models.Model):
     activo = models.BooleanField(default=True, verbose_name="Activo", help_text="Para implementar la eliminación lógica.")
     fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
 
+    # Contadores desnormalizados de los proyectos vigentes (ver core/contadores.py)
+    proyectos_pendientes = models.IntegerField(default=0, editable=False, verbose_name="Proyectos pendientes")
+    proyectos_en_desarrollo = models.IntegerField(default=0, editable=False, verbose_name="Proyectos en desarrollo")
+    proyectos_en_pruebas = models.IntegerField(default=0, editable=False, verbose_name="Proyectos en pruebas")
+    proyectos_finalizados = models.IntegerField(default=0, editable=False, verbose_name="Proyectos finalizados")
+    tareas_abiertas = models.IntegerField(default=0, editable=False, verbose_name="Tareas abiertas")
+    progreso_promedio = models.FloatField(default=0, editable=False, verbose_name="Progreso promedio (%)")
+
+    # Estado del proyecto -> columna que lo cuenta
+    CONTADOR_POR_ESTADO = {
+        'Pendiente': 'proyectos_pendientes',
+        'En Desarrollo': 'proyectos_en_desarrollo',
+        'En Pruebas': 'proyectos_en_pruebas',
+        'Finalizado': 'proyectos_finalizados',
+    }
+    CONTADORES = (*CONTADOR_POR_ESTADO.values(), 'tareas_abiertas', 'progreso_promedio')
+
+    objects = ShardQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Cliente"
         verbose_name_plural = "Clientes"
         ordering = ['-fecha_creacion']
 
+    def save(self, *args, **kwargs):
+        # Los contadores los mantienen incrementos atómicos con F() (core/contadores.py):
+        # un guardado completo de una instancia leída antes no debe pisarlos
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                campo.name for campo in self._meta.concrete_fields
+                if not campo.primary_key and campo.name not in self.CONTADORES
+            ]
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.nombre} ({self.empresa})"
 
+    @property
+    def proyectos_activos(self):
+        return self.proyectos_pendientes + self.proyectos_en_desarrollo + self.proyectos_en_pruebas
+
+    @classmethod
+    def expresion_progreso_promedio(cls):
+        """Subconsulta con el progreso medio de los proyectos vigentes de cada cliente."""
+        promedio = (
+            Proyecto.objects.filter(cliente=OuterRef('pk'))
+            .order_by().values('cliente').annotate(promedio=Avg('progreso')).values('promedio')
+        )
+        return Coalesce(Subquery(promedio), Value(0.0), output_field=models.FloatField())
+
+    @classmethod
+    def recalcular_contadores(cls, queryset=None):
+        """
+        Recalcula todos los contadores desde las tablas hijas con un solo UPDATE de
+        subconsultas correlacionadas. Lo usan las escrituras masivas (que no emiten
+        señales) y el comando reconcile_counters.
+        """
+        def conteo(queryset, columna):
+            return Coalesce(Subquery(
+                queryset.order_by().values(columna).annotate(n=Count('pk')).values('n')
+            ), Value(0))
+
+        cambios = {
+            campo: conteo(Proyecto.objects.filter(cliente=OuterRef('pk'), estado=estado), 'cliente')
+            for estado, campo in cls.CONTADOR_POR_ESTADO.items()
+        }
+        cambios['tareas_abiertas'] = conteo(
+            Tarea.objects.filter(proyecto__cliente=OuterRef('pk'), proyecto__archivado=False)
+            .exclude(estado='Completada'),
+            'proyecto__cliente'
+        )
+        cambios['progreso_promedio'] = cls.expresion_progreso_promedio()
+
+        queryset = cls.objects.all() if queryset is None else queryset
+        return queryset.update(**cambios)
+
+
+class ConflictoDeVersion(Exception):
+    """La fila cambió (otra versión) desde que se leyó la instancia."""
+
+
+class ModeloVersionado(models.Model):
+    """
+    Control de concurrencia optimista: cada guardado de una fila existente es un
+    UPDATE ... WHERE version = n que la deja en n + 1. Si otra escritura llegó
+    antes, no se actualiza ninguna fila y se lanza ConflictoDeVersion.
+    """
+    version = models.PositiveIntegerField(default=1, editable=False, verbose_name="Versión")
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        self._version_leida = self.version
+        self.version += 1
+        try:
+            super().save(*args, **kwargs)
+        except Exception:
+            self.version = self._version_leida
+            raise
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update, *args):
+        actualizado = super()._do_update(
+            base_qs.filter(version=self._version_leida), using, pk_val, values,
+            update_fields, forced_update, *args
+        )
+        if not actualizado and base_qs.filter(pk=pk_val).exists():
+            raise ConflictoDeVersion(
+                f"{type(self).__name__} {pk_val}: la versión {self._version_leida} ya no es la actual."
+            )
+        return actualizado
+
+
+class ProyectoManager(models.Manager.from_queryset(ShardQuerySet)):
+    """Manager por defecto: solo datos vigentes, sin proyectos marcados para archivo."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(archivado=False)
+
+
 # Modelo Proyecto: Representa el esfuerzo principal asociado a un cliente.
-class Proyecto(models.Model):
+class Proyecto(ModeloVersionado):
     ESTADOS_PROYECTO = [
         ('Pendiente', 'Pendiente'),
         ('En Desarrollo', 'En Desarrollo'),
@@ -64,19 +197,63 @@ class Proyecto(models.Model):
     )
     fecha_inicio = models.DateField(verbose_name="Fecha de Inicio")
     fecha_entrega = models.DateField(verbose_name="Fecha de Entrega")
+    archivado = models.BooleanField(
+        default=False,
+        db_index=True,
+        verbose_name="Archivado",
+        help_text="Marcado para moverse a las tablas de archivo."
+    )
+
+    objects = ProyectoManager()
+    todos = ShardQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Proyecto"
         verbose_name_plural = "Proyectos"
         ordering = ['-fecha_inicio']
+        indexes = [
+            # Rango de fechas de entrega del reporte de proyectos en riesgo
+            models.Index(fields=['fecha_entrega', 'fecha_inicio'], name='proyecto_plazos_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # El progreso lo mantiene la base de datos (actualizar_progreso): un guardado
+        # completo de una instancia leída antes no debe pisarlo con un valor viejo
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                campo.name for campo in self._meta.concrete_fields
+                if not campo.primary_key and campo.name != 'progreso'
+            ]
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def expresion_progreso():
+        """Progreso calculado en SQL: media entera de sus tareas, o el actual si no tiene."""
+        promedio = Cast(Floor(Subquery(
+            Tarea.objects.filter(proyecto=OuterRef('pk'))
+            .order_by().values('proyecto').annotate(promedio=Avg('progreso')).values('promedio')
+        )), models.IntegerField())
+        return Coalesce(promedio, F('progreso'))
 
     def actualizar_progreso(self):
-        """Lógica avanzada: Cálculo automático del progreso basado en tareas."""
-        tareas = self.tareas.all()
-        if tareas.exists():
-            total_progreso = sum(t.progreso for t in tareas)
-            self.progreso = int(total_progreso / tareas.count())
-            self.save(update_fields=['progreso'])
+        """
+        Cálculo automático del progreso basado en tareas, sin bloqueos ni lecturas
+        previas: un único UPDATE ... SET progreso = (SELECT AVG ...) que no compite
+        con otros escritores por una versión leída. Si no hay tareas, no cambia.
+        """
+        nuevo = Proyecto.expresion_progreso()
+        if Proyecto.todos.filter(pk=self.pk).exclude(progreso=nuevo).update(progreso=nuevo):
+            # Sin save() no hay señal: se actualiza aquí el progreso medio del cliente
+            Cliente.objects.filter(pk=self.cliente_id).update(
+                progreso_promedio=Cliente.expresion_progreso_promedio()
+            )
+
+    @classmethod
+    def actualizar_progreso_en_lote(cls, proyecto_ids):
+        """Recalcula el progreso de varios proyectos con un solo UPDATE con subconsulta correlacionada."""
+        cls.objects.filter(pk__in=proyecto_ids).update(progreso=cls.expresion_progreso())
+        # update() no emite señales: los contadores de los clientes se recalculan aquí
+        Cliente.recalcular_contadores(Cliente.objects.filter(proyectos__pk__in=proyecto_ids))
 
     def clean(self):
         """Validación personalizada: fecha_entrega debe ser mayor a fecha_inicio."""
@@ -87,7 +264,7 @@ class Proyecto(models.Model):
         return self.nombre
 
 # Modelo Tarea: Desglose de actividades de un proyecto.
-class Tarea(models.Model):
+class Tarea(ModeloVersionado):
     ESTADOS_TAREA = [
         ('Pendiente', 'Pendiente'),
         ('En Progreso', 'En Progreso'),
@@ -115,7 +292,9 @@ class Tarea(models.Model):
         related_name='tareas',
         verbose_name="Proyecto"
     )
-    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
+    fecha_creacion = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Fecha de Creación")
+
+    objects = ShardQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Tarea"
@@ -140,7 +319,9 @@ class SubTarea(models.Model):
         related_name='subtareas',
         verbose_name="Tarea"
     )
-    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
+    fecha_creacion = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Fecha de Creación")
+
+    objects = ShardQuerySet.as_manager()
 
     class Meta:
         verbose_name = "SubTarea"
@@ -154,3 +335,326 @@ class SubTarea(models.Model):
 
     def __str__(self):
         return self.titulo
+
+
+# Tablas de archivo: copia en frío de los proyectos finalizados o de clientes inactivos.
+class ProyectoArchivado(models.Model):
+    id = models.BigIntegerField(primary_key=True, verbose_name="ID original")
+    nombre = models.CharField(max_length=255, verbose_name="Nombre del Proyecto")
+    descripcion = models.TextField(verbose_name="Descripción")
+    estado = models.CharField(max_length=20, choices=Proyecto.ESTADOS_PROYECTO, verbose_name="Estado")
+    progreso = models.IntegerField(verbose_name="Progreso (%)")
+    cliente = models.ForeignKey(
+        Cliente,
+        on_delete=models.CASCADE,
+        related_name='proyectos_archivados',
+        verbose_name="Cliente"
+    )
+    fecha_inicio = models.DateField(verbose_name="Fecha de Inicio")
+    fecha_entrega = models.DateField(verbose_name="Fecha de Entrega")
+    fecha_archivado = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Archivo")
+
+    class Meta:
+        verbose_name = "Proyecto archivado"
+        verbose_name_plural = "Proyectos archivados"
+        ordering = ['-fecha_inicio']
+
+    def __str__(self):
+        return self.nombre
+
+
+class TareaArchivada(models.Model):
+    id = models.BigIntegerField(primary_key=True, verbose_name="ID original")
+    titulo = models.CharField(max_length=255, verbose_name="Título")
+    descripcion = models.TextField(verbose_name="Descripción")
+    estado = models.CharField(max_length=20, choices=Tarea.ESTADOS_TAREA, verbose_name="Estado")
+    progreso = models.IntegerField(verbose_name="Progreso (%)")
+    proyecto = models.ForeignKey(
+        ProyectoArchivado,
+        on_delete=models.CASCADE,
+        related_name='tareas',
+        verbose_name="Proyecto"
+    )
+    fecha_creacion = models.DateTimeField(verbose_name="Fecha de Creación")
+
+    class Meta:
+        verbose_name = "Tarea archivada"
+        verbose_name_plural = "Tareas archivadas"
+        ordering = ['-fecha_creacion']
+
+    def __str__(self):
+        return self.titulo
+
+
+class SubTareaArchivada(models.Model):
+    id = models.BigIntegerField(primary_key=True, verbose_name="ID original")
+    titulo = models.CharField(max_length=255, verbose_name="Título")
+    completada = models.BooleanField(verbose_name="Completada")
+    tarea = models.ForeignKey(
+        TareaArchivada,
+        on_delete=models.CASCADE,
+        related_name='subtareas',
+        verbose_name="Tarea"
+    )
+    fecha_creacion = models.DateTimeField(verbose_name="Fecha de Creación")
+
+    class Meta:
+        verbose_name = "SubTarea archivada"
+        verbose_name_plural = "SubTareas archivadas"
+        ordering = ['-fecha_creacion']
+
+    def __str__(self):
+        return self.titulo
+
+
+# Modelo ImportacionPlan: punto de control de una importación masiva desde CSV.
+class ImportacionPlan(models.Model):
+    nombre_archivo = models.CharField(max_length=255, verbose_name="Archivo")
+    usuario = models.ForeignKey(
+        User,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='importaciones',
+        verbose_name="Usuario"
+    )
+    filas_procesadas = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Filas procesadas",
+        help_text="Filas confirmadas; una importación reanudada continúa desde aquí."
+    )
+    filas_con_error = models.PositiveIntegerField(default=0, verbose_name="Filas con error")
+    proyectos_creados = models.PositiveIntegerField(default=0, verbose_name="Proyectos creados")
+    tareas_creadas = models.PositiveIntegerField(default=0, verbose_name="Tareas creadas")
+    subtareas_creadas = models.PositiveIntegerField(default=0, verbose_name="SubTareas creadas")
+    proyectos_tocados = models.JSONField(
+        default=list,
+        blank=True,
+        editable=False,
+        verbose_name="Proyectos tocados",
+        help_text="Ids de los proyectos con filas confirmadas; su progreso se recalcula al terminar."
+    )
+    finalizada = models.BooleanField(default=False, verbose_name="Finalizada")
+    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
+    fecha_actualizacion = models.DateTimeField(auto_now=True, verbose_name="Última actualización")
+
+    class Meta:
+        verbose_name = "Importación de plan"
+        verbose_name_plural = "Importaciones de planes"
+        ordering = ['-fecha_creacion']
+
+    def __str__(self):
+        return f"{self.nombre_archivo} ({self.filas_procesadas} filas)"
+
+
+# Modelo Trabajo: cola local (en base de datos) para operaciones pesadas.
+class Trabajo(models.Model):
+    ESTADOS_TRABAJO = [
+        ('Pendiente', 'Pendiente'),
+        ('En Curso', 'En Curso'),
+        ('Completado', 'Completado'),
+        ('Fallido', 'Fallido'),
+    ]
+
+    tipo = models.CharField(max_length=50, verbose_name="Tipo")
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADOS_TRABAJO,
+        default='Pendiente',
+        verbose_name="Estado"
+    )
+    parametros = models.JSONField(default=dict, blank=True, verbose_name="Parámetros")
+    resultado = models.JSONField(null=True, blank=True, verbose_name="Resultado")
+    error = models.TextField(blank=True, verbose_name="Último error")
+    intentos = models.PositiveSmallIntegerField(default=0, verbose_name="Intentos")
+    max_intentos = models.PositiveSmallIntegerField(default=3, verbose_name="Máximo de intentos")
+    disponible_desde = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Disponible desde",
+        help_text="Los reintentos se posponen con backoff exponencial."
+    )
+    usuario = models.ForeignKey(
+        User,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='trabajos',
+        verbose_name="Usuario"
+    )
+    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
+    fecha_inicio = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de Inicio")
+    latido = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Último latido",
+        help_text="El worker lo renueva mientras ejecuta el trabajo."
+    )
+    fecha_fin = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de Fin")
+
+    class Meta:
+        verbose_name = "Trabajo"
+        verbose_name_plural = "Trabajos"
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'disponible_desde'], name='trabajo_cola_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} #{self.pk} ({self.estado})"
+
+
+# Modelo ReporteRiesgo: foto diaria del reporte de proyectos en riesgo.
+class ReporteRiesgo(models.Model):
+    fecha = models.DateField(db_index=True, verbose_name="Fecha del reporte")
+    # Sin CASCADE ni restricción: los reportes sobreviven al archivado del proyecto
+    # (su id se conserva en ProyectoArchivado)
+    proyecto = models.ForeignKey(
+        Proyecto,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='reportes_riesgo',
+        verbose_name="Proyecto"
+    )
+    progreso = models.IntegerField(verbose_name="Progreso (%)")
+    progreso_esperado = models.FloatField(verbose_name="Progreso esperado (%)")
+    riesgo = models.FloatField(verbose_name="Riesgo", help_text="Puntos de progreso de retraso.")
+    dias_restantes = models.IntegerField(verbose_name="Días restantes")
+
+    class Meta:
+        verbose_name = "Reporte de riesgo"
+        verbose_name_plural = "Reportes de riesgo"
+        ordering = ['-fecha', '-riesgo']
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'proyecto'], name='reporte_riesgo_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} - {self.proyecto_id} ({self.riesgo:.1f})"
+
+
+# Modelo ProgresoDiario: foto diaria del progreso de cada proyecto para las curvas
+# de burndown. Los días antiguos se compactan a una fila por semana.
+class ProgresoDiario(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    # Como en ReporteRiesgo: el historial de un proyecto archivado se conserva
+    proyecto = models.ForeignKey(
+        Proyecto,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='historial_progreso',
+        verbose_name="Proyecto"
+    )
+    fecha = models.DateField(verbose_name="Fecha")
+    progreso = models.PositiveSmallIntegerField(verbose_name="Progreso (%)")
+    tareas_pendientes = models.PositiveIntegerField(default=0, verbose_name="Tareas pendientes")
+    tareas_en_progreso = models.PositiveIntegerField(default=0, verbose_name="Tareas en progreso")
+    tareas_bloqueadas = models.PositiveIntegerField(default=0, verbose_name="Tareas bloqueadas")
+    tareas_completadas = models.PositiveIntegerField(default=0, verbose_name="Tareas completadas")
+    semanal = models.BooleanField(
+        default=False,
+        verbose_name="Semanal",
+        help_text="La fila resume su semana (último día con datos) tras la compactación."
+    )
+
+    # Estado de la tarea -> columna que la cuenta
+    COLUMNA_POR_ESTADO = {
+        'Pendiente': 'tareas_pendientes',
+        'En Progreso': 'tareas_en_progreso',
+        'Bloqueada': 'tareas_bloqueadas',
+        'Completada': 'tareas_completadas',
+    }
+
+    class Meta:
+        verbose_name = "Progreso diario"
+        verbose_name_plural = "Progresos diarios"
+        ordering = ['proyecto', 'fecha']
+        constraints = [
+            # También es el índice de las series por proyecto y rango de fechas
+            models.UniqueConstraint(fields=['proyecto', 'fecha'], name='progreso_diario_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.proyecto_id} - {self.fecha} ({self.progreso}%)"
+
+
+# Modelo RegistroAuditoria: historial de cambios, solo de inserción.
+class RegistroAuditoria(models.Model):
+    ACCIONES = [
+        ('C', 'Creación'),
+        ('U', 'Modificación'),
+        ('D', 'Eliminación'),
+        ('A', 'Archivado'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    fecha = models.DateTimeField(default=timezone.now, verbose_name="Fecha")
+    modelo = models.CharField(max_length=20, verbose_name="Modelo")
+    objeto_id = models.BigIntegerField(verbose_name="ID del objeto")
+    accion = models.CharField(max_length=1, choices=ACCIONES, verbose_name="Acción")
+    cambios = models.JSONField(
+        default=dict,
+        encoder=DjangoJSONEncoder,
+        verbose_name="Cambios",
+        help_text="Creación/eliminación: {campo: valor}. Modificación: {campo: [antes, después]}."
+    )
+    # Sin restricción de clave foránea: el historial conserva el id aunque se borre el usuario
+    usuario = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Usuario"
+    )
+
+    class Meta:
+        verbose_name = "Registro de auditoría"
+        verbose_name_plural = "Registros de auditoría"
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['modelo', 'objeto_id', 'fecha'], name='auditoria_objeto_idx'),
+            models.Index(fields=['fecha'], name='auditoria_fecha_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError("El historial de auditoría no se puede modificar.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("El historial de auditoría no se puede eliminar.")
+
+    def __str__(self):
+        return f"{self.modelo} #{self.objeto_id} {self.get_accion_display()}"
+
+
+# Modelo TokenRevocado: JWT revocados (logout y rotación de refresh tokens).
+class TokenRevocado(models.Model):
+    TIPOS = [
+        ('access', 'Acceso'),
+        ('refresh', 'Refresco'),
+    ]
+
+    # El id creciente sirve de cursor para la sincronización incremental entre procesos
+    id = models.BigAutoField(primary_key=True)
+    jti = models.CharField(max_length=64, unique=True, verbose_name="JTI")
+    tipo = models.CharField(max_length=10, choices=TIPOS, verbose_name="Tipo")
+    usuario = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='tokens_revocados',
+        verbose_name="Usuario"
+    )
+    expira = models.DateTimeField(db_index=True, verbose_name="Expira")
+    fecha_revocacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de revocación")
+
+    class Meta:
+        verbose_name = "Token revocado"
+        verbose_name_plural = "Tokens revocados"
+        ordering = ['-id']
+
+    def __str__(self):
+        return f"{self.tipo} {self.jti}"
@@ -35,3 +35,10 @@ class IsOwnerOrAdmin(BasePermission):
         
         return False
 
+
+class IsAdminRole(BasePermission):
+    """Permite acceso solo a usuarios con Profile.role == 'ADMIN'."""
+
+    def has_permission(self, request, view):
+        profile = getattr(request.user, 'profile', None)
+        return bool(request.user and request.user.is_authenticated and profile and profile.role == 'ADMIN')
@@ -0,0 +1,75 @@
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+
+class SamplingProfiler:
+    """
+    Perfilador por muestreo de un solo hilo: un hilo auxiliar captura la pila
+    del hilo perfilado cada `intervalo` segundos y acumula pilas colapsadas
+    (formato de flamegraph.pl / speedscope: "a;b;c N").
+    """
+
+    def __init__(self, intervalo=0.001):
+        self.intervalo = intervalo
+        self.pilas = Counter()
+        self._thread_id = None
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def __enter__(self):
+        self._thread_id = threading.get_ident()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._detener.set()
+        self._hilo.join()
+
+    def _muestrear(self):
+        while not self._detener.wait(self.intervalo):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self.pilas[self._pila(frame)] += 1
+
+    @staticmethod
+    def _pila(frame):
+        marcos = []
+        while frame is not None:
+            code = frame.f_code
+            marcos.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ';'.join(reversed(marcos))
+
+    @property
+    def muestras(self):
+        return sum(self.pilas.values())
+
+    def colapsado(self):
+        """Reporte en formato de pilas colapsadas, una pila por línea."""
+        return '\n'.join(f"{pila} {n}" for pila, n in self.pilas.most_common())
+
+
+def guardar_reporte(directorio, reporte, colapsado, max_reportes):
+    """
+    Guarda el reporte (JSON con SQL y metadatos) y las pilas colapsadas, y
+    elimina los reportes más antiguos por encima de `max_reportes`.
+    """
+    directorio = Path(directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+    # El prefijo en nanosegundos hace que el orden por nombre sea cronológico
+    reporte_id = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+    (directorio / f'{reporte_id}.collapsed').write_text(colapsado, encoding='utf-8')
+    (directorio / f'{reporte_id}.json').write_text(json.dumps(reporte, indent=2), encoding='utf-8')
+
+    existentes = sorted(directorio.glob('*.collapsed'), reverse=True)
+    for antiguo in existentes[max_reportes:]:
+        antiguo.unlink(missing_ok=True)
+        antiguo.with_suffix('.json').unlink(missing_ok=True)
+    return reporte_id
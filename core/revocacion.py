@@ -0,0 +1,143 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import TokenRevocado
+
+
+class FiltroBloom:
+    """
+    Conjunto probabilístico de cadenas: sin falsos negativos y con una tasa de
+    falsos positivos `error` mientras no se superen `capacidad` elementos.
+    Usa doble hashing sobre un único blake2b de 16 bytes.
+    """
+
+    def __init__(self, capacidad, error=0.001):
+        self.capacidad = capacidad
+        self.bits = max(8, int(-capacidad * math.log(error) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacidad * math.log(2)))
+        self.tabla = bytearray((self.bits + 7) // 8)
+        self.elementos = 0
+
+    def _posiciones(self, valor):
+        digest = hashlib.blake2b(valor.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.hashes))
+
+    def add(self, valor):
+        for posicion in self._posiciones(valor):
+            self.tabla[posicion >> 3] |= 1 << (posicion & 7)
+        self.elementos += 1
+
+    def __contains__(self, valor):
+        return all(self.tabla[posicion >> 3] & (1 << (posicion & 7)) for posicion in self._posiciones(valor))
+
+
+class RegistroRevocaciones:
+    """
+    Vista en memoria de la tabla TokenRevocado para un proceso.
+
+    Se construye en la primera consulta con los tokens aún no expirados y se
+    mantiene al día leyendo solo las filas nuevas como mucho una vez cada
+    REVOCACION_SYNC_SEGUNDOS. Como los ids pueden confirmarse fuera de orden, cada
+    sincronización relee también los REVOCACION_VENTANA_IDS anteriores al último
+    visto (ya agregados o no, da igual), de modo que las revocaciones hechas por
+    otros workers llegan con ese retraso máximo. Un token que no está en el filtro
+    de Bloom no está revocado (la inmensa mayoría, sin tocar la base de datos);
+    los positivos se confirman con una búsqueda exacta por jti.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self.filtro = None
+            self.ultimo_id = 0
+            self.ultima_sync = 0.0
+
+    def _construir(self):
+        vigentes = TokenRevocado.objects.filter(expira__gt=timezone.now())
+        capacidad = max(settings.REVOCACION_CAPACIDAD, 2 * vigentes.count())
+        self.filtro = FiltroBloom(capacidad, settings.REVOCACION_ERROR)
+        self.ultimo_id = 0
+        for pk, jti in vigentes.order_by('pk').values_list('pk', 'jti').iterator(chunk_size=5000):
+            self.filtro.add(jti)
+            self.ultimo_id = pk
+        # Los expirados no entran en el filtro pero el cursor debe saltarlos
+        ultimo = TokenRevocado.objects.order_by('-pk').values_list('pk', flat=True).first()
+        self.ultimo_id = max(self.ultimo_id, ultimo or 0)
+        self.ultima_sync = time.monotonic()
+
+    def _sincronizar(self):
+        if self.filtro is None:
+            self._construir()
+            return
+        if time.monotonic() - self.ultima_sync < settings.REVOCACION_SYNC_SEGUNDOS:
+            return
+        desde = max(0, self.ultimo_id - settings.REVOCACION_VENTANA_IDS)
+        nuevos = TokenRevocado.objects.filter(pk__gt=desde).order_by('pk').values_list('pk', 'jti')
+        for pk, jti in nuevos:
+            # Las filas de la ventana ya agregadas no cuentan de nuevo para la capacidad
+            if jti not in self.filtro:
+                self.filtro.add(jti)
+            self.ultimo_id = max(self.ultimo_id, pk)
+        self.ultima_sync = time.monotonic()
+        if self.filtro.elementos > self.filtro.capacidad:
+            # Pasada la capacidad crecen los falsos positivos: se reconstruye más grande
+            self._construir()
+
+    def revocado(self, jti):
+        with self._lock:
+            self._sincronizar()
+            if jti not in self.filtro:
+                return False
+        return TokenRevocado.objects.filter(jti=jti).exists()
+
+    def revocar(self, token, usuario_id=None, unico=False):
+        """
+        Registra el token (access o refresh) como revocado; es idempotente salvo con
+        unico, que propaga el IntegrityError si otro ya lo había revocado.
+        """
+        jti = token[api_settings.JTI_CLAIM]
+        try:
+            with transaction.atomic():
+                TokenRevocado.objects.create(
+                    jti=jti,
+                    tipo=token[api_settings.TOKEN_TYPE_CLAIM],
+                    usuario_id=usuario_id or token.get(api_settings.USER_ID_CLAIM),
+                    expira=datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc),
+                )
+        except IntegrityError:
+            if unico:
+                raise
+        finally:
+            with self._lock:
+                self._sincronizar()
+                self.filtro.add(jti)
+
+
+registro = RegistroRevocaciones()
+
+
+def revocado(jti):
+    return registro.revocado(jti)
+
+
+def revocar(token, usuario_id=None, unico=False):
+    registro.revocar(token, usuario_id, unico)
+
+
+def purgar_expirados():
+    """Elimina las revocaciones de tokens ya expirados (dejan de importar)."""
+    borrados, _ = TokenRevocado.objects.filter(expira__lte=timezone.now()).delete()
+    return borrados
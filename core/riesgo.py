@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Case, DateField, ExpressionWrapper, F, FloatField, Func, Value, When
+from django.db.models.functions import Least
+
+from . import shards
+from .models import Proyecto, ReporteRiesgo
+
+
+class DiasEntre(Func):
+    """Días entre dos fechas (fin - inicio), calculados por el motor de base de datos."""
+    arity = 2
+    output_field = FloatField()
+    template = '(%(expressions)s)'
+    arg_joiner = ' - '
+
+    def __init__(self, inicio, fin, **extra):
+        # El orden de las expresiones es el de la resta: fin - inicio
+        super().__init__(fin, inicio, **extra)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template='(julianday(%(expressions)s))',
+            arg_joiner=') - julianday(',
+            **extra_context
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template='DATEDIFF(%(expressions)s)',
+            arg_joiner=', ',
+            **extra_context
+        )
+
+
+def proyectos_en_riesgo(hoy, horizonte_dias=None, margen=None):
+    """
+    Proyectos no finalizados cuya entrega ya pasó o vence dentro del horizonte y cuyo
+    progreso va por detrás de la fracción transcurrida de fecha_inicio -> fecha_entrega.
+    Todo se calcula en SQL; el filtro de fechas usa el índice proyecto_plazos_idx.
+    """
+    horizonte_dias = settings.RIESGO_HORIZONTE_DIAS if horizonte_dias is None else horizonte_dias
+    margen = settings.RIESGO_MARGEN if margen is None else margen
+    hoy_sql = Value(hoy, output_field=DateField())
+
+    return (
+        Proyecto.objects
+        .filter(fecha_entrega__lte=hoy + timedelta(days=horizonte_dias), fecha_inicio__lte=hoy)
+        .exclude(estado='Finalizado')
+        .annotate(
+            duracion=DiasEntre('fecha_inicio', 'fecha_entrega'),
+            transcurrido=DiasEntre('fecha_inicio', hoy_sql),
+            dias_restantes=DiasEntre(hoy_sql, 'fecha_entrega'),
+        )
+        .annotate(
+            progreso_esperado=Case(
+                When(duracion__lte=0, then=Value(100.0)),
+                default=Least(Value(100.0), Value(100.0) * F('transcurrido') / F('duracion')),
+                output_field=FloatField(),
+            )
+        )
+        .annotate(
+            riesgo=ExpressionWrapper(F('progreso_esperado') - F('progreso'), output_field=FloatField())
+        )
+        .filter(riesgo__gte=margen)
+        .order_by('-riesgo', 'fecha_entrega')
+    )
+
+
+def guardar_snapshot(hoy, horizonte_dias=None, margen=None):
+    """Precalcula el reporte del día en ReporteRiesgo de cada shard (reemplaza el de esa fecha)."""
+    return sum(shards.en_cada_shard(_guardar_snapshot_shard, hoy, horizonte_dias, margen))
+
+
+def _guardar_snapshot_shard(hoy, horizonte_dias, margen):
+    filas = [
+        ReporteRiesgo(
+            fecha=hoy,
+            proyecto_id=proyecto.pk,
+            progreso=proyecto.progreso,
+            progreso_esperado=proyecto.progreso_esperado,
+            riesgo=proyecto.riesgo,
+            dias_restantes=int(proyecto.dias_restantes),
+        )
+        for proyecto in proyectos_en_riesgo(hoy, horizonte_dias, margen)
+    ]
+    with shards.atomic():
+        ReporteRiesgo.objects.filter(fecha=hoy).delete()
+        ReporteRiesgo.objects.bulk_create(filas)
+    return len(filas)
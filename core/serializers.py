@@ -1,6 +1,28 @@
+import inspect
+
+from django.conf import settings
+from django.db import IntegrityError
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth.models import User
-from .models import Profile, Cliente, Proyecto, Tarea, SubTarea
+from .models import (
+    Profile,
+    Cliente,
+    Proyecto,
+    Tarea,
+    SubTarea,
+    ProyectoArchivado,
+    TareaArchivada,
+    SubTareaArchivada,
+    ImportacionPlan,
+    Trabajo,
+    RegistroAuditoria,
+)
+from .revocacion import revocado, revocar
+from .trabajos import HANDLERS, TIPOS_PUBLICOS, encolar
 
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -13,9 +35,20 @@ class RegisterSerializer(serializers.ModelSerializer):
         fields = ['username', 'password', 'email', 'role']
 
     def create(self, validated_data):
-        """Crea el usuario y asigna el rol en el Profile."""
+        """
+        Crea el usuario y asigna el rol en el Profile. Con `password_hash` (calculado
+        fuera, en el pool de hashing) se guarda tal cual en lugar de hashear aquí.
+        """
         role = validated_data.pop('role')
-        user = User.objects.create_user(**validated_data)
+        password_hash = validated_data.pop('password_hash', None)
+        if password_hash is None:
+            user = User.objects.create_user(**validated_data)
+        else:
+            user = User.objects.create(
+                username=User.normalize_username(validated_data['username']),
+                email=User.objects.normalize_email(validated_data.get('email', '')),
+                password=password_hash,
+            )
         user.profile.role = role
         user.profile.save()
         return user
@@ -36,9 +69,37 @@ class TareaSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Tarea
-        fields = ['id', 'titulo', 'descripcion', 'estado', 'progreso', 
-                  'proyecto', 'fecha_creacion', 'subtareas']
-        read_only_fields = ['id', 'fecha_creacion']
+        fields = ['id', 'titulo', 'descripcion', 'estado', 'progreso',
+                  'proyecto', 'fecha_creacion', 'version', 'subtareas']
+        read_only_fields = ['id', 'fecha_creacion', 'version']
+
+
+class TareaBulkItemSerializer(serializers.Serializer):
+    """Elemento de una actualización masiva de estado/progreso de tareas."""
+    id = serializers.IntegerField()
+    estado = serializers.ChoiceField(choices=Tarea.ESTADOS_TAREA, required=False)
+    progreso = serializers.IntegerField(min_value=0, max_value=100, required=False)
+    version = serializers.IntegerField(
+        min_value=1, required=False, help_text="Versión leída; si ya no es la actual, la tarea no se modifica."
+    )
+
+    def validate(self, attrs):
+        """Cada elemento debe modificar al menos un campo."""
+        if 'estado' not in attrs and 'progreso' not in attrs:
+            raise serializers.ValidationError("Debe indicar 'estado' o 'progreso'.")
+        return attrs
+
+
+class TareaBulkUpdateSerializer(serializers.ListSerializer):
+    """Lista de actualizaciones masivas validada en una sola pasada."""
+    child = TareaBulkItemSerializer()
+
+    def validate(self, attrs):
+        """No se permite repetir una misma tarea dentro del lote."""
+        ids = [item['id'] for item in attrs]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError("Hay tareas repetidas en el lote.")
+        return attrs
 
 
 class ProyectoSerializer(serializers.ModelSerializer):
@@ -48,16 +109,217 @@ class ProyectoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Proyecto
         fields = ['id', 'nombre', 'descripcion', 'estado', 'progreso',
-                  'cliente', 'fecha_inicio', 'fecha_entrega', 'tareas']
-        read_only_fields = ['id', 'progreso']
+                  'cliente', 'fecha_inicio', 'fecha_entrega', 'version', 'tareas']
+        read_only_fields = ['id', 'progreso', 'version']
+
+
+class ProyectoResumenSerializer(serializers.Serializer):
+    """Resumen de un proyecto a partir de las anotaciones de la consulta agrupada."""
+    id = serializers.IntegerField()
+    nombre = serializers.CharField()
+    estado = serializers.CharField()
+    progreso = serializers.IntegerField()
+    cliente = serializers.IntegerField()
+    fecha_inicio = serializers.DateField()
+    fecha_entrega = serializers.DateField()
+    tareas_total = serializers.IntegerField()
+    tareas_por_estado = serializers.SerializerMethodField()
+    subtareas_total = serializers.IntegerField()
+    subtareas_completadas = serializers.IntegerField()
+    porcentaje_subtareas_completadas = serializers.SerializerMethodField()
+
+    def get_tareas_por_estado(self, obj):
+        return {
+            estado: obj[f'tareas_estado_{i}']
+            for i, (estado, _) in enumerate(Tarea.ESTADOS_TAREA)
+        }
+
+    def get_porcentaje_subtareas_completadas(self, obj):
+        if not obj['subtareas_total']:
+            return 0.0
+        return round(100 * obj['subtareas_completadas'] / obj['subtareas_total'], 2)
+
+
+class ProyectoRiesgoSerializer(serializers.Serializer):
+    """Proyecto marcado por el reporte de riesgo (en vivo o desde el snapshot diario)."""
+    id = serializers.IntegerField()
+    nombre = serializers.CharField()
+    cliente = serializers.IntegerField()
+    estado = serializers.CharField()
+    progreso = serializers.IntegerField()
+    fecha_inicio = serializers.DateField()
+    fecha_entrega = serializers.DateField()
+    progreso_esperado = serializers.FloatField()
+    riesgo = serializers.FloatField()
+    dias_restantes = serializers.IntegerField()
+    vencido = serializers.SerializerMethodField()
+
+    def get_vencido(self, obj):
+        return obj['dias_restantes'] < 0
+
+
+class ProgresoDiarioSerializer(serializers.Serializer):
+    """Punto de la serie de progreso de un proyecto (diario o resumen semanal)."""
+    fecha = serializers.DateField()
+    progreso = serializers.IntegerField()
+    tareas_pendientes = serializers.IntegerField()
+    tareas_en_progreso = serializers.IntegerField()
+    tareas_bloqueadas = serializers.IntegerField()
+    tareas_completadas = serializers.IntegerField()
+    semanal = serializers.BooleanField()
 
 
 class ClienteSerializer(serializers.ModelSerializer):
     """Serializador para Clientes con Proyectos anidados."""
     proyectos = ProyectoSerializer(many=True, read_only=True)
-    
+    proyectos_por_estado = serializers.SerializerMethodField()
+    proyectos_activos = serializers.IntegerField(read_only=True)
+
     class Meta:
         model = Cliente
         fields = ['id', 'nombre', 'email', 'empresa', 'activo',
-                  'fecha_creacion', 'proyectos']
-        read_only_fields = ['id', 'fecha_creacion']
+                  'fecha_creacion', 'proyectos', 'proyectos_por_estado',
+                  'proyectos_activos', 'tareas_abiertas', 'progreso_promedio']
+        read_only_fields = ['id', 'fecha_creacion', 'tareas_abiertas', 'progreso_promedio']
+
+    def get_proyectos_por_estado(self, obj):
+        # Columnas mantenidas en el propio cliente: no se agregan las tablas hijas
+        return {
+            estado: getattr(obj, campo)
+            for estado, campo in Cliente.CONTADOR_POR_ESTADO.items()
+        }
+
+
+class SubTareaArchivadaSerializer(serializers.ModelSerializer):
+    """Serializador de solo lectura para SubTareas archivadas."""
+
+    class Meta:
+        model = SubTareaArchivada
+        fields = ['id', 'titulo', 'completada', 'fecha_creacion']
+        read_only_fields = fields
+
+
+class TareaArchivadaSerializer(serializers.ModelSerializer):
+    """Serializador de solo lectura para Tareas archivadas."""
+    subtareas = SubTareaArchivadaSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = TareaArchivada
+        fields = ['id', 'titulo', 'descripcion', 'estado', 'progreso',
+                  'fecha_creacion', 'subtareas']
+        read_only_fields = fields
+
+
+class ProyectoArchivadoSerializer(serializers.ModelSerializer):
+    """Serializador de solo lectura para Proyectos archivados con su árbol."""
+    tareas = TareaArchivadaSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = ProyectoArchivado
+        fields = ['id', 'nombre', 'descripcion', 'estado', 'progreso', 'cliente',
+                  'fecha_inicio', 'fecha_entrega', 'fecha_archivado', 'tareas']
+        read_only_fields = fields
+
+
+class ImportacionPlanSerializer(serializers.ModelSerializer):
+    """Serializador de solo lectura para el estado de una importación."""
+
+    class Meta:
+        model = ImportacionPlan
+        fields = ['id', 'nombre_archivo', 'filas_procesadas', 'filas_con_error',
+                  'proyectos_creados', 'tareas_creadas', 'subtareas_creadas',
+                  'finalizada', 'fecha_creacion', 'fecha_actualizacion']
+        read_only_fields = fields
+
+
+class TrabajoSerializer(serializers.ModelSerializer):
+    """Serializador para encolar trabajos y consultar su estado y resultado."""
+    tipo = serializers.ChoiceField(choices=sorted(TIPOS_PUBLICOS))
+
+    class Meta:
+        model = Trabajo
+        fields = ['id', 'tipo', 'estado', 'parametros', 'resultado', 'error',
+                  'intentos', 'max_intentos', 'disponible_desde',
+                  'fecha_creacion', 'fecha_inicio', 'fecha_fin']
+        read_only_fields = ['id', 'estado', 'resultado', 'error', 'intentos',
+                            'disponible_desde', 'fecha_creacion', 'fecha_inicio', 'fecha_fin']
+
+    def validate(self, attrs):
+        """Los parámetros deben coincidir con la firma del trabajo."""
+        parametros = attrs.get('parametros', {})
+        if not isinstance(parametros, dict):
+            raise serializers.ValidationError({'parametros': ["Debe ser un objeto JSON."]})
+        try:
+            inspect.signature(HANDLERS[attrs['tipo']]).bind(**parametros)
+        except TypeError as exc:
+            raise serializers.ValidationError({'parametros': [str(exc)]})
+        return attrs
+
+    def create(self, validated_data):
+        return encolar(**validated_data)
+
+
+class RegistroAuditoriaSerializer(serializers.ModelSerializer):
+    """Serializer de solo lectura del historial de auditoría."""
+    accion_display = serializers.CharField(source='get_accion_display', read_only=True)
+
+    class Meta:
+        model = RegistroAuditoria
+        fields = ['id', 'fecha', 'modelo', 'objeto_id', 'accion', 'accion_display', 'cambios', 'usuario']
+        read_only_fields = fields
+
+
+class BatchOperacionSerializer(serializers.Serializer):
+    """Una operación del lote: método, ruta de la API y cuerpo JSON opcional."""
+    METODOS = ['GET', 'POST', 'PUT', 'PATCH', 'DELETE']
+
+    ref = serializers.RegexField(r'^\w+$', required=False, help_text="Nombre para referenciar el resultado.")
+    metodo = serializers.ChoiceField(choices=METODOS)
+    url = serializers.CharField()
+    datos = serializers.JSONField(required=False)
+
+
+class BatchSerializer(serializers.Serializer):
+    """Lote de operaciones ejecutadas en orden dentro de una transacción."""
+    operaciones = BatchOperacionSerializer(many=True, allow_empty=False)
+
+    def validate_operaciones(self, operaciones):
+        if len(operaciones) > settings.BATCH_MAX_OPERACIONES:
+            raise serializers.ValidationError(
+                f"Un lote admite como máximo {settings.BATCH_MAX_OPERACIONES} operaciones."
+            )
+        refs = [op['ref'] for op in operaciones if 'ref' in op]
+        if len(refs) != len(set(refs)):
+            raise serializers.ValidationError("Las referencias (ref) deben ser únicas.")
+        return operaciones
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresco de tokens que rechaza refresh tokens revocados y, con rotación,
+    revoca el refresh token usado para que no se pueda reutilizar. La revocación
+    va antes de emitir los tokens nuevos: el INSERT único en TokenRevocado decide
+    cuál de dos refrescos simultáneos con el mismo token gana.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if revocado(refresh[api_settings.JTI_CLAIM]):
+            raise InvalidToken("El token fue revocado.")
+        if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+            try:
+                revocar(refresh, unico=True)
+            except IntegrityError:
+                raise InvalidToken("El token fue revocado.")
+        return super().validate(attrs)
+
+
+class LogoutSerializer(serializers.Serializer):
+    """Refresh token a revocar junto con el access token de la petición."""
+    refresh = serializers.CharField()
+
+    def validate_refresh(self, value):
+        try:
+            return RefreshToken(value)
+        except TokenError:
+            raise serializers.ValidationError("Refresh token inválido o expirado.")
@@ -0,0 +1,226 @@
+import heapq
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from operator import attrgetter
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, transaction
+
+# Modelos del árbol de un cliente: viven en el shard del cliente. El resto (usuarios,
+# perfiles, trabajos, auditoría, tokens) queda en la base default.
+MODELOS_SHARD = {
+    'cliente', 'proyecto', 'tarea', 'subtarea',
+    'proyectoarchivado', 'tareaarchivada', 'subtareaarchivada',
+    'reporteriesgo', 'progresodiario',
+}
+# Campos (de la URL, los filtros o el cuerpo) cuyo id determina el shard
+CAMPOS_SHARD = ('cliente', 'proyecto', 'tarea')
+
+# Shard de la petición o del bloque en curso (None: base default)
+_shard_actual = ContextVar('shard_actual', default=None)
+
+
+def shard_de_id(pk):
+    """
+    Shard de cualquier fila del árbol. Cada shard numera sus ids desde
+    indice * SHARD_RANGO_IDS (ver reservar_rango), así el id basta para ubicarla.
+    """
+    indice = int(pk) // settings.SHARD_RANGO_IDS
+    if not 0 <= indice < len(settings.SHARDS):
+        raise ValueError(f"El id {pk} no pertenece a ningún shard.")
+    return settings.SHARDS[indice]
+
+
+def shard_de_email(email):
+    """Shard de un cliente nuevo: estable para el mismo email."""
+    return settings.SHARDS[zlib.crc32(email.strip().lower().encode()) % len(settings.SHARDS)]
+
+
+def shard_de_datos(kwargs, parametros, datos):
+    """
+    Shard de una petición a partir del pk de la URL, los filtros cliente/proyecto/tarea
+    o el cuerpo (ids de un bulk o email de un cliente nuevo). None si no se puede
+    deducir: la lista se reparte entre todos los shards.
+    """
+    candidatos = [kwargs.get('pk')]
+    candidatos += [parametros.get(campo) for campo in CAMPOS_SHARD]
+    if isinstance(datos, dict):
+        candidatos += [datos.get(campo) for campo in CAMPOS_SHARD]
+    elif isinstance(datos, list):
+        # Un bulk solo se dirige a un shard si todas sus filas están en él
+        try:
+            ubicados = {shard_de_id(item['id']) for item in datos}
+        except (KeyError, TypeError, ValueError):
+            ubicados = set()
+        if len(ubicados) == 1:
+            return ubicados.pop()
+    for pk in candidatos:
+        try:
+            return shard_de_id(pk)
+        except (TypeError, ValueError):
+            continue
+    if isinstance(datos, dict) and isinstance(datos.get('email'), str):
+        return shard_de_email(datos['email'])
+    return None
+
+
+def actual():
+    """Alias de la base del shard en curso."""
+    return _shard_actual.get() or 'default'
+
+
+def en_curso():
+    """Shard fijado por un bloque en_shard (None si no hay ninguno)."""
+    return _shard_actual.get()
+
+
+def activar(alias):
+    """Fija el shard en curso; devuelve el token para restaurar el anterior."""
+    return _shard_actual.set(alias)
+
+
+def restaurar(token):
+    _shard_actual.reset(token)
+
+
+@contextmanager
+def en_shard(alias):
+    """Dirige al shard `alias` las consultas del árbol de clientes dentro del bloque."""
+    token = activar(alias)
+    try:
+        yield alias
+    finally:
+        restaurar(token)
+
+
+def atomic():
+    """transaction.atomic sobre el shard en curso."""
+    return transaction.atomic(using=actual())
+
+
+def en_cada_shard(funcion, *args, **kwargs):
+    """
+    Ejecuta funcion una vez por shard, con ese shard en curso, y devuelve la lista de
+    resultados. Para comandos y trabajos que recorren todo el árbol de clientes.
+    """
+    resultados = []
+    for alias in settings.SHARDS:
+        with en_shard(alias):
+            resultados.append(funcion(*args, **kwargs))
+    return resultados
+
+
+class ClienteShardRouter:
+    """
+    Router de DATABASE_ROUTERS (activo con DB_SHARDS > 1). Los modelos del árbol de un
+    cliente se leen y escriben en el shard de la instancia (su id, el de su padre o el
+    email de un cliente nuevo; create() también la pasa, ver ShardQuerySet) o del
+    contexto (en_shard); sin ninguno van a default, que es el shard 0 y conserva los
+    datos anteriores.
+    """
+
+    def _shard_de_instancia(self, instance):
+        if instance is None:
+            return None
+        if instance._state.db and not instance._state.adding:
+            return instance._state.db
+        try:
+            if instance.pk is not None:
+                return shard_de_id(instance.pk)
+            for campo in CAMPOS_SHARD:
+                pk = getattr(instance, f'{campo}_id', None)
+                if pk is not None:
+                    return shard_de_id(pk)
+        except ValueError:
+            return None
+        if instance._meta.model_name == 'cliente' and instance.email:
+            return shard_de_email(instance.email)
+        return None
+
+    def _db(self, model, hints):
+        if model._meta.model_name not in MODELOS_SHARD:
+            return None
+        return self._shard_de_instancia(hints.get('instance')) or _shard_actual.get()
+
+    def db_for_read(self, model, **hints):
+        return self._db(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._db(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if {obj1._meta.model_name, obj2._meta.model_name} <= MODELOS_SHARD:
+            return obj1._state.db == obj2._state.db
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == 'default' or db not in settings.SHARDS:
+            return None
+        return app_label == 'core' and model_name in MODELOS_SHARD
+
+
+def clave_de_orden(ordering):
+    """(key, reverse) para heapq.merge a partir de un ordering de un solo sentido."""
+    campos = [campo.lstrip('-') for campo in ordering] or ['pk']
+    sentidos = {campo.startswith('-') for campo in ordering} or {False}
+    if len(sentidos) > 1:
+        raise ValueError(f"No se puede fusionar un orden con sentidos mezclados: {ordering}")
+    return attrgetter(*campos), sentidos.pop()
+
+
+def fusionar(listas, ordering):
+    """Une listas ya ordenadas por `ordering` manteniendo ese orden."""
+    clave, inversa = clave_de_orden(ordering)
+    return list(heapq.merge(*listas, key=clave, reverse=inversa))
+
+
+def repartir(queryset):
+    """
+    Ejecuta el queryset en todos los shards en paralelo y fusiona los resultados por
+    el orden del queryset. default, y cualquier shard con una transacción abierta, se
+    consulta en el hilo de la petición (ve su transacción); los demás shards, cada uno
+    en un hilo con su propia conexión.
+    """
+    def consultar(alias):
+        try:
+            return list(queryset.using(alias))
+        finally:
+            connections[alias].close()
+
+    locales = [alias for alias in settings.SHARDS if alias == 'default' or connections[alias].in_atomic_block]
+    remotos = [alias for alias in settings.SHARDS if alias not in locales]
+    with ThreadPoolExecutor(max_workers=len(remotos) or 1) as pool:
+        en_hilos = pool.map(consultar, remotos)
+        listas = [list(queryset.using(alias)) for alias in locales] + list(en_hilos)
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    return fusionar(listas, ordering)
+
+
+def reservar_rango(alias):
+    """
+    Hace que las tablas del árbol en el shard `alias` numeren sus ids desde
+    indice * SHARD_RANGO_IDS. No reduce un contador que ya esté por encima.
+    """
+    inicio = settings.SHARDS.index(alias) * settings.SHARD_RANGO_IDS
+    if not inicio:
+        return
+    conexion = connections[alias]
+    with conexion.cursor() as cursor:
+        for model in apps.get_app_config('core').get_models():
+            if model._meta.model_name not in MODELOS_SHARD:
+                continue
+            tabla = model._meta.db_table
+            if conexion.vendor == 'sqlite':
+                cursor.execute("DELETE FROM sqlite_sequence WHERE name = %s AND seq < %s", [tabla, inicio])
+                cursor.execute(
+                    "INSERT INTO sqlite_sequence (name, seq) SELECT %s, %s "
+                    "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = %s)",
+                    [tabla, inicio, tabla],
+                )
+            elif conexion.vendor == 'mysql':
+                cursor.execute(f"ALTER TABLE {conexion.ops.quote_name(tabla)} AUTO_INCREMENT = {inicio + 1}")
+            else:
+                raise NotImplementedError(f"Rangos de ids no soportados en {conexion.vendor}.")
@@ -1,7 +1,9 @@
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_init, post_migrate, post_save
 from django.dispatch import receiver
-from .models import Profile
+from . import auditoria, contadores, shards
+from .models import Profile, Proyecto, Tarea
 
 
 @receiver(post_save, sender=User)
@@ -15,3 +17,65 @@ def create_profile(sender, instance, created, **kwargs):
 def save_profile(sender, instance, **kwargs):
     """Guarda el Profile cuando se guarda el Usuario."""
     instance.profile.save()
+
+
+def auditar_init(sender, instance, **kwargs):
+    """Foto de los valores cargados para calcular el diff al guardar."""
+    auditoria.tomar_foto(instance)
+
+
+def auditar_save(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Registra la creación o los campos modificados."""
+    if not raw:
+        auditoria.auditar_guardado(instance, creado=created, update_fields=update_fields)
+
+
+def auditar_delete(sender, instance, **kwargs):
+    """Registra la eliminación con los últimos valores conocidos."""
+    auditoria.auditar_eliminacion(instance)
+
+
+for modelo in auditoria.MODELOS_AUDITADOS:
+    post_init.connect(auditar_init, sender=modelo, dispatch_uid=f'auditoria_init_{modelo.__name__}')
+    post_save.connect(auditar_save, sender=modelo, dispatch_uid=f'auditoria_save_{modelo.__name__}')
+    post_delete.connect(auditar_delete, sender=modelo, dispatch_uid=f'auditoria_delete_{modelo.__name__}')
+
+
+@receiver(post_init, sender=Proyecto)
+@receiver(post_init, sender=Tarea)
+def contadores_init(sender, instance, **kwargs):
+    """Foto de los valores que afectan a los contadores del cliente."""
+    contadores.tomar_foto(instance)
+
+
+@receiver(post_save, sender=Proyecto)
+def contadores_proyecto_save(sender, instance, created, raw=False, **kwargs):
+    """Actualiza los contadores del cliente al crear o modificar un proyecto."""
+    if not raw:
+        contadores.proyecto_guardado(instance, created)
+
+
+@receiver(post_delete, sender=Proyecto)
+def contadores_proyecto_delete(sender, instance, **kwargs):
+    """Descuenta el proyecto eliminado de su cliente."""
+    contadores.proyecto_eliminado(instance)
+
+
+@receiver(post_save, sender=Tarea)
+def contadores_tarea_save(sender, instance, created, raw=False, **kwargs):
+    """Actualiza las tareas abiertas del cliente."""
+    if not raw:
+        contadores.tarea_guardada(instance, created)
+
+
+@receiver(post_delete, sender=Tarea)
+def contadores_tarea_delete(sender, instance, **kwargs):
+    """Descuenta la tarea eliminada si estaba abierta."""
+    contadores.tarea_eliminada(instance)
+
+
+@receiver(post_migrate)
+def reservar_rango_de_ids(sender, app_config, using, **kwargs):
+    """Tras migrar un shard (también las bases de test) reserva su rango de ids."""
+    if app_config.label == 'core' and using in settings.SHARDS:
+        shards.reservar_rango(using)
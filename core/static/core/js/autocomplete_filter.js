@@ -0,0 +1,16 @@
+'use strict';
+{
+    const $ = django.jQuery;
+
+    // Aplica el filtro del changelist al elegir una opción del autocompletado.
+    $(document).on('change', '.admin-autocomplete-filter', function() {
+        const params = new URLSearchParams(window.location.search);
+        if (this.value) {
+            params.set(this.name, this.value);
+        } else {
+            params.delete(this.name);
+        }
+        params.delete('p');
+        window.location.search = params.toString();
+    });
+}
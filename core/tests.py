@@ -1,13 +1,79 @@
+import importlib
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from itertools import count
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+
+from django.apps import apps
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APITestCase, APITransactionTestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import (
+    Profile,
+    Cliente,
+    Proyecto,
+    Tarea,
+    SubTarea,
+    ProyectoArchivado,
+    ImportacionPlan,
+    Trabajo,
+    ReporteRiesgo,
+    RegistroAuditoria,
+    ConflictoDeVersion,
+    TokenRevocado,
+    ProgresoDiario,
+)
+from . import auditoria
+from .historial import compactar
+from .importacion import PlanImporter
+from .shards import (
+    ClienteShardRouter,
+    activar,
+    en_shard,
+    fusionar,
+    repartir,
+    reservar_rango,
+    restaurar,
+    shard_de_datos,
+    shard_de_email,
+    shard_de_id,
+)
+from .revocacion import FiltroBloom, registro, revocado
+from .trabajos import HANDLERS, bucle_worker, encolar
+
+
+def email_en_shard(alias, nombre):
+    """Email de cliente que shard_de_email ubica en `alias`."""
+    return next(e for e in (f'{nombre}{i}@example.com' for i in count()) if shard_de_email(e) == alias)
 
-from .models import Profile, Cliente, Proyecto, Tarea, SubTarea
+
+def fijar_shard(test, cliente):
+    """
+    Dirige al shard del cliente las consultas del test: con DB_SHARDS > 1 cada cliente
+    se crea en el shard de su email y, sin contexto, el ORM leería default.
+    """
+    test.addCleanup(restaurar, activar(shard_de_id(cliente.pk)))
 
 
 class RegisterTests(APITestCase):
     """Tests para el endpoint de registro de usuarios."""
+    databases = '__all__'
     
     def test_register_creates_user_and_profile_role(self):
         """Verifica que el registro cree usuario y asigne rol."""
@@ -27,6 +93,7 @@ class RegisterTests(APITestCase):
 
 class ProjectTaskTests(APITestCase):
     """Tests para proyectos, tareas y filtrado."""
+    databases = '__all__'
     
     def setUp(self):
         """Configurar datos de prueba."""
@@ -100,6 +167,7 @@ class ProjectTaskTests(APITestCase):
 
 class CRUDPermissionsTests(APITestCase):
     """Tests para permisos y control de acceso."""
+    databases = '__all__'
     
     def setUp(self):
         """Configurar datos de prueba."""
@@ -180,3 +248,1494 @@ class CRUDPermissionsTests(APITestCase):
         # Client no puede ver (404)
         resp = self._patch(url, {'titulo': 'x'}, self.user)
         self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TareaBulkUpdateTests(APITestCase):
+    """Tests para la actualización masiva de tareas."""
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba."""
+        self.admin = User.objects.create_user('admin3', password='adminpass')
+        self.admin.profile.role = 'ADMIN'
+        self.admin.profile.save()
+
+        cliente = Cliente.objects.create(
+            nombre='Bulk Cliente',
+            email='bulk@example.com',
+            empresa='Bulk Corp'
+        )
+        self.proyectos = [
+            Proyecto.objects.create(
+                nombre=f'Proyecto {i}',
+                descripcion='Test',
+                cliente=cliente,
+                fecha_inicio='2025-01-01',
+                fecha_entrega='2025-12-31'
+            )
+            for i in range(2)
+        ]
+        self.tareas = [
+            Tarea.objects.create(titulo=f'T{i}', descripcion='Test', proyecto=proyecto)
+            for i, proyecto in enumerate(self.proyectos * 2)
+        ]
+        self.url = reverse('tareas-bulk')
+        self.client.force_authenticate(user=self.admin)
+
+    def test_bulk_update_recalcula_proyectos(self):
+        """El lote actualiza las tareas y el progreso de cada proyecto."""
+        data = [
+            {'id': self.tareas[0].id, 'estado': 'Completada', 'progreso': 100},
+            {'id': self.tareas[1].id, 'progreso': 40},
+        ]
+        resp = self.client.patch(self.url, data, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['actualizadas'], 2)
+
+        self.tareas[0].refresh_from_db()
+        self.assertEqual(self.tareas[0].estado, 'Completada')
+        self.proyectos[0].refresh_from_db()
+        self.proyectos[1].refresh_from_db()
+        self.assertEqual(self.proyectos[0].progreso, 50)
+        self.assertEqual(self.proyectos[1].progreso, 20)
+
+    def test_bulk_update_rechaza_lote_invalido(self):
+        """Un elemento fuera de rango invalida todo el lote."""
+        data = [
+            {'id': self.tareas[0].id, 'progreso': 100},
+            {'id': self.tareas[1].id, 'progreso': 150},
+        ]
+        resp = self.client.patch(self.url, data, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.tareas[0].refresh_from_db()
+        self.assertEqual(self.tareas[0].progreso, 0)
+
+    def test_bulk_update_tarea_inexistente(self):
+        """Los ids desconocidos se informan sin modificar nada."""
+        data = [{'id': 999999, 'estado': 'Completada'}]
+        resp = self.client.patch(self.url, data, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(resp.data['ids'], [999999])
+
+    def test_bulk_update_solo_campos_enviados_y_versiones(self):
+        """Cada tarea recibe solo sus campos; una versión vieja da 412 sin modificar nada."""
+        # Cambio concurrente del progreso de la tarea 1 tras leerla el cliente
+        Tarea.objects.filter(pk=self.tareas[1].pk).update(progreso=30)
+        data = [
+            {'id': self.tareas[0].id, 'progreso': 80, 'version': 1},
+            {'id': self.tareas[1].id, 'estado': 'Bloqueada'},
+        ]
+        resp = self.client.patch(self.url, data, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.tareas[0].refresh_from_db()
+        self.tareas[1].refresh_from_db()
+        self.assertEqual((self.tareas[0].progreso, self.tareas[0].estado, self.tareas[0].version), (80, 'Pendiente', 2))
+        self.assertEqual((self.tareas[1].progreso, self.tareas[1].estado), (30, 'Bloqueada'))
+
+        data = [
+            {'id': self.tareas[0].id, 'progreso': 10, 'version': 2},
+            {'id': self.tareas[1].id, 'progreso': 10, 'version': 1},
+        ]
+        resp = self.client.patch(self.url, data, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(resp.data['conflictos'], [{'id': self.tareas[1].id, 'version': 2}])
+        self.tareas[0].refresh_from_db()
+        self.assertEqual(self.tareas[0].progreso, 80)
+
+
+class AdminChangelistTests(TestCase):
+    """Tests para los changelists del admin sobre tablas grandes."""
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba."""
+        self.superuser = User.objects.create_superuser('root', 'root@example.com', 'rootpass')
+        self.cliente = Cliente.objects.create(nombre='C', email='admin@example.com', empresa='E')
+        fijar_shard(self, self.cliente)
+        self.proyectos = self._crear_filas(3)
+        self.client.force_login(self.superuser)
+
+    def _crear_filas(self, cantidad):
+        proyectos = [
+            Proyecto.objects.create(
+                nombre=f'Proyecto {i}',
+                descripcion='Test',
+                cliente=self.cliente,
+                fecha_inicio='2025-01-01',
+                fecha_entrega='2025-12-31'
+            )
+            for i in range(cantidad)
+        ]
+        for proyecto in proyectos:
+            tarea = Tarea.objects.create(titulo='T', descripcion='D', proyecto=proyecto)
+            SubTarea.objects.create(titulo='S', tarea=tarea)
+        return proyectos
+
+    def _consultas_por_changelist(self):
+        consultas = {}
+        for nombre in ('proyecto', 'tarea', 'subtarea'):
+            url = reverse(f'admin:core_{nombre}_changelist')
+            with CaptureQueriesContext(connection) as ctx:
+                resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            consultas[nombre] = len(ctx.captured_queries)
+        return consultas
+
+    def test_changelists_sin_consultas_por_fila(self):
+        """Las columnas FK se resuelven con select_related: las consultas no crecen con las filas."""
+        con_3_filas = self._consultas_por_changelist()
+        self._crear_filas(27)
+        self.assertEqual(self._consultas_por_changelist(), con_3_filas)
+
+    def test_filtro_autocompletado_id_invalido(self):
+        """Un id mal formado en el filtro no rompe el changelist (redirige con ?e=1)."""
+        url = reverse('admin:core_tarea_changelist')
+        resp = self.client.get(url, {'proyecto__id__exact': 'abc'})
+        self.assertEqual(resp.status_code, 302)
+        self.assertIn('e=1', resp['Location'])
+
+    def test_filtro_autocompletado_por_proyecto(self):
+        """El filtro de proyecto acepta el id elegido en el autocompletado."""
+        url = reverse('admin:core_tarea_changelist')
+        resp = self.client.get(url, {'proyecto__id__exact': self.proyectos[0].id})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context['cl'].result_count, 1)
+        self.assertContains(resp, 'admin-autocomplete-filter')
+
+
+class ArchivoTests(APITestCase):
+    """Tests para el archivo de proyectos finalizados."""
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba."""
+        self.admin = User.objects.create_user('admin4', password='adminpass')
+        self.admin.profile.role = 'ADMIN'
+        self.admin.profile.save()
+
+        self.cliente = Cliente.objects.create(nombre='A', email='a@example.com', empresa='A')
+        self.inactivo = Cliente.objects.create(
+            nombre='B', email='b@example.com', empresa='B', activo=False
+        )
+        self.finalizado = self._proyecto(self.cliente, 'Finalizado')
+        self.vigente = self._proyecto(self.cliente, 'En Desarrollo')
+        self.de_inactivo = self._proyecto(self.inactivo, 'Pendiente')
+        tarea = Tarea.objects.create(
+            titulo='T', descripcion='D', proyecto=self.finalizado, progreso=100
+        )
+        SubTarea.objects.create(titulo='S', tarea=tarea, completada=True)
+
+    def _proyecto(self, cliente, estado):
+        return Proyecto.objects.create(
+            nombre=f'P {estado}',
+            descripcion='Test',
+            estado=estado,
+            cliente=cliente,
+            fecha_inicio='2025-01-01',
+            fecha_entrega='2025-12-31'
+        )
+
+    def test_archive_projects_mueve_arboles(self):
+        """El comando mueve proyectos finalizados y de clientes inactivos."""
+        call_command('archive_projects', chunk_size=1, stdout=StringIO())
+
+        self.assertEqual(list(Proyecto.todos.all()), [self.vigente])
+        self.assertFalse(Tarea.objects.exists())
+        self.assertFalse(SubTarea.objects.exists())
+        archivado = ProyectoArchivado.objects.get(pk=self.finalizado.pk)
+        self.assertEqual(archivado.tareas.get().subtareas.count(), 1)
+        self.assertTrue(ProyectoArchivado.objects.filter(pk=self.de_inactivo.pk).exists())
+
+    def test_proyectos_marcados_no_son_visibles(self):
+        """Un proyecto marcado desaparece del manager por defecto antes de moverse."""
+        Proyecto.todos.filter(pk=self.finalizado.pk).update(archivado=True)
+        self.assertFalse(Proyecto.objects.filter(pk=self.finalizado.pk).exists())
+
+        # Una ejecución posterior retoma los proyectos ya marcados
+        call_command('archive_projects', stdout=StringIO())
+        self.assertTrue(ProyectoArchivado.objects.filter(pk=self.finalizado.pk).exists())
+
+    def test_endpoint_archivo_solo_lectura(self):
+        """El archivo se consulta por la API, pero no se modifica."""
+        call_command('archive_projects', stdout=StringIO())
+        self.client.force_authenticate(user=self.admin)
+
+        url = reverse('archivo-proyectos-list')
+        resp = self.client.get(url, {'cliente': self.cliente.id})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['count'], 1)
+        self.assertEqual(len(resp.data['results'][0]['tareas']), 1)
+
+        detalle = reverse('archivo-proyectos-detail', args=[self.finalizado.id])
+        resp = self.client.delete(detalle)
+        self.assertEqual(resp.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class ProfilingTests(APITestCase):
+    """Tests para el perfilado bajo demanda."""
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba."""
+        self.admin = User.objects.create_user('admin5', password='adminpass')
+        self.admin.profile.role = 'ADMIN'
+        self.admin.profile.save()
+        self.user = User.objects.create_user('user5', password='userpass')
+        self.url = reverse('clientes-list')
+
+    def _token(self, username, password):
+        resp = self.client.post(
+            reverse('token_obtain_pair'),
+            {'username': username, 'password': password},
+            format='json'
+        )
+        return resp.data['access']
+
+    def test_admin_recibe_reporte_inline(self):
+        """Un admin obtiene pilas colapsadas y el SQL ejecutado."""
+        token = self._token('admin5', 'adminpass')
+        resp = self.client.get(
+            self.url, {'_profile': 'inline'}, HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        reporte = resp.json()
+        self.assertEqual(reporte['status'], 200)
+        self.assertIn('stacks', reporte)
+        self.assertTrue(reporte['queries'])
+
+    def test_client_no_puede_perfilar(self):
+        """Para un CLIENT el parámetro se ignora."""
+        token = self._token('user5', 'userpass')
+        resp = self.client.get(
+            self.url, {'_profile': 'inline'}, HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.json(), [])
+
+    def test_store_respeta_limite_de_retencion(self):
+        """En modo store solo se conservan los reportes más recientes."""
+        token = self._token('admin5', 'adminpass')
+        with tempfile.TemporaryDirectory() as directorio:
+            with override_settings(PROFILING_DIR=directorio, PROFILING_MAX_REPORTS=1):
+                for _ in range(2):
+                    resp = self.client.get(
+                        self.url, HTTP_X_PROFILE='store', HTTP_AUTHORIZATION=f'Bearer {token}'
+                    )
+                    self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            reporte_id = resp['X-Profile-Id']
+            self.assertEqual(
+                sorted(os.listdir(directorio)),
+                [f'{reporte_id}.collapsed', f'{reporte_id}.json']
+            )
+
+
+BUCKETS_DE_PRUEBA = {
+    'default': {'ADMIN': (2, 0.001), 'CLIENT': (1, 0.001), 'ANON': (1, 0.001)},
+    'heavy': {'ADMIN': (1, 0.001), 'CLIENT': (1, 0.001), 'ANON': (1, 0.001)},
+    'auth': {'ADMIN': (1, 0.001), 'CLIENT': (1, 0.001), 'ANON': (5, 0.001)},
+}
+
+
+@override_settings(TOKEN_BUCKETS=BUCKETS_DE_PRUEBA)
+class ThrottlingTests(APITestCase):
+    """Tests para la limitación por token bucket."""
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba."""
+        caches['throttle'].clear()
+        self.admin = User.objects.create_user('admin6', password='adminpass')
+        self.admin.profile.role = 'ADMIN'
+        self.admin.profile.save()
+        self.otro_admin = User.objects.create_user('admin7', password='adminpass')
+        self.otro_admin.profile.role = 'ADMIN'
+        self.otro_admin.profile.save()
+
+    def tearDown(self):
+        caches['throttle'].clear()
+
+    def test_bucket_agotado_devuelve_429(self):
+        """Al agotar el bucket se responde 429 con Retry-After."""
+        self.client.force_authenticate(user=self.admin)
+        url = reverse('tareas-list')
+        for _ in range(2):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', resp)
+
+    def test_rutas_pesadas_tienen_bucket_propio(self):
+        """Las listas anidadas consumen su propio bucket, más restrictivo."""
+        self.client.force_authenticate(user=self.admin)
+        url = reverse('clientes-list')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.client.get(reverse('tareas-list')).status_code, status.HTTP_200_OK)
+
+    @override_settings(THROTTLE_PROCESOS=2)
+    def test_bucket_repartido_entre_procesos(self):
+        """Con dos procesos web cada uno admite la mitad de la capacidad configurada."""
+        self.client.force_authenticate(user=self.admin)
+        url = reverse('tareas-list')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_buckets_por_usuario(self):
+        """Cada usuario tiene sus propios buckets."""
+        url = reverse('clientes-list')
+        self.client.force_authenticate(user=self.admin)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.client.force_authenticate(user=self.otro_admin)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+    def test_login_tiene_bucket_propio(self):
+        """
+        Los logins anónimos de una misma IP usan el bucket 'auth' (5 en la prueba), no
+        el general (1): pasan varios seguidos y el siguiente al límite recibe 429.
+        """
+        datos = {'username': 'admin6', 'password': 'adminpass'}
+        for _ in range(5):
+            self.assertEqual(self.client.post(reverse('token_obtain_pair'), datos).status_code, status.HTTP_200_OK)
+        resp = self.client.post(reverse('token_obtain_pair'), datos)
+        self.assertEqual(resp.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+class ProyectoResumenTests(APITestCase):
+    """Tests para el resumen agregado de proyectos."""
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba."""
+        self.admin = User.objects.create_user('admin8', password='adminpass')
+        self.admin.profile.role = 'ADMIN'
+        self.admin.profile.save()
+        cliente = Cliente.objects.create(nombre='R', email='r@example.com', empresa='R')
+        fijar_shard(self, cliente)
+        self.proyecto = Proyecto.objects.create(
+            nombre='Resumen',
+            descripcion='Test',
+            cliente=cliente,
+            fecha_inicio='2025-01-01',
+            fecha_entrega='2025-12-31'
+        )
+        hecha = Tarea.objects.create(
+            titulo='A', descripcion='D', proyecto=self.proyecto, estado='Completada', progreso=100
+        )
+        pendiente = Tarea.objects.create(titulo='B', descripcion='D', proyecto=self.proyecto)
+        Tarea.objects.create(titulo='C', descripcion='D', proyecto=self.proyecto)
+        SubTarea.objects.create(titulo='S1', tarea=hecha, completada=True)
+        SubTarea.objects.create(titulo='S2', tarea=hecha, completada=True)
+        SubTarea.objects.create(titulo='S3', tarea=pendiente)
+        self.client.force_authenticate(user=self.admin)
+
+    def test_resumen_cuenta_tareas_y_subtareas(self):
+        """Los conteos no se multiplican por el join con subtareas."""
+        resp = self.client.get(reverse('proyectos-resumen'))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['count'], 1)
+        fila = resp.data['results'][0]
+        self.assertEqual(fila['tareas_total'], 3)
+        self.assertEqual(fila['tareas_por_estado']['Completada'], 1)
+        self.assertEqual(fila['tareas_por_estado']['Pendiente'], 2)
+        self.assertEqual(fila['subtareas_total'], 3)
+        self.assertEqual(fila['subtareas_completadas'], 2)
+        self.assertEqual(fila['porcentaje_subtareas_completadas'], 66.67)
+        self.assertNotIn('tareas', fila)
+
+
+class ProyectoRiesgoTests(APITestCase):
+    """Tests para el reporte de proyectos en riesgo."""
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba."""
+        self.admin = User.objects.create_user('admin10', password='adminpass')
+        self.admin.profile.role = 'ADMIN'
+        self.admin.profile.save()
+        self.cliente = Cliente.objects.create(nombre='Rg', email='rg@example.com', empresa='Rg')
+        fijar_shard(self, self.cliente)
+        self.hoy = timezone.localdate()
+        self.atrasado = self._proyecto('Atrasado', -90, 10, 0)
+        self.vencido = self._proyecto('Vencido', -30, -1, 50)
+        self._proyecto('Lejano', -50, 50, 0)
+        self._proyecto('Al día', -90, 10, 95)
+        self._proyecto('Cerrado', -30, -1, 0, estado='Finalizado')
+        self.client.force_authenticate(user=self.admin)
+
+    def _proyecto(self, nombre, inicio, entrega, progreso, estado='En Desarrollo'):
+        proyecto = Proyecto.objects.create(
+            nombre=nombre,
+            descripcion='Test',
+            cliente=self.cliente,
+            fecha_inicio=self.hoy + timedelta(days=inicio),
+            fecha_entrega=self.hoy + timedelta(days=entrega),
+            estado=estado,
+        )
+        Proyecto.objects.filter(pk=proyecto.pk).update(progreso=progreso)
+        return proyecto
+
+    def test_en_riesgo_calcula_en_sql(self):
+        """Solo aparecen los proyectos atrasados próximos o vencidos, por riesgo."""
+        resp = self.client.get(reverse('proyectos-en-riesgo'))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        filas = resp.data['results']
+        self.assertEqual([f['id'] for f in filas], [self.atrasado.pk, self.vencido.pk])
+        self.assertAlmostEqual(filas[0]['riesgo'], 90.0)
+        self.assertEqual(filas[0]['dias_restantes'], 10)
+        self.assertFalse(filas[0]['vencido'])
+        self.assertAlmostEqual(filas[1]['progreso_esperado'], 100.0)
+        self.assertTrue(filas[1]['vencido'])
+
+        resp = self.client.get(reverse('proyectos-en-riesgo'), {'margen': 60})
+        self.assertEqual([f['id'] for f in resp.data['results']], [self.atrasado.pk])
+
+    def test_snapshot_diario(self):
+        """El comando guarda el reporte del día y el endpoint lo lee con ?fecha."""
+        call_command('snapshot_risk_report', stdout=StringIO())
+        call_command('snapshot_risk_report', stdout=StringIO())
+        self.assertEqual(ReporteRiesgo.objects.filter(fecha=self.hoy).count(), 2)
+
+        Proyecto.objects.filter(pk=self.atrasado.pk).update(progreso=100)
+        resp = self.client.get(reverse('proyectos-en-riesgo'), {'fecha': self.hoy.isoformat()})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        filas = resp.data['results']
+        self.assertEqual([f['id'] for f in filas], [self.atrasado.pk, self.vencido.pk])
+        self.assertEqual(filas[0]['progreso'], 0)
+        self.assertEqual(filas[0]['nombre'], 'Atrasado')
+
+    def test_parametros_invalidos(self):
+        """Parámetros mal formados devuelven 400."""
+        resp = self.client.get(reverse('proyectos-en-riesgo'), {'fecha': 'ayer'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class HistorialProgresoTests(APITestCase):
+    """Tests para las fotos diarias de progreso y las series de burndown."""
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba."""
+        self.admin = User.objects.create_user('admin16', password='adminpass')
+        self.admin.profile.role = 'ADMIN'
+        self.admin.profile.save()
+        self.cliente = Cliente.objects.create(nombre='H', email='h@example.com', empresa='H')
+        self.hoy = timezone.localdate()
+        self.proyecto = self._proyecto('Activo')
+        self.cerrado = self._proyecto('Cerrado', estado='Finalizado')
+        for estado in ('Pendiente', 'Pendiente', 'Bloqueada', 'Completada'):
+            Tarea.objects.create(titulo=estado, descripcion='Test', proyecto=self.proyecto, estado=estado)
+        self.client.force_authenticate(user=self.admin)
+
+    def _proyecto(self, nombre, estado='En Desarrollo'):
+        return Proyecto.objects.create(
+            nombre=nombre,
+            descripcion='Test',
+            cliente=self.cliente,
+            fecha_inicio=self.hoy,
+            fecha_entrega=self.hoy + timedelta(days=30),
+            estado=estado,
+        )
+
+    def test_snapshot_y_serie(self):
+        """El comando guarda una fila por proyecto activo y el endpoint devuelve la serie."""
+        call_command('snapshot_progress', stdout=StringIO())
+        call_command('snapshot_progress', stdout=StringIO())
+        fila = ProgresoDiario.objects.get(fecha=self.hoy)
+        self.assertEqual(fila.proyecto_id, self.proyecto.pk)
+        self.assertEqual(
+            (fila.tareas_pendientes, fila.tareas_en_progreso, fila.tareas_bloqueadas, fila.tareas_completadas),
+            (2, 0, 1, 1),
+        )
+
+        ayer = self.hoy - timedelta(days=1)
+        ProgresoDiario.objects.create(proyecto=self.proyecto, fecha=ayer, progreso=10)
+        resp = self.client.get(
+            reverse('proyectos-historial'),
+            {'proyectos': f'{self.proyecto.pk},{self.cerrado.pk}', 'desde': ayer.isoformat()},
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(resp.data['proyectos']), 1)
+        serie = resp.data['proyectos'][0]['serie']
+        self.assertEqual([p['fecha'] for p in serie], [ayer.isoformat(), self.hoy.isoformat()])
+        self.assertEqual(serie[0]['progreso'], 10)
+        self.assertEqual(serie[1]['tareas_pendientes'], 2)
+
+    def test_compactacion_semanal(self):
+        """Las semanas antiguas quedan en una fila, la del último día, y no se recompactan."""
+        lunes = self.hoy - timedelta(days=self.hoy.weekday() + 28)
+        for dia in range(14):
+            ProgresoDiario.objects.create(proyecto=self.proyecto, fecha=lunes + timedelta(days=dia), progreso=dia)
+        ProgresoDiario.objects.create(proyecto=self.proyecto, fecha=self.hoy, progreso=50)
+
+        self.assertEqual(compactar(self.hoy, dias_diarios=7), 12)
+        semanales = ProgresoDiario.objects.filter(semanal=True)
+        self.assertEqual(
+            list(semanales.values_list('fecha', 'progreso')),
+            [(lunes + timedelta(days=6), 6), (lunes + timedelta(days=13), 13)],
+        )
+        self.assertFalse(ProgresoDiario.objects.get(fecha=self.hoy).semanal)
+        self.assertEqual(compactar(self.hoy, dias_diarios=7), 0)
+
+    def test_historial_sobrevive_al_archivado(self):
+        """Archivar no borra el historial ni los reportes de riesgo, y la serie sigue disponible."""
+        ProgresoDiario.objects.create(proyecto=self.cerrado, fecha=self.hoy, progreso=100)
+        ReporteRiesgo.objects.create(
+            fecha=self.hoy, proyecto=self.cerrado, progreso=100,
+            progreso_esperado=100, riesgo=0, dias_restantes=30,
+        )
+        call_command('archive_projects', stdout=StringIO())
+        self.assertFalse(Proyecto.todos.filter(pk=self.cerrado.pk).exists())
+        self.assertTrue(ReporteRiesgo.objects.filter(proyecto_id=self.cerrado.pk).exists())
+
+        resp = self.client.get(reverse('proyectos-historial'), {'proyectos': str(self.cerrado.pk)})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual([s['proyecto'] for s in resp.data['proyectos']], [self.cerrado.pk])
+        self.assertEqual(resp.data['proyectos'][0]['serie'][0]['progreso'], 100)
+
+    def test_parametros_invalidos(self):
+        """Sin proyectos, con fechas mal formadas o rango invertido devuelve 400."""
+        url = reverse('proyectos-historial')
+        for params in ({}, {'proyectos': 'a'}, {'proyectos': '1', 'desde': 'ayer'},
+                       {'proyectos': '1', 'desde': '2025-02-01', 'hasta': '2025-01-01'}):
+            self.assertEqual(self.client.get(url, params).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BatchTests(APITestCase):
+    """Tests para el endpoint de operaciones por lotes."""
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba."""
+        self.admin = User.objects.create_user('admin12', password='adminpass')
+        self.admin.profile.role = 'ADMIN'
+        self.admin.profile.save()
+        self.cliente = Cliente.objects.create(nombre='B', email='b@example.com', empresa='B')
+        token = RefreshToken.for_user(self.admin).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def _operaciones(self):
+        return [
+            {'ref': 'p', 'metodo': 'POST', 'url': '/api/proyectos/', 'datos': {
+                'nombre': 'Lote', 'descripcion': 'D', 'cliente': self.cliente.pk,
+                'fecha_inicio': '2025-01-01', 'fecha_entrega': '2025-12-31',
+            }},
+            {'ref': 't', 'metodo': 'POST', 'url': '/api/tareas/', 'datos': {
+                'titulo': 'T1', 'descripcion': 'D', 'proyecto': '${p.id}', 'progreso': 40,
+            }},
+            {'metodo': 'POST', 'url': '/api/subtareas/', 'datos': {'titulo': 'S1', 'tarea': '${t.id}'}},
+            {'metodo': 'GET', 'url': '/api/tareas/?proyecto=${p.id}'},
+        ]
+
+    def test_lote_con_referencias_y_autenticacion_unica(self):
+        """Las operaciones usan resultados anteriores y el usuario se carga una sola vez."""
+        with CaptureQueriesContext(connection) as consultas:
+            resp = self.client.post(reverse('batch'), {'operaciones': self._operaciones()}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['status'] for r in resp.data['resultados']], [201, 201, 201, 200])
+
+        proyecto = Proyecto.objects.get(nombre='Lote')
+        self.assertEqual(proyecto.tareas.get().subtareas.get().titulo, 'S1')
+        self.assertEqual(resp.data['resultados'][3]['datos'][0]['proyecto'], proyecto.pk)
+        selects = [q['sql'] for q in consultas.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertEqual(len([q for q in selects if 'auth_user' in q]), 1)
+        self.assertEqual(len([q for q in selects if 'core_profile' in q]), 1)
+
+    def test_lote_se_revierte_si_falla_una_operacion(self):
+        """Un error deshace también las operaciones anteriores del lote."""
+        operaciones = self._operaciones()
+        operaciones[1]['datos']['progreso'] = 500
+        resp = self.client.post(reverse('batch'), {'operaciones': operaciones}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(resp.data['fallida'], 1)
+        self.assertFalse(Proyecto.objects.filter(nombre='Lote').exists())
+
+    def test_referencias_y_rutas_invalidas(self):
+        """Referencias desconocidas, lotes anidados y lotes demasiado grandes se rechazan."""
+        resp = self.client.post(reverse('batch'), {'operaciones': [
+            {'metodo': 'GET', 'url': '/api/proyectos/${x.id}/'},
+        ]}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Referencia desconocida', resp.data['resultados'][0]['datos']['detail'])
+
+        resp = self.client.post(reverse('batch'), {'operaciones': [
+            {'metodo': 'POST', 'url': '/api/batch/', 'datos': {'operaciones': []}},
+        ]}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Las vistas async (y cualquier vista que no sea DRF) no se pueden ejecutar en un lote
+        for url in (reverse('register_async'), reverse('token_obtain_pair_async')):
+            resp = self.client.post(reverse('batch'), {'operaciones': [
+                {'metodo': 'POST', 'url': url, 'datos': {'username': 'lote', 'password': 'clave-segura-3'}},
+            ]}, format='json')
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('Ruta no permitida', resp.data['resultados'][0]['datos']['detail'])
+        self.assertFalse(User.objects.filter(username='lote').exists())
+
+        with override_settings(BATCH_MAX_OPERACIONES=2):
+            resp = self.client.post(reverse('batch'), {'operaciones': self._operaciones()}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('operaciones', resp.data)
+
+
+@override_settings(STREAM_CHUNK_SIZE=10)
+class StreamingListTests(APITestCase):
+    """Tests para el modo de lista en streaming."""
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba."""
+        self.admin = User.objects.create_user('admin13', password='adminpass')
+        self.admin.profile.role = 'ADMIN'
+        self.admin.profile.save()
+        cliente = Cliente.objects.create(nombre='St', email='st@example.com', empresa='St')
+        proyecto = Proyecto.objects.create(
+            nombre='Stream',
+            descripcion='Test',
+            cliente=cliente,
+            fecha_inicio='2025-01-01',
+            fecha_entrega='2025-12-31'
+        )
+        Tarea.objects.bulk_create([
+            Tarea(titulo=f'T{i}', descripcion='D', proyecto=proyecto) for i in range(12)
+        ])
+        SubTarea.objects.bulk_create([
+            SubTarea(titulo=f'S{i}', tarea=tarea) for tarea in Tarea.objects.all() for i in range(2)
+        ])
+        self.client.force_authenticate(user=self.admin)
+
+    def test_subtareas_en_streaming_por_lotes(self):
+        """El array JSON se escribe por lotes de STREAM_CHUNK_SIZE filas."""
+        with CaptureQueriesContext(connection) as consultas:
+            resp = self.client.get(reverse('subtareas-list'), {'stream': 1})
+            partes = list(resp.streaming_content)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp.streaming)
+        datos = json.loads(b''.join(partes))
+        ids = list(SubTarea.objects.order_by('-pk').values_list('pk', flat=True))
+        self.assertEqual([d['id'] for d in datos], ids)
+        # Corchetes de apertura y cierre más un fragmento por cada lote de 10
+        self.assertEqual(len(partes), 2 + 3)
+        lotes = [q for q in consultas.captured_queries if 'core_subtarea' in q['sql']]
+        self.assertEqual(len(lotes), 3)
+
+    def test_tareas_en_streaming_con_anidados_y_filtros(self):
+        """El modo streaming devuelve lo mismo que la lista normal, con prefetch por lote."""
+        normal = self.client.get(reverse('tareas-list'))
+        resp = self.client.get(reverse('tareas-list'), {'stream': 'true'})
+        datos = json.loads(b''.join(resp.streaming_content))
+        self.assertEqual(sorted(datos, key=lambda d: d['id']), sorted(normal.data, key=lambda d: d['id']))
+        self.assertEqual(len(datos[0]['subtareas']), 2)
+
+        resp = self.client.get(reverse('tareas-list'), {'stream': 1, 'estado': 'Completada'})
+        self.assertEqual(json.loads(b''.join(resp.streaming_content)), [])
+
+
+class ContadoresClienteTests(APITestCase):
+    """Tests para los contadores desnormalizados de Cliente."""
+    databases = '__all__'
+
+    CAMPOS = [
+        'proyectos_pendientes', 'proyectos_en_desarrollo', 'proyectos_en_pruebas',
+        'proyectos_finalizados', 'tareas_abiertas', 'progreso_promedio',
+    ]
+
+    def setUp(self):
+        """Configurar datos de prueba."""
+        self.admin = User.objects.create_user('admin14', password='adminpass')
+        self.admin.profile.role = 'ADMIN'
+        self.admin.profile.save()
+        self.cliente = Cliente.objects.create(nombre='Cn', email='cn@example.com', empresa='Cn')
+        fijar_shard(self, self.cliente)
+        # Un proyecto solo puede pasar a otro cliente de su mismo shard
+        self.otro = Cliente.objects.create(
+            nombre='Ot', email=email_en_shard(shard_de_id(self.cliente.pk), 'ot'), empresa='Ot'
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def _proyecto(self, nombre, cliente=None):
+        return Proyecto.objects.create(
+            nombre=nombre,
+            descripcion='Test',
+            cliente=cliente or self.cliente,
+            fecha_inicio='2025-01-01',
+            fecha_entrega='2025-12-31'
+        )
+
+    def _contadores(self, cliente):
+        return Cliente.objects.filter(pk=cliente.pk).values(*self.CAMPOS).get()
+
+    def test_guardar_cliente_no_pisa_contadores(self):
+        """Un cliente leído antes de un incremento se guarda sin volver a escribir los contadores."""
+        leido = Cliente.objects.get(pk=self.cliente.pk)
+        self._proyecto('Concurrente')
+        leido.nombre = 'Renombrado'
+        leido.save()
+        resp = self.client.delete(reverse('clientes-detail', args=[self.cliente.pk]))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._contadores(self.cliente)['proyectos_pendientes'], 1)
+        self.assertEqual(Cliente.objects.get(pk=self.cliente.pk).nombre, 'Renombrado')
+
+    def test_migracion_calcula_contadores_existentes(self):
+        """La migración de los contadores los calcula a partir de los datos existentes."""
+        proyecto = self._proyecto('Previo')
+        Tarea.objects.create(titulo='T', descripcion='D', proyecto=proyecto, progreso=60)
+        esperados = self._contadores(self.cliente)
+        Cliente.objects.update(**{campo: 0 for campo in self.CAMPOS})
+
+        migracion = importlib.import_module('core.migrations.0009_contadores_cliente')
+        migracion.poblar_contadores(apps, SimpleNamespace(connection=connection))
+        self.assertEqual(self._contadores(self.cliente), esperados)
+        self.assertEqual(esperados['tareas_abiertas'], 1)
+
+    def test_contadores_se_mantienen_en_cada_escritura(self):
+        """Crear, cambiar de estado, mover y borrar actualiza los contadores sin desviarse."""
+        a = self._proyecto('A')
+        b = self._proyecto('B')
+        Tarea.objects.create(titulo='T1', descripcion='D', proyecto=a, progreso=50)
+        t2 = Tarea.objects.create(titulo='T2', descripcion='D', proyecto=a, progreso=100, estado='Completada')
+        t3 = Tarea.objects.create(titulo='T3', descripcion='D', proyecto=b)
+        b.estado = 'En Pruebas'
+        b.save()
+        t2.estado = 'En Progreso'
+        t2.save()
+        t3.delete()
+
+        contadores = self._contadores(self.cliente)
+        self.assertEqual(contadores['proyectos_pendientes'], 1)
+        self.assertEqual(contadores['proyectos_en_pruebas'], 1)
+        self.assertEqual(contadores['tareas_abiertas'], 2)
+        self.assertAlmostEqual(contadores['progreso_promedio'], 37.5)
+
+        a.cliente = self.otro
+        a.save()
+        self.assertEqual(self._contadores(self.otro)['tareas_abiertas'], 2)
+        self.assertEqual(self._contadores(self.cliente)['tareas_abiertas'], 0)
+        b.delete()
+
+        esperados = {c: self._contadores(c) for c in (self.cliente, self.otro)}
+        call_command('reconcile_counters', stdout=StringIO())
+        for cliente, valores in esperados.items():
+            self.assertEqual(self._contadores(cliente), valores)
+        self.assertEqual(esperados[self.cliente]['proyectos_en_pruebas'], 0)
+
+    def test_api_y_rutas_masivas(self):
+        """La API expone los contadores y la actualización masiva los recalcula."""
+        proyecto = self._proyecto('Masivo')
+        tareas = [Tarea.objects.create(titulo=f'T{i}', descripcion='D', proyecto=proyecto) for i in range(3)]
+        resp = self.client.patch(
+            reverse('tareas-bulk'),
+            [{'id': t.pk, 'estado': 'Completada', 'progreso': 100} for t in tareas[:2]],
+            format='json'
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+        resp = self.client.get(reverse('clientes-detail', args=[self.cliente.pk]))
+        self.assertEqual(resp.data['tareas_abiertas'], 1)
+        self.assertEqual(resp.data['proyectos_por_estado']['Pendiente'], 1)
+        self.assertEqual(resp.data['proyectos_activos'], 1)
+        self.assertEqual(resp.data['progreso_promedio'], 66.0)
+
+
+class ConcurrenciaOptimistaTests(APITestCase):
+    """Tests para el control de versiones y el progreso sin bloqueos."""
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba."""
+        self.admin = User.objects.create_user('admin15', password='adminpass')
+        self.admin.profile.role = 'ADMIN'
+        self.admin.profile.save()
+        cliente = Cliente.objects.create(nombre='V', email='v@example.com', empresa='V')
+        self.proyecto = Proyecto.objects.create(
+            nombre='Versionado',
+            descripcion='Test',
+            cliente=cliente,
+            fecha_inicio='2025-01-01',
+            fecha_entrega='2025-12-31'
+        )
+        self.tarea = Tarea.objects.create(titulo='T', descripcion='D', proyecto=self.proyecto)
+        self.client.force_authenticate(user=self.admin)
+
+    def test_if_match_y_etag(self):
+        """PATCH con If-Match de una versión vieja responde 412 y no sobrescribe."""
+        url = reverse('tareas-detail', args=[self.tarea.pk])
+        resp = self.client.get(url)
+        self.assertEqual(resp['ETag'], '"1"')
+
+        resp = self.client.patch(url, {'progreso': 30}, format='json', HTTP_IF_MATCH='"1"')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp['ETag'], '"2"')
+
+        resp = self.client.patch(url, {'progreso': 90}, format='json', HTTP_IF_MATCH='"1"')
+        self.assertEqual(resp.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.tarea.refresh_from_db()
+        self.assertEqual((self.tarea.progreso, self.tarea.version), (30, 2))
+
+    def test_update_condicional_detecta_escritura_concurrente(self):
+        """Guardar una copia leída antes de otra escritura lanza ConflictoDeVersion."""
+        primera = Tarea.objects.get(pk=self.tarea.pk)
+        segunda = Tarea.objects.get(pk=self.tarea.pk)
+        primera.titulo = 'Primera'
+        primera.save()
+        segunda.titulo = 'Segunda'
+        with self.assertRaises(ConflictoDeVersion), transaction.atomic():
+            segunda.save()
+        self.assertEqual(segunda.version, 1)
+        self.assertEqual(Tarea.objects.get(pk=self.tarea.pk).titulo, 'Primera')
+
+    def test_progreso_en_un_solo_update(self):
+        """El progreso se calcula en SQL y un guardado viejo del proyecto no lo pisa."""
+        viejo = Proyecto.objects.get(pk=self.proyecto.pk)
+        Tarea.objects.create(titulo='T2', descripcion='D', proyecto=self.proyecto, progreso=75)
+        with CaptureQueriesContext(connection) as consultas:
+            self.proyecto.actualizar_progreso()
+        self.assertFalse([q for q in consultas.captured_queries if q['sql'].startswith('SELECT')])
+
+        viejo.nombre = 'Renombrado'
+        viejo.save()
+        viejo.refresh_from_db()
+        self.assertEqual((viejo.nombre, viejo.progreso), ('Renombrado', 37))
+
+
+PLAN_CSV = """cliente_email,proyecto,fecha_inicio,fecha_entrega,tarea,estado,progreso,subtarea,subtarea_completada
+plan@example.com,Migración,2025-01-01,2025-06-30,Diseño,Completada,100,Modelo,si
+plan@example.com,Migración,2025-01-01,2025-06-30,Diseño,Completada,100,Revisión,no
+plan@example.com,Migración,2025-01-01,2025-06-30,Desarrollo,En Progreso,50,,
+nadie@example.com,Otro,2025-01-01,2025-06-30,Tarea,Pendiente,0,,
+plan@example.com,Soporte,2025-02-01,2025-01-01,Guardia,Pendiente,150,,
+"""
+
+
+class ImportPlanTests(APITestCase):
+    """Tests para la importación masiva desde CSV."""
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba."""
+        self.cliente = Cliente.objects.create(nombre='Plan', email='plan@example.com', empresa='P')
+        fijar_shard(self, self.cliente)
+        self.directorio = tempfile.TemporaryDirectory()
+        self.ruta = os.path.join(self.directorio.name, 'plan.csv')
+        with open(self.ruta, 'w', encoding='utf-8') as archivo:
+            archivo.write(PLAN_CSV)
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def test_import_plan_crea_arbol_y_reporta_errores(self):
+        """Las filas válidas se insertan por lotes y las inválidas se reportan."""
+        errores = os.path.join(self.directorio.name, 'errores.csv')
+        call_command('import_plan', self.ruta, chunk_size=2, errors=errores, stdout=StringIO())
+
+        proyecto = Proyecto.objects.get(nombre='Migración')
+        self.assertEqual(proyecto.tareas.count(), 2)
+        self.assertEqual(SubTarea.objects.filter(tarea__proyecto=proyecto).count(), 2)
+        self.assertEqual(proyecto.progreso, 75)
+        self.assertFalse(Proyecto.objects.filter(nombre__in=['Otro', 'Soporte']).exists())
+
+        importacion = ImportacionPlan.objects.get()
+        self.assertTrue(importacion.finalizada)
+        self.assertEqual(importacion.filas_procesadas, 5)
+        self.assertEqual(importacion.filas_con_error, 2)
+        with open(errores, encoding='utf-8') as archivo:
+            filas = archivo.read().splitlines()
+        self.assertEqual([fila.split(',')[0] for fila in filas[1:]], ['5', '6'])
+
+    def test_import_plan_reanuda_desde_punto_de_control(self):
+        """Una importación reanudada no repite las filas ya confirmadas."""
+        importacion = ImportacionPlan.objects.create(nombre_archivo='plan.csv', filas_procesadas=2)
+        call_command('import_plan', self.ruta, resume=importacion.pk, stdout=StringIO())
+
+        self.assertEqual(list(Tarea.objects.values_list('titulo', flat=True)), ['Desarrollo'])
+        self.assertFalse(SubTarea.objects.exists())
+
+    def test_endpoint_importaciones(self):
+        """El endpoint acepta el CSV como multipart y devuelve el reporte."""
+        admin = User.objects.create_user('admin9', password='adminpass')
+        admin.profile.role = 'ADMIN'
+        admin.profile.save()
+        self.client.force_authenticate(user=admin)
+
+        archivo = SimpleUploadedFile('plan.csv', PLAN_CSV.encode('utf-8'), content_type='text/csv')
+        resp = self.client.post(reverse('importar-plan'), {'archivo': archivo}, format='multipart')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(resp.data['importacion']['tareas_creadas'], 2)
+        self.assertEqual([e['fila'] for e in resp.data['errores']], [5, 6])
+
+
+class ImportPlanReanudacionTests(APITransactionTestCase):
+    """Reanudación de una importación cuyos primeros lotes ya se confirmaron."""
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba."""
+        fijar_shard(self, Cliente.objects.create(nombre='Plan', email='plan@example.com', empresa='P'))
+        self.directorio = tempfile.TemporaryDirectory()
+        self.ruta = os.path.join(self.directorio.name, 'plan.csv')
+        with open(self.ruta, 'w', encoding='utf-8') as archivo:
+            archivo.write(
+                "cliente_email,proyecto,fecha_inicio,fecha_entrega,tarea,estado,progreso\n"
+                "plan@example.com,Migración,2025-01-01,2025-06-30,Diseño,Completada,100\n"
+                "plan@example.com,Migración,2025-01-01,2025-06-30,Desarrollo,En Progreso,50\n"
+                "plan@example.com,Soporte,2025-01-01,2025-06-30,Guardia,En Progreso,40\n"
+            )
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def test_reanudar_recalcula_proyectos_de_lotes_anteriores(self):
+        """Tras una caída, el progreso de los proyectos de lotes ya confirmados se recalcula."""
+        importacion = ImportacionPlan.objects.create(nombre_archivo='plan.csv')
+        procesar_lote = PlanImporter._procesar_lote
+        lotes = []
+
+        def caer_en_el_segundo(importer, inicio, lote):
+            lotes.append(inicio)
+            if len(lotes) == 2:
+                raise RuntimeError("Caída simulada")
+            return procesar_lote(importer, inicio, lote)
+
+        with mock.patch.object(PlanImporter, '_procesar_lote', caer_en_el_segundo):
+            with open(self.ruta, newline='', encoding='utf-8') as lineas:
+                with self.assertRaises(RuntimeError):
+                    PlanImporter(importacion, chunk_size=2).ejecutar(lineas)
+
+        importacion.refresh_from_db()
+        self.assertEqual(importacion.filas_procesadas, 2)
+        self.assertFalse(importacion.finalizada)
+        migracion = Proyecto.objects.get(nombre='Migración')
+        self.assertEqual(migracion.progreso, 0)
+
+        call_command('import_plan', self.ruta, chunk_size=2, resume=importacion.pk, stdout=StringIO())
+
+        migracion.refresh_from_db()
+        self.assertEqual(migracion.progreso, 75)
+        self.assertEqual(Proyecto.objects.get(nombre='Soporte').progreso, 40)
+        self.assertEqual(Cliente.objects.get().progreso_promedio, 57.5)
+
+
+class TrabajoTests(APITestCase):
+    """Tests para la cola de trabajos en base de datos."""
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba."""
+        self.admin = User.objects.create_user('admin10', password='adminpass')
+        self.admin.profile.role = 'ADMIN'
+        self.admin.profile.save()
+        self.client.force_authenticate(user=self.admin)
+
+    def test_encolar_y_ejecutar(self):
+        """La API encola y responde 202; el worker deja el resultado."""
+        resp = self.client.post(
+            reverse('trabajos-list'),
+            {'tipo': 'recalcular_progreso', 'parametros': {}},
+            format='json'
+        )
+        self.assertEqual(resp.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(resp.data['estado'], 'Pendiente')
+
+        self.assertEqual(bucle_worker(burst=True), 1)
+        resp = self.client.get(reverse('trabajos-detail', args=[resp.data['id']]))
+        self.assertEqual(resp.data['estado'], 'Completado')
+        self.assertEqual(resp.data['resultado'], {'proyectos': 0})
+
+    def test_parametros_invalidos(self):
+        """Los parámetros se validan contra la firma del trabajo."""
+        resp = self.client.post(
+            reverse('trabajos-list'),
+            {'tipo': 'archivar_proyectos', 'parametros': {'desconocido': 1}},
+            format='json'
+        )
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_reintento_con_backoff(self):
+        """Un fallo se reintenta más tarde y, agotados los intentos, queda Fallido."""
+        importacion = ImportacionPlan.objects.create(nombre_archivo='x.csv')
+        trabajo = encolar(
+            'importar_plan',
+            {'ruta': '/no/existe.csv', 'importacion_id': importacion.pk},
+            max_intentos=2
+        )
+        bucle_worker(burst=True)
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.estado, 'Pendiente')
+        self.assertEqual(trabajo.intentos, 1)
+        self.assertGreater(trabajo.disponible_desde, timezone.now())
+
+        # Hasta que vence el backoff el trabajo no se vuelve a reclamar
+        self.assertEqual(bucle_worker(burst=True), 0)
+        Trabajo.objects.filter(pk=trabajo.pk).update(disponible_desde=timezone.now() - timedelta(seconds=1))
+        bucle_worker(burst=True)
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.estado, 'Fallido')
+        self.assertIn('FileNotFoundError', trabajo.error)
+
+    def test_trabajos_bloqueados(self):
+        """Un trabajo sin latido vuelve a la cola hasta agotar sus intentos; uno largo que late, no."""
+        hace_dos_horas = timezone.now() - timedelta(hours=2)
+        reintentable = encolar('recalcular_progreso')
+        agotado = encolar('recalcular_progreso', max_intentos=2)
+        reciente = encolar('recalcular_progreso')
+        Trabajo.objects.filter(pk=reintentable.pk).update(
+            estado='En Curso', intentos=1, fecha_inicio=hace_dos_horas, latido=hace_dos_horas
+        )
+        Trabajo.objects.filter(pk=agotado.pk).update(
+            estado='En Curso', intentos=2, fecha_inicio=hace_dos_horas, latido=hace_dos_horas
+        )
+        Trabajo.objects.filter(pk=reciente.pk).update(
+            estado='En Curso', intentos=1, fecha_inicio=hace_dos_horas, latido=timezone.now()
+        )
+
+        self.assertEqual(bucle_worker(burst=True), 1)
+        reintentable.refresh_from_db()
+        self.assertEqual((reintentable.estado, reintentable.intentos), ('Completado', 2))
+        agotado.refresh_from_db()
+        self.assertEqual((agotado.estado, agotado.intentos), ('Fallido', 2))
+        self.assertIn('señales de vida', agotado.error)
+        reciente.refresh_from_db()
+        self.assertEqual(reciente.estado, 'En Curso')
+
+    def test_importacion_asincrona(self):
+        """Con ?async=1 la importación se delega a la cola."""
+        Cliente.objects.create(nombre='Plan', email='plan@example.com', empresa='P')
+        archivo = SimpleUploadedFile('plan.csv', PLAN_CSV.encode('utf-8'), content_type='text/csv')
+        with tempfile.TemporaryDirectory() as directorio:
+            with override_settings(IMPORTACIONES_DIR=directorio):
+                resp = self.client.post(
+                    reverse('importar-plan') + '?async=1', {'archivo': archivo}, format='multipart'
+                )
+                self.assertEqual(resp.status_code, status.HTTP_202_ACCEPTED)
+                self.assertFalse(Tarea.objects.exists())
+                bucle_worker(burst=True)
+
+        importacion = ImportacionPlan.objects.get(pk=resp.data['importacion']['id'])
+        self.assertTrue(importacion.finalizada)
+        self.assertEqual(importacion.tareas_creadas, 2)
+
+
+class LatidoTrabajosTests(APITransactionTestCase):
+    """Tests para el latido de los trabajos (lo escribe otro hilo: necesitan transacciones reales)."""
+    databases = '__all__'
+
+    @override_settings(TRABAJOS_LATIDO=0.05)
+    def test_latido_mientras_el_trabajo_corre(self):
+        """El worker renueva el latido de un trabajo largo mientras se ejecuta."""
+        trabajo = encolar('recalcular_progreso')
+        latidos = []
+
+        def lento(**parametros):
+            latidos.append(Trabajo.objects.get(pk=trabajo.pk).latido)
+            time.sleep(0.3)
+            latidos.append(Trabajo.objects.get(pk=trabajo.pk).latido)
+            return {}
+
+        with mock.patch.dict(HANDLERS, {'recalcular_progreso': lento}):
+            self.assertEqual(bucle_worker(burst=True), 1)
+        self.assertGreater(latidos[1], latidos[0])
+        self.assertEqual(Trabajo.objects.get(pk=trabajo.pk).estado, 'Completado')
+
+
+class AuditoriaTests(APITransactionTestCase):
+    """Tests para el historial de auditoría (necesitan transacciones reales)."""
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba."""
+        self.admin = User.objects.create_user('admin11', password='adminpass')
+        self.admin.profile.role = 'ADMIN'
+        self.admin.profile.save()
+        self.cliente = Cliente.objects.create(nombre='Au', email='au@example.com', empresa='Au')
+        self.proyecto = Proyecto.objects.create(
+            nombre='Auditado',
+            descripcion='Test',
+            cliente=self.cliente,
+            fecha_inicio='2025-01-01',
+            fecha_entrega='2025-12-31'
+        )
+        self.tareas = [
+            Tarea.objects.create(titulo=f'T{i}', descripcion='D', proyecto=self.proyecto)
+            for i in range(3)
+        ]
+        self.client.force_authenticate(user=self.admin)
+
+    def test_diff_por_campo_y_usuario(self):
+        """Una modificación guarda solo los campos cambiados y el usuario de la petición."""
+        tarea = self.tareas[0]
+        resp = self.client.patch(
+            reverse('tareas-detail', args=[tarea.pk]), {'estado': 'Completada'}, format='json'
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        registro = RegistroAuditoria.objects.get(modelo='Tarea', objeto_id=tarea.pk, accion='U')
+        self.assertEqual(registro.cambios, {'estado': ['Pendiente', 'Completada']})
+        self.assertEqual(registro.usuario_id, self.admin.pk)
+
+    def test_un_solo_insert_por_peticion(self):
+        """Los registros de la petición se escriben con un único INSERT."""
+        datos = [{'id': t.pk, 'estado': 'En Progreso', 'progreso': 40} for t in self.tareas]
+        with CaptureQueriesContext(connection) as consultas:
+            resp = self.client.patch(reverse('tareas-bulk'), datos, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        inserts = [q for q in consultas.captured_queries
+                   if q['sql'].startswith('INSERT') and 'registroauditoria' in q['sql']]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            RegistroAuditoria.objects.filter(modelo='Tarea', accion='U', usuario=self.admin).count(), 3
+        )
+
+    def test_rollback_descarta_registros(self):
+        """Los cambios de una transacción revertida no dejan historial."""
+        antes = RegistroAuditoria.objects.count()
+        with self.assertRaises(RuntimeError):
+            with auditoria.capturar(), transaction.atomic():
+                self.cliente.nombre = 'Otro'
+                self.cliente.save()
+                raise RuntimeError
+        self.assertEqual(RegistroAuditoria.objects.count(), antes)
+
+    def test_consulta_por_objeto_y_solo_insercion(self):
+        """La API filtra por objeto y pagina por cursor; los registros no se modifican."""
+        self.client.delete(reverse('tareas-detail', args=[self.tareas[1].pk]))
+        resp = self.client.get(
+            reverse('auditoria-list'),
+            {'modelo': 'Tarea', 'objeto_id': self.tareas[1].pk, 'page_size': 1}
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['accion'] for r in resp.data['results']], ['D'])
+        self.assertIsNotNone(resp.data['next'])
+        self.assertEqual(resp.data['results'][0]['cambios']['titulo'], 'T1')
+
+        registro = RegistroAuditoria.objects.first()
+        with self.assertRaises(ValueError):
+            registro.save()
+
+        cliente = User.objects.create_user('cliente11', password='pass')
+        self.client.force_authenticate(user=cliente)
+        resp = self.client.get(reverse('auditoria-list'))
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class RevocacionTokensTests(APITestCase):
+    """Tests para la revocación de JWT con filtro de Bloom en memoria."""
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba."""
+        registro.reiniciar()
+        self.user = User.objects.create_user('revoca', password='pass1234')
+
+    def _tokens(self):
+        resp = self.client.post(reverse('token_obtain_pair'), {'username': 'revoca', 'password': 'pass1234'})
+        return resp.data['access'], resp.data['refresh']
+
+    def test_filtro_bloom(self):
+        """Sin falsos negativos y con pocos falsos positivos dentro de la capacidad."""
+        filtro = FiltroBloom(1000, 0.01)
+        for i in range(1000):
+            filtro.add(f'jti-{i}')
+        self.assertTrue(all(f'jti-{i}' in filtro for i in range(1000)))
+        falsos = sum(f'otro-{i}' in filtro for i in range(10000))
+        self.assertLess(falsos, 300)
+
+    def test_logout_revoca_access_y_refresh(self):
+        """Tras el logout ni el access ni el refresh token sirven."""
+        access, refresh = self._tokens()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(self.client.get(reverse('proyectos-list')).status_code, status.HTTP_200_OK)
+
+        resp = self.client.post(reverse('logout'), {'refresh': refresh}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.client.get(reverse('proyectos-list')).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.credentials()
+        resp = self.client.post(reverse('token_refresh'), {'refresh': refresh}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_rotacion_revoca_el_refresh_usado(self):
+        """Cada refresh devuelve uno nuevo y el anterior no se puede reutilizar."""
+        _, refresh = self._tokens()
+        resp = self.client.post(reverse('token_refresh'), {'refresh': refresh}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertIn('refresh', resp.data)
+        resp = self.client.post(reverse('token_refresh'), {'refresh': refresh}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refrescos_simultaneos_con_el_mismo_token(self):
+        """Si dos refrescos pasan la comprobación a la vez, el INSERT deja ganar solo a uno."""
+        _, refresh = self._tokens()
+        # Ambas peticiones leen el token como no revocado antes de que la otra lo revoque
+        with mock.patch('core.serializers.revocado', return_value=False):
+            primera = self.client.post(reverse('token_refresh'), {'refresh': refresh}, format='json')
+            segunda = self.client.post(reverse('token_refresh'), {'refresh': refresh}, format='json')
+        self.assertEqual(primera.status_code, status.HTTP_200_OK)
+        self.assertEqual(segunda.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertNotIn('access', segunda.data)
+        self.assertEqual(TokenRevocado.objects.filter(tipo='refresh').count(), 1)
+
+    @override_settings(REVOCACION_SYNC_SEGUNDOS=3600)
+    def test_consulta_en_memoria_y_sincronizacion_incremental(self):
+        """Los tokens no revocados no tocan la base; las revocaciones de otros procesos se sincronizan."""
+        self.assertFalse(revocado('inicial'))
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertFalse(revocado('no-revocado'))
+        self.assertEqual(len(consultas.captured_queries), 0)
+
+        # Revocación hecha por otro worker: aparece en la siguiente sincronización
+        TokenRevocado.objects.create(jti='remoto', tipo='access', expira=timezone.now() + timedelta(hours=1))
+        with override_settings(REVOCACION_SYNC_SEGUNDOS=0):
+            self.assertTrue(revocado('remoto'))
+
+    @override_settings(REVOCACION_SYNC_SEGUNDOS=0)
+    def test_revocacion_confirmada_fuera_de_orden(self):
+        """Una fila con un id menor que el último visto (confirmada tarde) también llega al filtro."""
+        expira = timezone.now() + timedelta(hours=1)
+        TokenRevocado.objects.create(pk=50, jti='posterior', tipo='access', expira=expira)
+        self.assertTrue(revocado('posterior'))
+        elementos = registro.filtro.elementos
+
+        TokenRevocado.objects.create(pk=40, jti='tardio', tipo='access', expira=expira)
+        self.assertTrue(revocado('tardio'))
+        self.assertEqual(registro.filtro.elementos, elementos + 1)
+
+
+class AutenticacionAsyncTests(APITestCase):
+    """Tests para el login y el registro async con hashing en el pool de procesos."""
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba."""
+        caches['throttle'].clear()
+        self.user = User.objects.create_user('asyncuser', password='clave-segura-1')
+
+    def test_login_async(self):
+        """Devuelve tokens válidos con las credenciales correctas y 401 si no."""
+        url = reverse('token_obtain_pair_async')
+        resp = self.client.post(url, {'username': 'asyncuser', 'password': 'clave-segura-1'}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.json()['access']}")
+        self.assertEqual(self.client.get(reverse('clientes-list')).status_code, status.HTTP_200_OK)
+        self.client.credentials()
+
+        for datos in ({'username': 'asyncuser', 'password': 'otra-clave'}, {'username': 'nadie', 'password': 'x'}):
+            resp = self.client.post(url, datos, format='json')
+            self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+        resp = self.client.post(url, {'username': 'asyncuser'}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('password', resp.json())
+
+    def test_registro_async(self):
+        """Crea el usuario con la contraseña hasheada en el pool y su rol."""
+        url = reverse('register_async')
+        datos = {'username': 'nuevoasync', 'password': 'clave-segura-2', 'email': 'n@example.com', 'role': 'CLIENT'}
+        resp = self.client.post(url, datos, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        user = User.objects.get(username='nuevoasync')
+        self.assertTrue(user.check_password('clave-segura-2'))
+        self.assertEqual(user.profile.role, 'CLIENT')
+
+        resp = self.client.post(url, datos, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('username', resp.json())
+
+    @override_settings(HASH_MAX_PENDIENTES=0)
+    def test_cola_saturada_devuelve_429(self):
+        """Con la cola del pool llena se responde 429 sin hashear."""
+        resp = self.client.post(
+            reverse('token_obtain_pair_async'), {'username': 'asyncuser', 'password': 'clave-segura-1'}, format='json'
+        )
+        self.assertEqual(resp.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', resp)
+
+
+@override_settings(SHARDS=['default', 'shard_1', 'shard_2'], SHARD_RANGO_IDS=100)
+class ShardingTests(TestCase):
+    """Tests para el enrutado por cliente entre shards (lógica sin bases adicionales)."""
+    databases = '__all__'
+
+    def test_shard_por_rango_de_ids(self):
+        """El id indica el shard; la petición se dirige por pk, filtros o cuerpo."""
+        self.assertEqual(shard_de_id(5), 'default')
+        self.assertEqual(shard_de_id('142'), 'shard_1')
+        with self.assertRaises(ValueError):
+            shard_de_id(300)
+
+        self.assertEqual(shard_de_datos({'pk': '205'}, {}, None), 'shard_2')
+        self.assertEqual(shard_de_datos({}, {'proyecto': '120'}, {}), 'shard_1')
+        self.assertEqual(shard_de_datos({}, {}, {'cliente': 250, 'nombre': 'P'}), 'shard_2')
+        self.assertEqual(shard_de_datos({}, {}, [{'id': 101}, {'id': 150}]), 'shard_1')
+        self.assertIsNone(shard_de_datos({}, {}, [{'id': 1}, {'id': 150}]))
+        self.assertIsNone(shard_de_datos({}, {'estado': 'Pendiente'}, {}))
+        email = shard_de_datos({}, {}, {'email': 'Nuevo@example.com'})
+        self.assertEqual(email, shard_de_datos({}, {}, {'email': 'nuevo@example.com'}))
+
+    def test_router(self):
+        """El árbol del cliente sigue a la instancia o al contexto; el resto, a default."""
+        router = ClienteShardRouter()
+        self.assertIsNone(router.db_for_read(Tarea))
+        with en_shard('shard_1'):
+            self.assertEqual(router.db_for_read(Tarea), 'shard_1')
+            self.assertIsNone(router.db_for_write(Profile))
+        self.assertEqual(router.db_for_write(Tarea, instance=Tarea(proyecto_id=205)), 'shard_2')
+        self.assertEqual(router.db_for_read(SubTarea, instance=SubTarea(pk=130)), 'shard_1')
+
+        self.assertTrue(router.allow_migrate('shard_1', 'core', model_name='tarea'))
+        self.assertFalse(router.allow_migrate('shard_1', 'core', model_name='trabajo'))
+        self.assertFalse(router.allow_migrate('shard_2', 'auth', model_name='user'))
+        self.assertIsNone(router.allow_migrate('default', 'core', model_name='trabajo'))
+
+    def test_fusion_por_orden(self):
+        """Las listas de cada shard se fusionan por el orden del modelo."""
+        def filas(*fechas):
+            return [SimpleNamespace(fecha_creacion=fecha) for fecha in fechas]
+
+        fusion = fusionar([filas(9, 4, 1), filas(8, 7), filas()], ['-fecha_creacion'])
+        self.assertEqual([fila.fecha_creacion for fila in fusion], [9, 8, 7, 4, 1])
+        with self.assertRaises(ValueError):
+            fusionar([], ['-fecha_inicio', 'nombre'])
+
+
+# Con DB_SHARDS >= 2 existe la base shard_1; sin ella los tests con bases reales se saltan
+CON_SHARD_1 = 'shard_1' in settings.DATABASES
+
+
+@skipUnless(CON_SHARD_1, "Requiere DB_SHARDS >= 2 (ver Sharding por cliente en el README).")
+class ShardingBasesTests(APITransactionTestCase):
+    """Tests del sharding con dos bases reales: DB_SHARDS=2 python manage.py test core.tests.ShardingBasesTests"""
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba."""
+        caches['throttle'].clear()
+        reservar_rango('shard_1')
+        self.admin = User.objects.create_user('admin17', password='adminpass')
+        self.admin.profile.role = 'ADMIN'
+        self.admin.profile.save()
+        self.client.force_authenticate(user=self.admin)
+
+    def _crear_cliente(self, alias, nombre):
+        resp = self.client.post(
+            reverse('clientes-list'),
+            {'nombre': nombre, 'email': email_en_shard(alias, nombre), 'empresa': 'E'},
+            format='json',
+        )
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        return resp.data['id']
+
+    def _crear_proyecto(self, cliente, nombre, fecha_inicio):
+        resp = self.client.post(reverse('proyectos-list'), {
+            'nombre': nombre, 'descripcion': 'D', 'cliente': cliente,
+            'fecha_inicio': fecha_inicio, 'fecha_entrega': '2030-12-31',
+        }, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        return resp.data['id']
+
+    def test_crud_dirigido_al_shard_del_cliente(self):
+        """Cada cliente y su árbol se guardan en su shard, con ids del rango de ese shard."""
+        ids = {alias: self._crear_cliente(alias, 'crud') for alias in ('default', 'shard_1')}
+        self.assertLess(ids['default'], settings.SHARD_RANGO_IDS)
+        self.assertGreaterEqual(ids['shard_1'], settings.SHARD_RANGO_IDS)
+        for alias, otro in (('default', 'shard_1'), ('shard_1', 'default')):
+            self.assertEqual(shard_de_id(ids[alias]), alias)
+            self.assertTrue(Cliente.objects.using(alias).filter(pk=ids[alias]).exists())
+            self.assertFalse(Cliente.objects.using(otro).filter(pk=ids[alias]).exists())
+
+        url = reverse('clientes-detail', args=[ids['shard_1']])
+        self.assertEqual(self.client.get(url).data['nombre'], 'crud')
+        self.assertEqual(self.client.patch(url, {'nombre': 'Renombrado'}, format='json').status_code, status.HTTP_200_OK)
+        self.assertEqual(Cliente.objects.using('shard_1').get(pk=ids['shard_1']).nombre, 'Renombrado')
+
+        proyecto = self._crear_proyecto(ids['shard_1'], 'Remoto', '2030-01-01')
+        self.assertEqual(shard_de_id(proyecto), 'shard_1')
+        self.assertTrue(Proyecto.todos.using('shard_1').filter(pk=proyecto, cliente_id=ids['shard_1']).exists())
+        resp = self.client.post(reverse('tareas-list'), {
+            'titulo': 'T', 'descripcion': 'D', 'progreso': 40, 'proyecto': proyecto,
+        }, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Proyecto.todos.using('shard_1').get(pk=proyecto).progreso, 40)
+
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_200_OK)
+        self.assertFalse(Cliente.objects.using('shard_1').get(pk=ids['shard_1']).activo)
+
+    def test_listas_repartidas_y_fusionadas(self):
+        """Las listas sin shard se consultan en ambas bases y se fusionan por el orden del modelo."""
+        clientes = [self._crear_cliente(alias, f'orden{i}') for i, alias in enumerate(['shard_1', 'default'] * 2)]
+        fechas = ['2030-01-04', '2030-01-01', '2030-01-03', '2030-01-02']
+        for cliente, fecha in zip(clientes, fechas):
+            self._crear_proyecto(cliente, f'P{fecha}', fecha)
+
+        resp = self.client.get(reverse('clientes-list'))
+        self.assertEqual([c['id'] for c in resp.data], clientes[::-1])
+        proyectos = repartir(Proyecto.objects.order_by('fecha_inicio'))
+        self.assertEqual([str(p.fecha_inicio) for p in proyectos], sorted(fechas))
+        self.assertEqual({p._state.db for p in proyectos}, {'default', 'shard_1'})
+
+    def test_acciones_agregadas_y_comandos_por_shard(self):
+        """Las acciones paginadas piden el shard y los comandos recorren todos."""
+        clientes = {alias: self._crear_cliente(alias, 'agregado') for alias in ('default', 'shard_1')}
+        proyectos = [self._crear_proyecto(cliente, 'P', '2030-01-01') for cliente in clientes.values()]
+
+        resp = self.client.get(reverse('proyectos-resumen'))
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        resp = self.client.get(reverse('proyectos-resumen'), {'cliente': clientes['shard_1']})
+        self.assertEqual([p['id'] for p in resp.data['results']], [proyectos[1]])
+        resp = self.client.get(reverse('proyectos-en-riesgo'))
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+        call_command('snapshot_progress', fecha='2030-01-10', stdout=StringIO())
+        for alias, proyecto in zip(('default', 'shard_1'), proyectos):
+            self.assertTrue(ProgresoDiario.objects.using(alias).filter(proyecto_id=proyecto).exists())
+        resp = self.client.get(reverse('proyectos-historial'), {
+            'proyectos': ','.join(map(str, proyectos)), 'desde': '2030-01-01', 'hasta': '2030-01-31',
+        })
+        self.assertEqual([serie['proyecto'] for serie in resp.data['proyectos']], proyectos)
+
+        salida = StringIO()
+        call_command('reconcile_counters', stdout=salida)
+        self.assertIn('2 clientes', salida.getvalue())
+
+    def test_lote_atomico_en_un_shard(self):
+        """El lote corre en la transacción de su shard y rechaza operaciones de otro."""
+        clientes = {alias: self._crear_cliente(alias, 'lote') for alias in ('default', 'shard_1')}
+        proyecto = {'nombre': 'Lote', 'descripcion': 'D', 'fecha_inicio': '2030-01-01', 'fecha_entrega': '2030-12-31'}
+        url = reverse('batch')
+
+        resp = self.client.post(url, {'operaciones': [
+            {'metodo': 'POST', 'url': '/api/proyectos/', 'datos': {**proyecto, 'cliente': clientes['shard_1']}},
+            {'metodo': 'POST', 'url': '/api/proyectos/', 'datos': {**proyecto, 'cliente': clientes['default']}},
+        ]}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.assertNotIn('fallida', resp.data)
+        self.assertFalse(Proyecto.todos.exists())
+
+        # Una referencia que al resolverse apunta a otro shard se rechaza y revierte el lote
+        Cliente.objects.using('shard_1').filter(pk=clientes['shard_1']).update(empresa=str(clientes['default']))
+        resp = self.client.post(url, {'operaciones': [
+            {'ref': 'c', 'metodo': 'GET', 'url': f"/api/clientes/{clientes['shard_1']}/"},
+            {'ref': 'p', 'metodo': 'POST', 'url': '/api/proyectos/', 'datos': {**proyecto, 'cliente': '${c.id}'}},
+            {'metodo': 'POST', 'url': '/api/tareas/', 'datos': {'titulo': 'T', 'descripcion': 'D', 'proyecto': '${p.id}'}},
+            {'metodo': 'PATCH', 'url': '/api/clientes/${c.empresa}/', 'datos': {'nombre': 'Otro'}},
+        ]}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(resp.data['fallida'], 3)
+        self.assertIn("'default'", resp.data['resultados'][3]['datos']['detail'])
+        self.assertFalse(Proyecto.todos.using('shard_1').exists())
+        self.assertFalse(Tarea.objects.using('shard_1').exists())
+        self.assertEqual(Cliente.objects.using('default').get(pk=clientes['default']).nombre, 'lote')
+
+    def test_importacion_en_el_shard_de_cada_cliente(self):
+        """Las filas del CSV se insertan en el shard de su cliente y el progreso se recalcula allí."""
+        clientes = {alias: self._crear_cliente(alias, 'plan') for alias in ('default', 'shard_1')}
+        emails = {alias: Cliente.objects.using(alias).get(pk=pk).email for alias, pk in clientes.items()}
+        csv_plan = 'cliente_email,proyecto,fecha_inicio,fecha_entrega,tarea,estado,progreso\n' + ''.join(
+            f'{emails[alias]},Plan {alias},2030-01-01,2030-06-30,T,En Progreso,60\n' for alias in clientes
+        )
+        archivo = SimpleUploadedFile('plan.csv', csv_plan.encode('utf-8'), content_type='text/csv')
+        resp = self.client.post(reverse('importar-plan'), {'archivo': archivo}, format='multipart')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(resp.data['importacion']['proyectos_creados'], 2)
+        for alias, pk in clientes.items():
+            proyecto = Proyecto.todos.using(alias).get(cliente_id=pk)
+            self.assertEqual((proyecto.nombre, proyecto.progreso), (f'Plan {alias}', 60))
+            self.assertEqual(shard_de_id(proyecto.pk), alias)
@@ -0,0 +1,140 @@
+import time
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from .models import Cliente, Proyecto, Tarea, SubTarea
+
+
+class QueryBudgetTests(APITestCase):
+    """
+    Presupuesto de consultas SQL y de tiempo por ruta de core/urls.py, con
+    cientos de filas por modelo. Los límites no dependen del volumen de datos:
+    si un cambio introduce consultas por fila, estos tests fallan.
+    """
+    databases = '__all__'
+    CLIENTES = 100
+    PROYECTOS = 300
+    TAREAS = 600
+    SUBTAREAS = 900
+    TIEMPO_MAXIMO = 3.0
+
+    @classmethod
+    def setUpTestData(cls):
+        """Sembrar datos con bulk_create para no disparar recálculos de progreso."""
+        cls.admin = User.objects.create_user('budget_admin', password='adminpass')
+        cls.admin.profile.role = 'ADMIN'
+        cls.admin.profile.save()
+        cls.cliente_user = User.objects.create_user('budget_client', password='clientpass')
+
+        Cliente.objects.bulk_create(
+            Cliente(nombre=f'Cliente {i}', email=f'c{i}@example.com', empresa=f'Empresa {i % 10}')
+            for i in range(cls.CLIENTES)
+        )
+        clientes = list(Cliente.objects.values_list('pk', flat=True))
+        Proyecto.objects.bulk_create(
+            Proyecto(
+                nombre=f'Proyecto {i}',
+                descripcion='Seed',
+                cliente_id=clientes[i % len(clientes)],
+                fecha_inicio='2025-01-01',
+                fecha_entrega='2025-12-31',
+            )
+            for i in range(cls.PROYECTOS)
+        )
+        proyectos = list(Proyecto.objects.values_list('pk', flat=True))
+        Tarea.objects.bulk_create(
+            Tarea(
+                titulo=f'Tarea {i}',
+                descripcion='Seed',
+                progreso=i % 101,
+                proyecto_id=proyectos[i % len(proyectos)],
+            )
+            for i in range(cls.TAREAS)
+        )
+        tareas = list(Tarea.objects.values_list('pk', flat=True))
+        SubTarea.objects.bulk_create(
+            SubTarea(titulo=f'SubTarea {i}', completada=bool(i % 2), tarea_id=tareas[i % len(tareas)])
+            for i in range(cls.SUBTAREAS)
+        )
+
+        cls.cliente = Cliente.objects.first()
+        cls.proyecto = Proyecto.objects.first()
+        cls.tarea = Tarea.objects.first()
+        cls.subtarea = SubTarea.objects.first()
+
+    def rutas(self):
+        """(nombre, método, url, datos, presupuesto ADMIN, presupuesto CLIENT)."""
+        proyecto = {
+            'nombre': 'Nuevo', 'descripcion': 'D', 'cliente': self.cliente.id,
+            'fecha_inicio': '2025-01-01', 'fecha_entrega': '2025-06-30',
+        }
+        tarea = {'titulo': 'Nueva', 'descripcion': 'D', 'proyecto': self.proyecto.id, 'progreso': 10}
+        subtarea = {'titulo': 'Nueva', 'tarea': self.tarea.id}
+        return [
+            ('register', 'post', reverse('register'),
+             {'username': 'nuevo', 'password': 'strongpass123', 'email': 'n@example.com'}, 6, 6),
+            ('clientes-list', 'get', reverse('clientes-list'), None, 5, 1),
+            ('clientes-detail', 'get', reverse('clientes-detail', args=[self.cliente.id]), None, 5, 1),
+            ('clientes-create', 'post', reverse('clientes-list'),
+             {'nombre': 'N', 'email': 'nuevo@example.com', 'empresa': 'E'}, 4, 4),
+            ('clientes-update', 'patch', reverse('clientes-detail', args=[self.cliente.id]),
+             {'nombre': 'Renombrado'}, 10, 1),
+            ('proyectos-list', 'get', reverse('proyectos-list'), None, 4, 1),
+            ('proyectos-detail', 'get', reverse('proyectos-detail', args=[self.proyecto.id]), None, 4, 1),
+            ('proyectos-resumen', 'get', reverse('proyectos-resumen'), None, 3, 2),
+            ('proyectos-en-riesgo', 'get', reverse('proyectos-en-riesgo'), None, 3, 2),
+            ('proyectos-historial', 'get', reverse('proyectos-historial') + f'?proyectos={self.proyecto.id}',
+             None, 3, 2),
+            ('proyectos-create', 'post', reverse('proyectos-list'), proyecto, 6, 6),
+            ('proyectos-update', 'patch', reverse('proyectos-detail', args=[self.proyecto.id]),
+             {'nombre': 'Renombrado'}, 8, 1),
+            ('tareas-list', 'get', reverse('tareas-list'), None, 3, 1),
+            ('tareas-detail', 'get', reverse('tareas-detail', args=[self.tarea.id]), None, 3, 1),
+            ('tareas-create', 'post', reverse('tareas-list'), tarea, 12, 12),
+            ('tareas-update', 'patch', reverse('tareas-detail', args=[self.tarea.id]),
+             {'progreso': 55}, 14, 1),
+            # La lectura con bloqueo va dentro de la transacción (SAVEPOINT/RELEASE en el test)
+            ('tareas-bulk', 'patch', reverse('tareas-bulk'),
+             [{'id': self.tarea.id, 'estado': 'Completada', 'progreso': 100}], 8, 3),
+            ('subtareas-list', 'get', reverse('subtareas-list'), None, 2, 1),
+            ('subtareas-detail', 'get', reverse('subtareas-detail', args=[self.subtarea.id]), None, 2, 1),
+            ('subtareas-create', 'post', reverse('subtareas-list'), subtarea, 3, 3),
+            ('subtareas-update', 'patch', reverse('subtareas-detail', args=[self.subtarea.id]),
+             {'completada': True}, 3, 1),
+            ('archivo-proyectos-list', 'get', reverse('archivo-proyectos-list'), None, 2, 1),
+        ]
+
+    def _medir(self, user, metodo, url, datos):
+        """Ejecuta la petición con un usuario recién leído (sin caché de profile)."""
+        self.client.force_authenticate(user=User.objects.get(pk=user.pk))
+        with CaptureQueriesContext(connection) as ctx:
+            inicio = time.perf_counter()
+            resp = getattr(self.client, metodo)(url, datos, format='json')
+            duracion = time.perf_counter() - inicio
+        return resp, ctx.captured_queries, duracion
+
+    def _verificar(self, user, indice):
+        for ruta in self.rutas():
+            nombre, metodo, url, datos, presupuesto = ruta[:4] + (ruta[indice],)
+            with self.subTest(ruta=nombre):
+                resp, consultas, duracion = self._medir(user, metodo, url, datos)
+                self.assertLess(resp.status_code, 500, nombre)
+                self.assertLessEqual(
+                    len(consultas),
+                    presupuesto,
+                    f"{nombre}: {len(consultas)} consultas (máximo {presupuesto}):\n"
+                    + "\n".join(q['sql'] for q in consultas),
+                )
+                self.assertLess(duracion, self.TIEMPO_MAXIMO, f"{nombre}: {duracion:.2f}s")
+
+    def test_presupuesto_admin(self):
+        """ADMIN: todas las rutas dentro del presupuesto de consultas y tiempo."""
+        self._verificar(self.admin, 4)
+
+    def test_presupuesto_client(self):
+        """CLIENT: todas las rutas dentro del presupuesto de consultas y tiempo."""
+        self._verificar(self.cliente_user, 5)
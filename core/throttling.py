@@ -0,0 +1,64 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+# Serializa el ciclo leer-recargar-consumir de cada bucket dentro del proceso
+_lock = threading.Lock()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Limitación por token bucket, por usuario (o IP si es anónimo) y rol.
+    Los buckets viven en la caché local 'throttle' (sin servicios externos),
+    por lo que comprobarlos cuesta microsegundos. Esa caché es de cada proceso: con
+    settings.THROTTLE_PROCESOS procesos web cada uno aplica su parte de la capacidad
+    y de la recarga, y entre todos suman la configurada.
+
+    Cada vista puede declarar `throttle_scope` y, por acción,
+    `throttle_scopes = {'list': 'heavy'}`; cada alcance tiene su propio bucket
+    configurado en settings.TOKEN_BUCKETS[alcance][rol] = (capacidad, recarga/s).
+    """
+    cache_alias = 'throttle'
+
+    def __init__(self):
+        self.wait_time = None
+
+    def get_scope(self, view):
+        scopes = getattr(view, 'throttle_scopes', {})
+        return scopes.get(getattr(view, 'action', None), getattr(view, 'throttle_scope', 'default'))
+
+    def get_role(self, request):
+        user = request.user
+        if not (user and user.is_authenticated):
+            return 'ANON'
+        profile = getattr(user, 'profile', None)
+        return profile.role if profile else 'CLIENT'
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(view)
+        role = self.get_role(request)
+        capacidad, recarga = settings.TOKEN_BUCKETS[scope][role]
+        procesos = settings.THROTTLE_PROCESOS
+        capacidad, recarga = max(1, capacidad / procesos), recarga / procesos
+        ident = request.user.pk if role != 'ANON' else self.get_ident(request)
+        key = f'token-bucket:{scope}:{role}:{ident}'
+
+        cache = caches[self.cache_alias]
+        ahora = time.time()
+        with _lock:
+            tokens, ultimo = cache.get(key, (capacidad, ahora))
+            tokens = min(capacidad, tokens + (ahora - ultimo) * recarga)
+            permitido = tokens >= 1
+            if permitido:
+                tokens -= 1
+            else:
+                self.wait_time = (1 - tokens) / recarga
+            # El bucket lleno equivale a no tener entrada: basta con expirarla al recargarse
+            cache.set(key, (tokens, ahora), timeout=int(capacidad / recarga) + 1)
+        return permitido
+
+    def wait(self):
+        return self.wait_time
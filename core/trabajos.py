@@ -0,0 +1,215 @@
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import historial, shards
+from .archivo import archivar
+from .auditoria import capturar
+from .importacion import PlanImporter
+from .models import Proyecto, ImportacionPlan, Trabajo
+from .riesgo import guardar_snapshot
+
+# Tipo de trabajo -> función que recibe los parámetros y devuelve un resultado serializable a JSON
+HANDLERS = {}
+# Tipos que se pueden encolar directamente desde la API
+TIPOS_PUBLICOS = set()
+
+
+def registrar(tipo, publico=True):
+    """Decorador que registra la función que ejecuta un tipo de trabajo."""
+    def decorador(funcion):
+        HANDLERS[tipo] = funcion
+        if publico:
+            TIPOS_PUBLICOS.add(tipo)
+        return funcion
+    return decorador
+
+
+def encolar(tipo, parametros=None, usuario=None, max_intentos=3):
+    """Crea un trabajo pendiente y lo devuelve sin esperar a que se ejecute."""
+    if tipo not in HANDLERS:
+        raise ValueError(f"Tipo de trabajo desconocido: {tipo}")
+    return Trabajo.objects.create(
+        tipo=tipo,
+        parametros=parametros or {},
+        usuario=usuario,
+        max_intentos=max_intentos,
+    )
+
+
+def reclamar():
+    """
+    Toma el siguiente trabajo disponible y lo marca 'En Curso'.
+    Con SELECT ... FOR UPDATE SKIP LOCKED varios workers reclaman en paralelo sin
+    esperarse; en motores sin soporte se usa un UPDATE condicional sobre el estado.
+    """
+    ahora = timezone.now()
+    disponibles = (
+        Trabajo.objects.filter(estado='Pendiente', disponible_desde__lte=ahora)
+        .order_by('disponible_desde', 'pk')
+    )
+    cambios = {'estado': 'En Curso', 'fecha_inicio': ahora, 'latido': ahora}
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            trabajo = disponibles.select_for_update(skip_locked=True).first()
+            if trabajo is None:
+                return None
+            trabajo.intentos += 1
+            for campo, valor in cambios.items():
+                setattr(trabajo, campo, valor)
+            trabajo.save(update_fields=['estado', 'fecha_inicio', 'latido', 'intentos'])
+            return trabajo
+
+    for pk in disponibles.values_list('pk', flat=True)[:10]:
+        if Trabajo.objects.filter(pk=pk, estado='Pendiente').update(intentos=F('intentos') + 1, **cambios):
+            return Trabajo.objects.get(pk=pk)
+    return None
+
+
+@contextmanager
+def latiendo(trabajo, intervalo=None):
+    """
+    Renueva trabajo.latido cada `intervalo` segundos (TRABAJOS_LATIDO) desde un hilo
+    con su propia conexión mientras dura el bloque: así liberar_bloqueados distingue
+    un trabajo largo que sigue en marcha de uno cuyo worker murió.
+    """
+    intervalo = settings.TRABAJOS_LATIDO if intervalo is None else intervalo
+    parar = threading.Event()
+
+    def latir():
+        try:
+            while not parar.wait(intervalo):
+                Trabajo.objects.filter(pk=trabajo.pk, estado='En Curso').update(latido=timezone.now())
+        finally:
+            connection.close()
+
+    hilo = threading.Thread(target=latir, name=f'latido-trabajo-{trabajo.pk}', daemon=True)
+    hilo.start()
+    try:
+        yield
+    finally:
+        parar.set()
+        hilo.join()
+
+
+def ejecutar(trabajo):
+    """Ejecuta un trabajo reclamado; si falla se reintenta con backoff exponencial."""
+    try:
+        with latiendo(trabajo), capturar(trabajo.usuario_id):
+            resultado = HANDLERS[trabajo.tipo](**trabajo.parametros)
+    except Exception:
+        trabajo.error = traceback.format_exc()
+        if trabajo.intentos < trabajo.max_intentos:
+            trabajo.estado = 'Pendiente'
+            espera = settings.TRABAJOS_BACKOFF_BASE * 2 ** (trabajo.intentos - 1)
+            trabajo.disponible_desde = timezone.now() + timedelta(seconds=espera)
+        else:
+            trabajo.estado = 'Fallido'
+            trabajo.fecha_fin = timezone.now()
+    else:
+        trabajo.estado = 'Completado'
+        trabajo.resultado = resultado
+        trabajo.error = ''
+        trabajo.fecha_fin = timezone.now()
+    trabajo.save(update_fields=['estado', 'resultado', 'error', 'disponible_desde', 'fecha_fin'])
+    return trabajo
+
+
+def liberar_bloqueados(timeout):
+    """
+    Devuelve a la cola los trabajos 'En Curso' de workers que murieron a mitad: los que
+    llevan `timeout` segundos sin latido (ver latiendo), por largos que sean los que
+    siguen latiendo. El intento abandonado ya se contó al reclamarlo: si con él se
+    agotaron los intentos, el trabajo queda Fallido en lugar de volver a la cola.
+    """
+    ahora = timezone.now()
+    limite = ahora - timedelta(seconds=timeout)
+    bloqueados = Trabajo.objects.filter(
+        Q(latido__lt=limite) | Q(latido__isnull=True, fecha_inicio__lt=limite),
+        estado='En Curso',
+    )
+    bloqueados.filter(intentos__gte=F('max_intentos')).update(
+        estado='Fallido',
+        error=f"El worker dejó de dar señales de vida durante {timeout} segundos.",
+        fecha_fin=ahora,
+    )
+    return bloqueados.update(estado='Pendiente', disponible_desde=ahora)
+
+
+def bucle_worker(burst=False, espera=1.0, revisar_cada=60.0):
+    """
+    Bucle de un proceso worker; con burst termina cuando la cola queda vacía. Cada
+    revisar_cada segundos devuelve a la cola los trabajos bloqueados (liberar_bloqueados).
+    """
+    procesados = 0
+    proxima_revision = time.monotonic()
+    while True:
+        if time.monotonic() >= proxima_revision:
+            liberar_bloqueados(settings.TRABAJOS_TIMEOUT)
+            proxima_revision = time.monotonic() + revisar_cada
+        trabajo = reclamar()
+        if trabajo is None:
+            if burst:
+                return procesados
+            time.sleep(espera)
+            continue
+        ejecutar(trabajo)
+        procesados += 1
+
+
+@registrar('archivar_proyectos')
+def _archivar_proyectos(chunk_size=100):
+    return archivar(chunk_size=chunk_size)
+
+
+@registrar('recalcular_progreso')
+def _recalcular_progreso(proyecto_ids=None, chunk_size=1000):
+    def recalcular_shard():
+        proyectos = Proyecto.objects.order_by('pk')
+        if proyecto_ids:
+            proyectos = proyectos.filter(pk__in=proyecto_ids)
+        ids = list(proyectos.values_list('pk', flat=True))
+        for i in range(0, len(ids), chunk_size):
+            Proyecto.actualizar_progreso_en_lote(ids[i:i + chunk_size])
+        return len(ids)
+
+    return {'proyectos': sum(shards.en_cada_shard(recalcular_shard))}
+
+
+@registrar('reporte_riesgo')
+def _reporte_riesgo(fecha=None, horizonte_dias=None, margen=None):
+    fecha = date.fromisoformat(fecha) if fecha else timezone.localdate()
+    return {'fecha': fecha.isoformat(), 'proyectos': guardar_snapshot(fecha, horizonte_dias, margen)}
+
+
+@registrar('historial_progreso')
+def _historial_progreso(fecha=None, dias_diarios=None):
+    fecha = date.fromisoformat(fecha) if fecha else timezone.localdate()
+    return {
+        'fecha': fecha.isoformat(),
+        'proyectos': historial.guardar_snapshot(fecha),
+        'compactadas': historial.compactar(fecha, dias_diarios),
+    }
+
+
+# Lo encola POST /api/importaciones/?async=1 con un archivo ya guardado en disco
+@registrar('importar_plan', publico=False)
+def _importar_plan(ruta, importacion_id, max_errores=1000):
+    errores = []
+
+    def reportar_error(fila, mensajes):
+        if len(errores) < max_errores:
+            errores.append({'fila': fila, 'errores': mensajes})
+
+    importacion = ImportacionPlan.objects.get(pk=importacion_id)
+    with open(ruta, newline='', encoding='utf-8-sig') as lineas:
+        PlanImporter(importacion, reportar_error=reportar_error).ejecutar(lineas)
+    return {'importacion': importacion.pk, 'filas_con_error': importacion.filas_con_error, 'errores': errores}
@@ -1,12 +1,21 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from .views import (
+    LoginView,
+    RefreshView,
     RegisterView,
+    RegisterAsyncView,
+    LoginAsyncView,
+    BatchView,
+    LogoutView,
     ClienteViewSet,
     ProyectoViewSet,
     TareaViewSet,
-    SubTareaViewSet
+    SubTareaViewSet,
+    ProyectoArchivadoViewSet,
+    ImportacionPlanView,
+    TrabajoViewSet,
+    AuditoriaViewSet
 )
 
 router = DefaultRouter()
@@ -14,10 +23,18 @@ router.register(r'clientes', ClienteViewSet, basename='clientes')
 router.register(r'proyectos', ProyectoViewSet, basename='proyectos')
 router.register(r'tareas', TareaViewSet, basename='tareas')
 router.register(r'subtareas', SubTareaViewSet, basename='subtareas')
+router.register(r'archivo/proyectos', ProyectoArchivadoViewSet, basename='archivo-proyectos')
+router.register(r'trabajos', TrabajoViewSet, basename='trabajos')
+router.register(r'auditoria', AuditoriaViewSet, basename='auditoria')
 
 urlpatterns = [
     path('auth/register/', RegisterView.as_view(), name='register'),
-    path('auth/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('auth/register/async/', RegisterAsyncView.as_view(), name='register_async'),
+    path('auth/token/', LoginView.as_view(), name='token_obtain_pair'),
+    path('auth/token/async/', LoginAsyncView.as_view(), name='token_obtain_pair_async'),
+    path('auth/token/refresh/', RefreshView.as_view(), name='token_refresh'),
+    path('auth/logout/', LogoutView.as_view(), name='logout'),
+    path('batch/', BatchView.as_view(), name='batch'),
+    path('importaciones/', ImportacionPlanView.as_view(), name='importar-plan'),
     path('', include(router.urls)),
 ]
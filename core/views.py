@@ -1,22 +1,79 @@
-from rest_framework import viewsets, permissions, status
+import io
+import json
+import os
+from contextlib import ExitStack
+from datetime import date, timedelta
+from itertools import groupby
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import identify_hasher
+from django.contrib.auth.models import User, update_last_login
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Value, When
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.utils.module_loading import import_string
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import mixins, viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.parsers import MultiPartParser
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
-from .models import Cliente, Proyecto, Tarea, SubTarea
+from . import auditoria, credenciales, shards
+from .batch import ErrorDeOperacion, ejecutar_operacion, shard_del_lote
+from .revocacion import revocar
+from .importacion import ErrorDeFormato, PlanImporter
+from .models import (
+    Cliente, Proyecto, Tarea, SubTarea, ProyectoArchivado, ImportacionPlan, Trabajo, ReporteRiesgo,
+    RegistroAuditoria, ConflictoDeVersion, ProgresoDiario,
+)
+from .riesgo import proyectos_en_riesgo
 from .serializers import (
     RegisterSerializer,
     ClienteSerializer,
     ProyectoSerializer,
     TareaSerializer,
-    SubTareaSerializer
+    SubTareaSerializer,
+    TareaBulkUpdateSerializer,
+    ProyectoResumenSerializer,
+    ProyectoRiesgoSerializer,
+    ProgresoDiarioSerializer,
+    ProyectoArchivadoSerializer,
+    ImportacionPlanSerializer,
+    TrabajoSerializer,
+    RegistroAuditoriaSerializer,
+    BatchSerializer,
+    LogoutSerializer
 )
-from .permissions import IsOwnerOrAdmin
+from .permissions import IsOwnerOrAdmin, IsAdminRole
+from .throttling import TokenBucketThrottle
+from .trabajos import encolar
+
+
+class LoginView(TokenObtainPairView):
+    """Obtención del par de tokens JWT, con el bucket 'auth' en lugar del general."""
+    throttle_scope = 'auth'
+
+
+class RefreshView(TokenRefreshView):
+    """Refresh de tokens JWT, con el bucket 'auth'."""
+    throttle_scope = 'auth'
 
 
 class RegisterView(APIView):
     """Vista para registrar nuevos usuarios."""
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'auth'
 
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
@@ -28,13 +85,322 @@ class RegisterView(APIView):
         )
 
 
-class ClienteViewSet(viewsets.ModelViewSet):
+class LogoutView(APIView):
+    """
+    Cierra la sesión revocando el refresh token enviado y el access token de la
+    petición; la revocación llega a todos los workers (ver core/revocacion.py).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = LogoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        refresh = serializer.validated_data['refresh']
+        if str(refresh.get(api_settings.USER_ID_CLAIM)) != str(request.user.pk):
+            return Response(
+                {"detail": "El refresh token no pertenece al usuario autenticado."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        revocar(refresh, request.user.pk)
+        if request.auth is not None:
+            revocar(request.auth, request.user.pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class CredencialesAsyncView(View):
+    """
+    Base de las vistas async de autenticación (despliegue ASGI): el hashing de la
+    contraseña corre en el pool de procesos de core.credenciales y el hilo de la
+    petición queda libre. Aplica el mismo token bucket que las vistas DRF y responde
+    429 si el bucket está agotado o la cola del pool está llena. Cada subclase indica
+    sus `campos` obligatorios y define `async def procesar(self, request, datos)`.
+    """
+    throttle_scope = 'auth'
+    campos = ()
+
+    async def post(self, request):
+        try:
+            datos = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({"detail": "El cuerpo debe ser JSON."}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(datos, dict):
+            return JsonResponse({"detail": "El cuerpo debe ser un objeto JSON."}, status=status.HTTP_400_BAD_REQUEST)
+        faltantes = {
+            campo: ["Este campo es requerido."]
+            for campo in self.campos if not isinstance(datos.get(campo), str) or not datos[campo]
+        }
+        if faltantes:
+            return JsonResponse(faltantes, status=status.HTTP_400_BAD_REQUEST)
+
+        throttle = TokenBucketThrottle()
+        if not await sync_to_async(throttle.allow_request)(request, self):
+            return self._demasiadas(throttle.wait(), "Límite de peticiones excedido.")
+        try:
+            return await self.procesar(request, datos)
+        except credenciales.ColaSaturada:
+            return self._demasiadas(1, "Demasiadas operaciones de autenticación en curso; reintenta en unos segundos.")
+
+    def _demasiadas(self, espera, detalle):
+        response = JsonResponse({"detail": detalle}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        response['Retry-After'] = str(max(1, round(espera or 1)))
+        return response
+
+
+class LoginAsyncView(CredencialesAsyncView):
+    """
+    Equivalente async de POST /api/auth/token/ (usuario y contraseña del ModelBackend):
+    devuelve el mismo par de tokens con los claims del serializador configurado.
+    """
+    campos = ('username', 'password')
+
+    async def procesar(self, request, datos):
+        user = await User.objects.filter(username=datos['username']).afirst()
+        if user is None:
+            # Mismo coste que un usuario existente, como hace ModelBackend
+            await credenciales.hashear(datos['password'])
+            valido = False
+        else:
+            valido = await credenciales.verificar(datos['password'], user.password) and user.is_active
+        if not valido:
+            return JsonResponse(
+                {"detail": "No active account found with the given credentials"},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        if identify_hasher(user.password).must_update(user.password):
+            user.password = await credenciales.hashear(datos['password'])
+            await user.asave(update_fields=['password'])
+        if api_settings.UPDATE_LAST_LOGIN:
+            await sync_to_async(update_last_login)(None, user)
+        request.user = user
+
+        refresh = import_string(api_settings.TOKEN_OBTAIN_SERIALIZER).get_token(user)
+        return JsonResponse({"refresh": str(refresh), "access": str(refresh.access_token)})
+
+
+class RegisterAsyncView(CredencialesAsyncView):
+    """Equivalente async de POST /api/auth/register/."""
+    campos = ('username', 'password')
+
+    async def procesar(self, request, datos):
+        serializer = RegisterSerializer(data=datos)
+        if not await sync_to_async(serializer.is_valid)():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        password_hash = await credenciales.hashear(serializer.validated_data['password'])
+        await sync_to_async(serializer.save)(password_hash=password_hash)
+        return JsonResponse({"message": "Usuario creado exitosamente"}, status=status.HTTP_201_CREATED)
+
+
+class BatchView(APIView):
+    """
+    Ejecuta varias operaciones de la API en una sola petición y una sola transacción.
+    Cada operación puede usar ${ref.campo} para tomar datos de un resultado anterior
+    (p. ej. "/api/tareas/?proyecto=${p.id}"). La autenticación y el rol se resuelven
+    una vez para todo el lote. Si una operación falla, se revierte el lote completo.
+    Con varios shards, todas las operaciones deben dirigirse al mismo: el lote corre
+    en la transacción de ese shard (y en la de default, para usuarios y trabajos).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        operaciones = serializer.validated_data['operaciones']
+        try:
+            alias = shard_del_lote(operaciones) or shards.actual()
+        except ErrorDeOperacion as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        resultados = {}
+        respuestas = []
+        bases = dict.fromkeys(['default', alias])
+        with shards.en_shard(alias), ExitStack() as transacciones:
+            for base in bases:
+                transacciones.enter_context(transaction.atomic(using=base))
+            for indice, operacion in enumerate(operaciones):
+                try:
+                    codigo, datos = ejecutar_operacion(
+                        request, operacion, resultados, excluir=(BatchView,), shard=alias
+                    )
+                except ErrorDeOperacion as exc:
+                    codigo, datos = status.HTTP_400_BAD_REQUEST, {"detail": str(exc)}
+                respuestas.append({"ref": operacion.get('ref'), "status": codigo, "datos": datos})
+
+                if codigo >= 400:
+                    for base in bases:
+                        transaction.set_rollback(True, using=base)
+                    return Response(
+                        {"detail": "El lote se revirtió.", "fallida": indice, "resultados": respuestas},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                if 'ref' in operacion:
+                    resultados[operacion['ref']] = datos
+
+        return Response({"resultados": respuestas}, status=status.HTTP_200_OK)
+
+
+class NestedPrefetchMixin:
+    """
+    Evita consultas N+1 en los serializadores anidados: el queryset trae el árbol
+    con prefetch_related y, tras actualizar, la instancia se relee con los mismos
+    prefetch (DRF descarta la caché de prefetch de la instancia guardada).
+    """
+    prefetch = ()
+
+    def perform_update(self, serializer):
+        serializer.save()
+        self.recargar_instancia(serializer)
+
+    def recargar_instancia(self, serializer):
+        """Sustituye la instancia del serializador por una copia con el árbol precargado."""
+        instance = serializer.instance
+        serializer.instance = (
+            type(instance)._default_manager
+            .prefetch_related(*self.prefetch)
+            .get(pk=instance.pk)
+        )
+
+
+class StreamingListMixin:
+    """
+    Modo de lista en streaming (`?stream=1`) para listas sin paginar: recorre el
+    queryset por lotes de STREAM_CHUNK_SIZE filas con paginación por clave (pk
+    descendente), serializa cada lote y escribe el array JSON de forma incremental.
+    La memoria queda acotada por el tamaño del lote en cualquier motor, incluido
+    MySQL, cuyo driver carga en memoria el resultado completo de un iterator().
+    """
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('stream') not in ('1', 'true'):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(self._array_json(queryset), content_type='application/json')
+        response['X-Stream-Chunk-Size'] = str(settings.STREAM_CHUNK_SIZE)
+        return response
+
+    def _lotes(self, queryset):
+        queryset = queryset.order_by('-pk')
+        tamano = settings.STREAM_CHUNK_SIZE
+        ultimo = None
+        while True:
+            pagina = queryset if ultimo is None else queryset.filter(pk__lt=ultimo)
+            lote = list(pagina[:tamano])
+            if lote:
+                yield lote
+            if len(lote) < tamano:
+                return
+            ultimo = lote[-1].pk
+
+    def _array_json(self, queryset):
+        yield b'['
+        separador = b''
+        for lote in self._lotes(queryset):
+            datos = self.get_serializer(lote, many=True).data
+            # Los elementos del lote sin los corchetes del array
+            yield separador + json.dumps(
+                datos, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')
+            ).encode()[1:-1]
+            separador = b','
+        yield b']'
+
+
+class PrecondicionFallida(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "El recurso cambió desde que se leyó; vuelve a obtenerlo e intenta de nuevo."
+    default_code = 'precondition_failed'
+
+
+class VersionadoMixin:
+    """
+    Concurrencia optimista para modelos con `version`: las respuestas con el objeto
+    llevan `ETag: "<version>"` y PUT/PATCH/DELETE aceptan `If-Match`. Si la versión
+    no coincide, o si otra escritura gana la carrera durante el UPDATE condicional,
+    se responde 412 en lugar de sobrescribir los cambios ajenos.
+    """
+
+    def get_object(self):
+        obj = super().get_object()
+        if_match = self.request.headers.get('If-Match')
+        if self.request.method in ('PUT', 'PATCH', 'DELETE') and if_match:
+            etags = {etag.strip().removeprefix('W/') for etag in if_match.split(',')}
+            if '*' not in etags and f'"{obj.version}"' not in etags:
+                raise PrecondicionFallida()
+        return obj
+
+    def update(self, request, *args, **kwargs):
+        try:
+            return super().update(request, *args, **kwargs)
+        except ConflictoDeVersion:
+            raise PrecondicionFallida()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        datos = getattr(response, 'data', None)
+        acciones = ('retrieve', 'create', 'update', 'partial_update')
+        if self.action in acciones and isinstance(datos, dict) and 'version' in datos:
+            response['ETag'] = f'"{datos["version"]}"'
+        return response
+
+
+class ShardMixin:
+    """
+    Sharding por cliente (DB_SHARDS > 1): la petición se dirige al shard que indican
+    el pk, los filtros cliente/proyecto/tarea o el cuerpo; si no lo indican, hereda el
+    del bloque en curso (una operación de un lote). Las listas sin shard se consultan
+    en todos los shards en paralelo y se fusionan por el orden del modelo.
+    """
+    shard = None
+    _token_shard = None
+
+    def initial(self, request, *args, **kwargs):
+        if len(settings.SHARDS) > 1:
+            self.shard = shards.shard_de_datos(kwargs, request.query_params, request.data) or shards.en_curso()
+            if self.shard:
+                self._token_shard = shards.activar(self.shard)
+        super().initial(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self._token_shard is not None:
+            shards.restaurar(self._token_shard)
+            self._token_shard = None
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if self.shard or len(settings.SHARDS) == 1 or request.query_params.get('stream') in ('1', 'true'):
+            return super().list(request, *args, **kwargs)
+        if self.paginator is not None:
+            return self._requiere_shard()
+        instancias = shards.repartir(self.filter_queryset(self.get_queryset()))
+        return Response(self.get_serializer(instancias, many=True).data)
+
+    def _sin_shard(self):
+        return len(settings.SHARDS) > 1 and not self.shard
+
+    def _requiere_shard(self):
+        # Paginar exigiría fusionar páginas de todos los shards: se pide el cliente
+        return Response(
+            {"detail": "Con varios shards esta lista requiere el filtro cliente."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    def _lotes(self, queryset):
+        # El streaming se consume después de restaurar el shard: cada lote fija su base.
+        # Con ids por rangos, recorrer los shards del último al primero conserva el -pk.
+        for alias in [self.shard] if self.shard else reversed(settings.SHARDS):
+            yield from super()._lotes(queryset.using(alias))
+
+
+class ClienteViewSet(ShardMixin, StreamingListMixin, NestedPrefetchMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar Clientes (Solo Administradores)."""
     serializer_class = ClienteSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrAdmin]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['activo', 'empresa']
     pagination_class = None
+    throttle_scopes = {'list': 'heavy'}
+    prefetch = ('proyectos__tareas__subtareas',)
 
     def get_queryset(self):
         user = self.request.user
@@ -42,7 +408,7 @@ class ClienteViewSet(viewsets.ModelViewSet):
         
         # Admin ve todos los clientes
         if profile and profile.role == 'ADMIN':
-            return Cliente.objects.all()
+            return Cliente.objects.prefetch_related(*self.prefetch)
         
         # Los clientes no pueden listar otros clientes
         return Cliente.objects.none()
@@ -62,13 +428,15 @@ class ClienteViewSet(viewsets.ModelViewSet):
         )
 
 
-class ProyectoViewSet(viewsets.ModelViewSet):
+class ProyectoViewSet(ShardMixin, VersionadoMixin, StreamingListMixin, NestedPrefetchMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar Proyectos."""
     serializer_class = ProyectoSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrAdmin]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['estado', 'cliente']
     pagination_class = None
+    throttle_scopes = {'list': 'heavy'}
+    prefetch = ('tareas__subtareas',)
 
     def get_queryset(self):
         user = self.request.user
@@ -76,7 +444,7 @@ class ProyectoViewSet(viewsets.ModelViewSet):
         
         # Admin ve todos los proyectos
         if profile and profile.role == 'ADMIN':
-            return Proyecto.objects.all()
+            return Proyecto.objects.prefetch_related(*self.prefetch)
         
         # Los clientes solo ven sus proyectos
         # Asumiendo que existe una relación entre Cliente y User
@@ -87,14 +455,151 @@ class ProyectoViewSet(viewsets.ModelViewSet):
         proyecto = serializer.save()
         proyecto.actualizar_progreso()
 
+    @action(detail=False, methods=['get'])
+    def resumen(self, request):
+        """
+        Resumen paginado por proyecto: tareas por estado y subtareas completadas,
+        calculado con una sola consulta agrupada por página (sin árbol anidado).
+        """
+        if self._sin_shard():
+            return self._requiere_shard()
+        conteos = {
+            'tareas_total': Count('tareas', distinct=True),
+            'subtareas_total': Count('tareas__subtareas'),
+            'subtareas_completadas': Count(
+                'tareas__subtareas', filter=Q(tareas__subtareas__completada=True)
+            ),
+        }
+        for i, (estado, _) in enumerate(Tarea.ESTADOS_TAREA):
+            conteos[f'tareas_estado_{i}'] = Count(
+                'tareas', filter=Q(tareas__estado=estado), distinct=True
+            )
+
+        queryset = (
+            self.filter_queryset(self.get_queryset())
+            .prefetch_related(None)
+            .order_by('-fecha_inicio', 'id')
+            .values('id', 'nombre', 'estado', 'progreso', 'cliente', 'fecha_inicio', 'fecha_entrega')
+            .annotate(**conteos)
+        )
+        paginator = PageNumberPagination()
+        pagina = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = ProyectoResumenSerializer(pagina, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'], url_path='en-riesgo')
+    def en_riesgo(self, request):
+        """
+        Proyectos no finalizados con la entrega vencida o próxima cuyo progreso va por
+        detrás del tiempo transcurrido, ordenados por riesgo. El cálculo se hace en SQL.
+        Parámetros: horizonte (días), margen (puntos) o fecha=AAAA-MM-DD para leer el
+        snapshot diario precalculado (manage.py snapshot_risk_report).
+        """
+        if self._sin_shard():
+            return self._requiere_shard()
+        try:
+            horizonte = int(request.query_params.get('horizonte', settings.RIESGO_HORIZONTE_DIAS))
+            margen = int(request.query_params.get('margen', settings.RIESGO_MARGEN))
+            fecha = request.query_params.get('fecha')
+            fecha = date.fromisoformat(fecha) if fecha else None
+        except ValueError:
+            return Response(
+                {"detail": "horizonte y margen deben ser enteros y fecha AAAA-MM-DD."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        visibles = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        if fecha is None:
+            queryset = (
+                proyectos_en_riesgo(timezone.localdate(), horizonte, margen)
+                .filter(pk__in=visibles.values('pk'))
+                .values(
+                    'id', 'nombre', 'cliente', 'estado', 'progreso', 'fecha_inicio', 'fecha_entrega',
+                    'progreso_esperado', 'riesgo', 'dias_restantes'
+                )
+            )
+        else:
+            queryset = (
+                ReporteRiesgo.objects.filter(fecha=fecha, proyecto__in=visibles.values('pk'))
+                .order_by('-riesgo', 'proyecto__fecha_entrega')
+                .values(
+                    'proyecto_id', 'proyecto__nombre', 'proyecto__cliente', 'proyecto__estado', 'progreso',
+                    'proyecto__fecha_inicio', 'proyecto__fecha_entrega',
+                    'progreso_esperado', 'riesgo', 'dias_restantes'
+                )
+            )
+        paginator = PageNumberPagination()
+        pagina = paginator.paginate_queryset(queryset, request, view=self)
+        if fecha is not None:
+            # Las columnas del proyecto vienen con prefijo desde el snapshot
+            pagina = [
+                {'id' if campo == 'proyecto_id' else campo.removeprefix('proyecto__'): valor
+                 for campo, valor in fila.items()}
+                for fila in pagina
+            ]
+        serializer = ProyectoRiesgoSerializer(pagina, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
-class TareaViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get'])
+    def historial(self, request):
+        """
+        Series de progreso para las curvas de burndown: ?proyectos=1,2,3&desde=&hasta=
+        (AAAA-MM-DD; por defecto los últimos 30 días). Una sola consulta sobre el índice
+        (proyecto, fecha) de ProgresoDiario, agrupada por proyecto, en cada shard de los
+        proyectos pedidos. Incluye los proyectos archivados, que conservan su historial.
+        """
+        try:
+            ids = [int(pk) for pk in request.query_params.get('proyectos', '').split(',') if pk.strip()]
+            hasta = request.query_params.get('hasta')
+            hasta = date.fromisoformat(hasta) if hasta else timezone.localdate()
+            desde = request.query_params.get('desde')
+            desde = date.fromisoformat(desde) if desde else hasta - timedelta(days=30)
+        except ValueError:
+            return Response(
+                {"detail": "proyectos debe ser una lista de ids separados por comas y las fechas AAAA-MM-DD."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not ids or len(ids) > settings.HISTORIAL_MAX_PROYECTOS or desde > hasta:
+            return Response(
+                {"detail": f"Indica entre 1 y {settings.HISTORIAL_MAX_PROYECTOS} proyectos y un rango desde <= hasta."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        por_shard = {}
+        for pk in ids:
+            try:
+                por_shard.setdefault(shards.shard_de_id(pk), []).append(pk)
+            except ValueError:
+                continue
+        profile = getattr(request.user, 'profile', None)
+        archivo = ProyectoArchivado.objects.all() if profile and profile.role == 'ADMIN' else ProyectoArchivado.objects.none()
+        series = []
+        # Con ids por rangos, recorrer los shards en orden conserva el orden por proyecto
+        for alias in sorted(por_shard, key=settings.SHARDS.index):
+            with shards.en_shard(alias):
+                vigentes = self.get_queryset().filter(pk__in=por_shard[alias]).values('pk')
+                archivados = archivo.filter(pk__in=por_shard[alias]).values('pk')
+                filas = (
+                    ProgresoDiario.objects
+                    .filter(Q(proyecto__in=vigentes) | Q(proyecto_id__in=archivados), fecha__range=(desde, hasta))
+                    .order_by('proyecto_id', 'fecha')
+                    .values('proyecto_id', 'fecha', 'progreso', *ProgresoDiario.COLUMNA_POR_ESTADO.values(), 'semanal')
+                )
+                series += [
+                    {'proyecto': proyecto, 'serie': ProgresoDiarioSerializer(list(puntos), many=True).data}
+                    for proyecto, puntos in groupby(filas, key=lambda fila: fila['proyecto_id'])
+                ]
+        return Response({'desde': desde, 'hasta': hasta, 'proyectos': series})
+
+
+class TareaViewSet(ShardMixin, VersionadoMixin, StreamingListMixin, NestedPrefetchMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar Tareas."""
     serializer_class = TareaSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrAdmin]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['estado', 'proyecto']
     pagination_class = None
+    prefetch = ('subtareas',)
 
     def get_queryset(self):
         user = self.request.user
@@ -102,7 +607,7 @@ class TareaViewSet(viewsets.ModelViewSet):
         
         # Admin ve todas las tareas
         if profile and profile.role == 'ADMIN':
-            return Tarea.objects.all()
+            return Tarea.objects.prefetch_related(*self.prefetch)
         
         # Los clientes solo ven tareas de sus proyectos
         return Tarea.objects.none()
@@ -116,9 +621,74 @@ class TareaViewSet(viewsets.ModelViewSet):
         """Actualiza la tarea y recalcula progreso del proyecto."""
         tarea = serializer.save()
         tarea.proyecto.actualizar_progreso()
+        self.recargar_instancia(serializer)
+
+    @action(detail=False, methods=['patch'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Actualiza estado/progreso de varias tareas en una sola operación.
+        Recibe [{id, estado, progreso, version}]: las filas se bloquean (SELECT ... FOR
+        UPDATE) dentro de la transacción, cada tarea recibe solo los campos que envió
+        (un UPDATE con CASE por campo) y se recalcula una sola vez cada proyecto
+        afectado. Si algún elemento trae una version que ya no es la actual, responde
+        412 con los conflictos y no modifica ninguna tarea.
+        """
+        serializer = TareaBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        cambios = serializer.validated_data
+
+        ids = [item['id'] for item in cambios]
+        with shards.atomic():
+            tareas = self.get_queryset().prefetch_related(None).select_for_update().in_bulk(ids)
+            faltantes = [pk for pk in ids if pk not in tareas]
+            if faltantes:
+                return Response(
+                    {"detail": "Tareas inexistentes.", "ids": faltantes},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            conflictos = [
+                {"id": item['id'], "version": tareas[item['id']].version}
+                for item in cambios
+                if 'version' in item and item['version'] != tareas[item['id']].version
+            ]
+            if conflictos:
+                return Response(
+                    {"detail": PrecondicionFallida.default_detail, "conflictos": conflictos},
+                    status=status.HTTP_412_PRECONDITION_FAILED
+                )
+
+            # {campo: {pk: valor}} solo con las tareas que enviaron ese campo
+            valores = {'estado': {}, 'progreso': {}}
+            for item in cambios:
+                for campo, por_pk in valores.items():
+                    if campo in item:
+                        por_pk[item['id']] = item[campo]
+            asignaciones = {
+                campo: Case(
+                    *[When(pk=pk, then=Value(valor)) for pk, valor in por_pk.items()],
+                    default=F(campo),
+                    output_field=Tarea._meta.get_field(campo),
+                )
+                for campo, por_pk in valores.items() if por_pk
+            }
+            Tarea.objects.filter(pk__in=ids).update(version=F('version') + 1, **asignaciones)
 
+            # update() no emite señales: el diff de cada tarea se registra aquí
+            for item in cambios:
+                tarea = tareas[item['id']]
+                enviados = [campo for campo in valores if campo in item]
+                for campo in enviados:
+                    setattr(tarea, campo, item[campo])
+                tarea.version += 1
+                auditoria.auditar_guardado(tarea, update_fields=enviados)
+            Proyecto.actualizar_progreso_en_lote(
+                {tarea.proyecto_id for tarea in tareas.values()}
+            )
 
-class SubTareaViewSet(viewsets.ModelViewSet):
+        return Response({"actualizadas": len(tareas)}, status=status.HTTP_200_OK)
+
+
+class SubTareaViewSet(ShardMixin, StreamingListMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar SubTareas."""
     serializer_class = SubTareaSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrAdmin]
@@ -137,3 +707,148 @@ class SubTareaViewSet(viewsets.ModelViewSet):
         # Los clientes solo ven subtareas de sus tareas
         return SubTarea.objects.none()
 
+
+class ProyectoArchivadoViewSet(ShardMixin, viewsets.ReadOnlyModelViewSet):
+    """Consulta histórica de proyectos archivados (solo lectura, paginada)."""
+    serializer_class = ProyectoArchivadoSerializer
+    permission_classes = [permissions.IsAuthenticated, IsOwnerOrAdmin]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['estado', 'cliente']
+
+    def get_queryset(self):
+        user = self.request.user
+        profile = getattr(user, 'profile', None)
+
+        # Solo los administradores consultan el archivo
+        if profile and profile.role == 'ADMIN':
+            return ProyectoArchivado.objects.prefetch_related('tareas__subtareas')
+
+        return ProyectoArchivado.objects.none()
+
+
+class ImportacionPlanView(ShardMixin, APIView):
+    """
+    Importa un plan desde un CSV subido en el campo 'archivo' (Solo Administradores).
+    El archivo se lee en streaming y se inserta por lotes; con ?reanudar=<id> se
+    continúa una importación interrumpida desde su última fila confirmada y con
+    ?async=1 se guarda en disco y se encola como trabajo (respuesta 202 inmediata).
+    Cada fila se inserta en el shard de su cliente (ver PlanImporter).
+    """
+    permission_classes = [permissions.IsAuthenticated, IsAdminRole]
+    parser_classes = [MultiPartParser]
+    throttle_scope = 'heavy'
+    max_errores = 1000
+
+    def post(self, request):
+        archivo = request.FILES.get('archivo')
+        if archivo is None:
+            return Response(
+                {"archivo": ["Debe adjuntar un archivo CSV."]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        reanudar = request.query_params.get('reanudar')
+        if reanudar:
+            importacion = ImportacionPlan.objects.filter(pk=reanudar, finalizada=False).first()
+            if importacion is None:
+                return Response(
+                    {"detail": "Importación inexistente o ya finalizada."},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+        else:
+            importacion = ImportacionPlan.objects.create(
+                nombre_archivo=archivo.name,
+                usuario=request.user
+            )
+
+        if request.query_params.get('async'):
+            return self.encolar(request, archivo, importacion)
+
+        errores = []
+
+        def reportar_error(fila, mensajes):
+            if len(errores) < self.max_errores:
+                errores.append({"fila": fila, "errores": mensajes})
+
+        lineas = io.TextIOWrapper(archivo.file, encoding='utf-8-sig', newline='')
+        try:
+            PlanImporter(importacion, reportar_error=reportar_error).ejecutar(lineas)
+        except ErrorDeFormato as exc:
+            return Response({"archivo": [str(exc)]}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            {
+                "importacion": ImportacionPlanSerializer(importacion).data,
+                "errores": errores,
+                "errores_truncados": importacion.filas_con_error > len(errores),
+            },
+            status=status.HTTP_201_CREATED
+        )
+
+    def encolar(self, request, archivo, importacion):
+        """Guarda el CSV en IMPORTACIONES_DIR y delega la importación a la cola de trabajos."""
+        os.makedirs(settings.IMPORTACIONES_DIR, exist_ok=True)
+        ruta = os.path.join(settings.IMPORTACIONES_DIR, f'{importacion.pk}.csv')
+        with open(ruta, 'wb') as destino:
+            for bloque in archivo.chunks():
+                destino.write(bloque)
+
+        trabajo = encolar(
+            'importar_plan',
+            {'ruta': ruta, 'importacion_id': importacion.pk, 'max_errores': self.max_errores},
+            usuario=request.user
+        )
+        return Response(
+            {
+                "importacion": ImportacionPlanSerializer(importacion).data,
+                "trabajo": TrabajoSerializer(trabajo).data,
+            },
+            status=status.HTTP_202_ACCEPTED
+        )
+
+
+class TrabajoViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Cola de trabajos pesados (Solo Administradores). POST encola y responde 202
+    sin esperar; GET /trabajos/{id}/ devuelve estado, intentos y resultado.
+    """
+    serializer_class = TrabajoSerializer
+    permission_classes = [permissions.IsAuthenticated, IsAdminRole]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['estado', 'tipo']
+    queryset = Trabajo.objects.all()
+
+    def perform_create(self, serializer):
+        serializer.save(usuario=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return response
+
+
+class AuditoriaPagination(CursorPagination):
+    """Paginación por cursor: estable y sin COUNT sobre una tabla que solo crece."""
+    ordering = '-id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
+class AuditoriaViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Historial de cambios de clientes, proyectos, tareas y subtareas (Solo Administradores).
+    Filtros: modelo, objeto_id, accion, usuario y rango fecha__gte / fecha__lte.
+    """
+    serializer_class = RegistroAuditoriaSerializer
+    permission_classes = [permissions.IsAuthenticated, IsAdminRole]
+    pagination_class = AuditoriaPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = {
+        'modelo': ['exact'],
+        'objeto_id': ['exact'],
+        'accion': ['exact'],
+        'usuario': ['exact'],
+        'fecha': ['gte', 'lte'],
+    }
+    queryset = RegistroAuditoria.objects.all()